@@ -0,0 +1,181 @@
+"""
+Modbus connector polling benchmark.
+
+Starts local pymodbus TCP (or RTU over TCP) simulators in a separate process and drives ModbusConnector
+with a stub gateway, so the measured CPU belongs to the connector only.
+
+Usage:
+    python -m tests.benchmarks.connectors.modbus.modbus_benchmark --devices 10 --tags 50 --poll-period 100
+"""
+
+import asyncio
+import logging
+from multiprocessing import Process, Event
+from threading import Thread, Event as ThreadEvent
+from time import sleep
+
+from pymodbus.datastore import ModbusSlaveContext, ModbusServerContext
+from pymodbus.framer.rtu_framer import ModbusRtuFramer
+from pymodbus.framer.socket_framer import ModbusSocketFramer
+from pymodbus.server import StartAsyncTcpServer
+
+from tests.test_utils.benchmark_utils import StubGateway, LatencyRecorder, CpuUsage, base_argument_parser, \
+    print_report, thread_cpu_by_name
+from thingsboard_gateway.connectors.modbus.server import ContiguousDataBlock
+
+LOG = logging.getLogger("BENCHMARK")
+
+FRAMERS = {
+    'socket': ModbusSocketFramer,
+    'rtu': ModbusRtuFramer
+}
+
+
+class ChangingDataBlock(ContiguousDataBlock):
+    """Datablock that answers after configured latency and changes its values on every read."""
+
+    def __init__(self, latency):
+        super().__init__()
+        self.__latency = latency
+        self.__counter = 0
+
+    def getValues(self, address, count=1):
+        if self.__latency:
+            sleep(self.__latency)
+
+        self.__counter = (self.__counter + 1) & 0x7FFF
+        return [self.__counter] * count
+
+
+def run_simulator(port, framer, latency, started):
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+
+    context = ModbusServerContext(slaves=ModbusSlaveContext(hr=ChangingDataBlock(latency),
+                                                            ir=ChangingDataBlock(latency)),
+                                  single=True)
+
+    async def serve():
+        server = await StartAsyncTcpServer(context=context, address=('127.0.0.1', port), framer=FRAMERS[framer],
+                                           defer_start=True, allow_reuse_address=True)
+        serve_task = asyncio.ensure_future(server.serve_forever())
+        await server.serving
+        started.set()
+        await serve_task
+
+    loop.run_until_complete(serve())
+
+
+def run_simulators(base_port, count, framer, latency, started, stop):
+    for index in range(count):
+        simulator_started = ThreadEvent()
+        Thread(target=run_simulator, args=(base_port + index, framer, latency, simulator_started), daemon=True).start()
+        if not simulator_started.wait(10):
+            LOG.error('Simulator on port %i is not started', base_port + index)
+            return
+
+    started.set()
+    stop.wait()
+
+
+def generate_config(args):
+    slaves = []
+    for index in range(args.devices):
+        slaves.append({
+            'name': f'Simulator {index}',
+            'deviceName': f'Simulator {index}',
+            'deviceType': 'benchmark',
+            'type': 'tcp',
+            'host': '127.0.0.1',
+            'port': args.base_port + index,
+            'method': args.framer,
+            'unitId': 1,
+            'timeout': 5,
+            'retries': 0,
+            'pollPeriod': args.poll_period,
+            'attributes': [],
+            'timeseries': [{
+                'tag': f'tag{tag}',
+                'type': '16int',
+                'functionCode': 3,
+                'objectsCount': args.objects_count,
+                'address': tag * args.objects_count
+            } for tag in range(args.tags)],
+            'attributeUpdates': [],
+            'rpc': []
+        })
+
+    return {
+        'name': 'Modbus benchmark',
+        'logLevel': 'ERROR',
+        'reportStrategy': {'type': 'ON_CHANGE'},
+        'master': {'slaves': slaves}
+    }
+
+
+def main():
+    parser = base_argument_parser('Modbus connector polling benchmark')
+    parser.add_argument('--devices', type=int, default=5, help='Number of simulated devices')
+    parser.add_argument('--tags', type=int, default=20, help='Number of timeseries tags per device')
+    parser.add_argument('--objects-count', type=int, default=1, help='Registers read by one tag')
+    parser.add_argument('--poll-period', type=int, default=100, help='Poll period in milliseconds')
+    parser.add_argument('--latency', type=float, default=0, help='Simulator response latency in milliseconds')
+    parser.add_argument('--framer', choices=FRAMERS.keys(), default='socket',
+                        help='socket - Modbus TCP, rtu - RTU over TCP')
+    parser.add_argument('--base-port', type=int, default=15020)
+    args = parser.parse_args()
+
+    simulators_started = Event()
+    stop_simulators = Event()
+    simulators = Process(target=run_simulators, args=(args.base_port, args.devices, args.framer, args.latency / 1000,
+                                                      simulators_started, stop_simulators), daemon=True)
+    simulators.start()
+    if not simulators_started.wait(30):
+        raise TimeoutError('Simulators are not started')
+
+    from thingsboard_gateway.connectors.modbus.modbus_connector import ModbusConnector
+
+    poll_latency = LatencyRecorder()
+    ModbusConnector._ModbusConnector__poll_device = poll_latency.measure(ModbusConnector._ModbusConnector__poll_device)
+
+    gateway = StubGateway()
+    connector = ModbusConnector(gateway, generate_config(args), 'modbus')
+    connector.open()
+
+    sleep(args.warmup)
+    poll_latency.reset()
+    cpu_usage = CpuUsage()
+    started_messages, started_datapoints = gateway.snapshot()
+    cpu_usage.start()
+
+    sleep(args.duration)
+
+    cpu = cpu_usage.stop()
+    cpu_by_thread = thread_cpu_by_name(cpu['perThreadCpuSeconds'])
+    messages, datapoints = gateway.snapshot()
+    polls = len(poll_latency)
+
+    connector.close()
+    stop_simulators.set()
+    simulators.join(5)
+
+    report = {
+        'devices': args.devices,
+        'tagsPerDevice': args.tags,
+        'pollPeriodMs': args.poll_period,
+        'simulatorLatencyMs': args.latency,
+        'polls/s': polls / cpu['elapsed'],
+        'expectedPolls/s': args.devices * 1000 / args.poll_period,
+        'messages/s': (messages - started_messages) / cpu['elapsed'],
+        'datapoints/s': (datapoints - started_datapoints) / cpu['elapsed'],
+        'pollLatencyP50Ms': poll_latency.percentile(50) * 1000,
+        'pollLatencyP99Ms': poll_latency.percentile(99) * 1000,
+        'cpuPercent': cpu['cpuPercent'],
+        'threads': cpu['threads'],
+        'cpuSecondsByThread': cpu_by_thread
+    }
+    print_report('Modbus connector polling benchmark', report, as_json=args.json)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,484 @@
+"""
+MQTT connector ingest benchmark.
+
+Replays a configurable mix of topics and payloads through MqttConnector with a stub gateway and reports
+throughput, latency histograms and CPU usage of every connector stage (routing, parsing/merging, conversion,
+storage).
+
+Messages are delivered either by a fake paho client, that calls on_message of the connector directly (no network,
+only the connector is measured), or through a local amqtt broker, started in a separate process (MQTT 3.1.1 only).
+
+Usage:
+    python -m tests.benchmarks.connectors.mqtt.mqtt_benchmark --mix json=3,bytes=1 --devices 100 --keys 10
+    python -m tests.benchmarks.connectors.mqtt.mqtt_benchmark --transport amqtt --rate 5000
+"""
+
+import asyncio
+from multiprocessing import Process, Event
+from random import random, randint
+from struct import pack
+from threading import Thread, Event as ThreadEvent, Lock
+from time import sleep, monotonic, thread_time
+
+from paho.mqtt.client import MQTTMessage
+
+from tests.test_utils.benchmark_utils import StubGateway, LatencyRecorder, CpuUsage, base_argument_parser, \
+    print_report, thread_cpu_by_name
+
+REPLAYER_THREAD_NAME = 'Replayer'
+
+
+class FakeClient:
+    """
+    Replacement of paho Client without network.
+    Connection is accepted immediately, messages are passed to on_message by the benchmark replayer.
+    """
+
+    def __init__(self, client_id='', *args, **kwargs):
+        self.client_id = client_id
+        self.on_connect = None
+        self.on_message = None
+        self.on_subscribe = None
+        self.on_disconnect = None
+        self.subscriptions = []
+        self.__userdata = None
+        self.__mid = 0
+
+    def user_data_set(self, userdata):
+        self.__userdata = userdata
+
+    def username_pw_set(self, *args, **kwargs):
+        pass
+
+    def connect(self, *args, **kwargs):
+        return 0
+
+    def connect_async(self, *args, **kwargs):
+        pass
+
+    def loop_start(self):
+        if self.on_connect is not None:
+            self.on_connect(self, self.__userdata, {}, 0)
+
+    def loop_stop(self):
+        pass
+
+    def disconnect(self):
+        pass
+
+    def subscribe(self, topic, qos=0):
+        self.__mid += 1
+        self.subscriptions.append(topic)
+        return 0, self.__mid
+
+    def unsubscribe(self, topic):
+        return 0, self.__mid
+
+    def publish(self, *args, **kwargs):
+        pass
+
+    def deliver(self, message):
+        self.on_message(self, self.__userdata, message)
+
+
+class BenchmarkGateway(StubGateway):
+    def send_attributes(self, *args, **kwargs):
+        pass
+
+    def is_rpc_in_progress(self, topic):
+        return False
+
+
+class MessageMix:
+    """
+    Generates topics and payloads of the configured mix.
+    Every device publishes json ({"key0": 1.5, ...}) or bytes (name + 4 byte float for every key) payloads,
+    "unchanged" part of the messages repeats the previous payload of the device.
+    """
+
+    PAYLOAD_TYPES = ('json', 'bytes')
+
+    def __init__(self, mix, devices, keys, unchanged):
+        self.__weights = self.parse_mix(mix)
+        self.__devices = devices
+        self.__keys = keys
+        self.__unchanged = unchanged
+        self.__previous_payloads = {}
+
+        self.__topics = []
+        for (payload_type, weight) in self.__weights.items():
+            self.__topics.extend([payload_type] * weight)
+
+    @classmethod
+    def parse_mix(cls, mix):
+        weights = {}
+        for item in mix.split(','):
+            payload_type, _, weight = item.partition('=')
+            if payload_type not in cls.PAYLOAD_TYPES:
+                raise ValueError(f'Unknown payload type "{payload_type}", supported: {", ".join(cls.PAYLOAD_TYPES)}')
+            weights[payload_type] = int(weight or 1)
+        return weights
+
+    @property
+    def payload_types(self):
+        return list(self.__weights)
+
+    def next(self, number):
+        payload_type = self.__topics[number % len(self.__topics)]
+        device = number % self.__devices
+        topic = f'benchmark/{payload_type}/device{device}'
+
+        previous_payload = self.__previous_payloads.get(topic)
+        if previous_payload is not None and random() < self.__unchanged:
+            return topic, previous_payload
+
+        if payload_type == 'json':
+            payload = ('{' + ', '.join(f'"key{key}": {randint(0, 10000) / 10}' for key in range(self.__keys))
+                       + '}').encode('utf-8')
+        else:
+            payload = f'D{device:07d}'.encode('utf-8') + b''.join(pack('>f', randint(0, 10000) / 10)
+                                                                 for _ in range(self.__keys))
+
+        self.__previous_payloads[topic] = payload
+        return topic, payload
+
+
+def generate_config(args, payload_types):
+    mapping = []
+    if 'json' in payload_types:
+        mapping.append({
+            'topicFilter': 'benchmark/json/+',
+            'subscriptionQos': args.qos,
+            'converter': {
+                'type': 'json',
+                'sendDataOnlyOnChange': args.on_change,
+                'deviceInfo': {
+                    'deviceNameExpressionSource': 'topic',
+                    'deviceNameExpression': '(?<=benchmark/json/)(.*)',
+                    'deviceProfileExpressionSource': 'constant',
+                    'deviceProfileExpression': 'benchmark'
+                },
+                'attributes': [],
+                'timeseries': [{'type': 'double', 'key': f'key{key}', 'value': f'${{key{key}}}'}
+                               for key in range(args.keys)]
+            }
+        })
+    if 'bytes' in payload_types:
+        mapping.append({
+            'topicFilter': 'benchmark/bytes/+',
+            'subscriptionQos': args.qos,
+            'converter': {
+                'type': 'bytes',
+                'sendDataOnlyOnChange': args.on_change,
+                'deviceInfo': {
+                    'deviceNameExpression': '[0:8]',
+                    'deviceProfileExpression': 'benchmark'
+                },
+                'attributes': [],
+                'timeseries': [{'type': 'float', 'key': f'key{key}', 'value': f'[{8 + key * 4}:{12 + key * 4}]'}
+                               for key in range(args.keys)]
+            }
+        })
+
+    return {
+        'name': 'MQTT benchmark',
+        'logLevel': 'ERROR',
+        'broker': {
+            'host': '127.0.0.1',
+            'port': args.port,
+            'clientId': 'mqtt-benchmark',
+            'version': 5 if args.transport == 'fake' else 4,
+            'maxMessageNumberPerWorker': args.batch_size,
+            'maxNumberOfWorkers': args.workers,
+            'security': {'type': 'anonymous'}
+        },
+        'mapping': mapping
+    }
+
+
+def run_broker(port, started, stop):
+    from amqtt.broker import Broker
+
+    config = {
+        'listeners': {'default': {'type': 'tcp', 'bind': f'127.0.0.1:{port}'}},
+        'sys_interval': 0,
+        'plugins': {'amqtt.plugins.authentication.AnonymousAuthPlugin': {'allow_anonymous': True}}
+    }
+
+    async def serve():
+        broker = Broker(config)
+        await broker.start()
+        started.set()
+        while not stop.is_set():
+            await asyncio.sleep(.2)
+        await broker.shutdown()
+
+    asyncio.run(serve())
+
+
+class Replayer(Thread):
+    """
+    Publishes messages of the mix with configured rate (0 - as fast as possible).
+    Number of messages, that are published, but not processed by the connector yet, is limited,
+    so the connector queues do not grow endlessly.
+    """
+
+    def __init__(self, mix, publish, rate, max_in_flight, processed):
+        super().__init__(name=REPLAYER_THREAD_NAME, daemon=True)
+        self.__mix = mix
+        self.__publish = publish
+        self.__rate = rate
+        self.__max_in_flight = max_in_flight
+        self.__processed = processed
+        self.stopped = ThreadEvent()
+        self.published = 0
+
+    def run(self):
+        started = monotonic()
+        while not self.stopped.is_set():
+            if self.published - self.__processed() >= self.__max_in_flight:
+                sleep(.001)
+                continue
+
+            if self.__rate:
+                delay = started + self.published / self.__rate - monotonic()
+                if delay > 0:
+                    sleep(delay)
+
+            topic, payload = self.__mix.next(self.published)
+            self.__publish(topic, payload)
+            self.published += 1
+
+
+def fake_publisher(clients):
+    def publish(topic, payload):
+        message = MQTTMessage(topic=topic.encode('utf-8'))
+        message.payload = payload
+        message.timestamp = monotonic()
+        clients[0].deliver(message)
+
+    return publish
+
+
+def broker_publisher(port, qos):
+    from paho.mqtt.client import Client, MQTTv311
+
+    client = Client('mqtt-benchmark-publisher', protocol=MQTTv311)
+    client.max_inflight_messages_set(1000)
+    client.max_queued_messages_set(0)
+    client.connect('127.0.0.1', port)
+    client.loop_start()
+
+    def publish(topic, payload):
+        client.publish(topic, payload, qos)
+
+    return publish, client
+
+
+class StageMetrics:
+    """Wraps connector methods and collects latency and CPU time of the processing stages."""
+
+    def __init__(self):
+        self.__lock = Lock()
+        self.processed = 0
+        self.batch_latency = LatencyRecorder()
+        self.end_to_end_latency = LatencyRecorder()
+        self.conversion_latency = {}
+        self.cpu_seconds = {'conversion': 0.0, 'storage': 0.0, 'convertMessages': 0.0}
+
+    def reset(self):
+        with self.__lock:
+            self.cpu_seconds = {stage: 0.0 for stage in self.cpu_seconds}
+        self.batch_latency.reset()
+        self.end_to_end_latency.reset()
+        for recorder in self.conversion_latency.values():
+            recorder.reset()
+
+    def add_cpu(self, stage, seconds):
+        with self.__lock:
+            self.cpu_seconds[stage] += seconds
+
+    def count_processed(self, count):
+        with self.__lock:
+            self.processed += count
+
+    def wrap_convert_messages(self, convert_messages):
+        def inner(connector, messages):
+            started_cpu = thread_time()
+            try:
+                return self.batch_latency.measure(convert_messages)(connector, messages)
+            finally:
+                finished = monotonic()
+                self.add_cpu('convertMessages', thread_time() - started_cpu)
+                for (_, message) in messages:
+                    self.end_to_end_latency.record(finished - message.timestamp)
+                self.count_processed(len(messages))
+
+        return inner
+
+    def wrap_converter(self, converter):
+        recorder = self.conversion_latency.setdefault(converter.__class__.__name__, LatencyRecorder())
+
+        def wrap(method, messages_count):
+            def inner(*args):
+                started, started_cpu = monotonic(), thread_time()
+                try:
+                    return method(*args)
+                finally:
+                    elapsed = monotonic() - started
+                    count = messages_count(args)
+                    for _ in range(count):
+                        recorder.record(elapsed / count)
+                    self.add_cpu('conversion', thread_time() - started_cpu)
+
+            return inner
+
+        converter.convert = wrap(converter.convert, lambda args: 1)
+        converter.convert_batch = wrap(converter.convert_batch, lambda args: max(len(args[0]), 1))
+
+    def wrap_storage(self, gateway):
+        send_to_storage = gateway.send_to_storage
+
+        def inner(*args):
+            started_cpu = thread_time()
+            try:
+                return send_to_storage(*args)
+            finally:
+                self.add_cpu('storage', thread_time() - started_cpu)
+
+        gateway.send_to_storage = inner
+
+
+def main():
+    parser = base_argument_parser('MQTT connector ingest benchmark')
+    parser.add_argument('--transport', choices=('fake', 'amqtt'), default='fake',
+                        help='fake - messages are passed to the connector by fake paho client, '
+                             'amqtt - messages are published through local amqtt broker')
+    parser.add_argument('--mix', default='json=1', help='Payload types with weights, e.g. json=3,bytes=1')
+    parser.add_argument('--devices', type=int, default=100, help='Number of devices (topics) per payload type')
+    parser.add_argument('--keys', type=int, default=10, help='Number of timeseries keys in a message')
+    parser.add_argument('--unchanged', type=float, default=0,
+                        help='Part of messages (0..1), that repeat the previous payload of the device')
+    parser.add_argument('--on-change', action='store_true', help='Enable sendDataOnlyOnChange for converters')
+    parser.add_argument('--rate', type=float, default=0, help='Published messages per second, 0 - unlimited')
+    parser.add_argument('--max-in-flight', type=int, default=10000,
+                        help='Maximum number of published, but not processed messages')
+    parser.add_argument('--batch-size', type=int, default=10, help='maxMessageNumberPerWorker of the connector')
+    parser.add_argument('--workers', type=int, default=100, help='maxNumberOfWorkers of the connector')
+    parser.add_argument('--qos', type=int, default=0, choices=(0, 1), help='Subscription and publishing QoS')
+    parser.add_argument('--port', type=int, default=18830, help='Port of the amqtt broker')
+    args = parser.parse_args()
+
+    mix = MessageMix(args.mix, args.devices, args.keys, args.unchanged)
+
+    import thingsboard_gateway.connectors.mqtt.mqtt_connector as mqtt_connector_module
+    from thingsboard_gateway.connectors.mqtt.mqtt_connector import MqttConnector
+
+    metrics = StageMetrics()
+    MqttConnector._convert_messages = metrics.wrap_convert_messages(MqttConnector._convert_messages)
+
+    broker = None
+    stop_broker = Event()
+    fake_clients = []
+    if args.transport == 'fake':
+        def create_fake_client(*client_args, **client_kwargs):
+            client = FakeClient(*client_args, **client_kwargs)
+            fake_clients.append(client)
+            return client
+
+        mqtt_connector_module.Client = create_fake_client
+    else:
+        broker_started = Event()
+        broker = Process(target=run_broker, args=(args.port, broker_started, stop_broker), daemon=True)
+        broker.start()
+        if not broker_started.wait(30):
+            raise TimeoutError('Broker is not started')
+
+    gateway = BenchmarkGateway()
+    metrics.wrap_storage(gateway)
+    connector = MqttConnector(gateway, generate_config(args, mix.payload_types), 'mqtt')
+    connector.open()
+
+    # Converters are created by the connector on connect
+    while len(connector.get_converters()) < len(mix.payload_types):
+        sleep(.1)
+
+    for converter in connector.get_converters():
+        metrics.wrap_converter(converter)
+
+    publisher_client = None
+    if args.transport == 'fake':
+        publish = fake_publisher(fake_clients)
+    else:
+        # Subscriptions are confirmed asynchronously
+        sleep(1)
+        publish, publisher_client = broker_publisher(args.port, args.qos)
+
+    replayer = Replayer(mix, publish, args.rate, args.max_in_flight, lambda: metrics.processed)
+    replayer.start()
+
+    sleep(args.warmup)
+    metrics.reset()
+    cpu_usage = CpuUsage()
+    started_published, started_processed = replayer.published, metrics.processed
+    started_messages, started_datapoints = gateway.snapshot()
+    cpu_usage.start()
+
+    sleep(args.duration)
+
+    cpu = cpu_usage.stop()
+    cpu_by_thread = thread_cpu_by_name(cpu['perThreadCpuSeconds'])
+    messages, datapoints = gateway.snapshot()
+    published, processed = replayer.published, metrics.processed
+    stage_cpu = dict(metrics.cpu_seconds)
+
+    replayer.stopped.set()
+    replayer.join(5)
+    if publisher_client is not None:
+        publisher_client.disconnect()
+        publisher_client.loop_stop()
+    connector.close()
+    if broker is not None:
+        stop_broker.set()
+        broker.join(5)
+
+    elapsed = cpu['elapsed']
+    report = {
+        'transport': args.transport,
+        'mix': args.mix,
+        'devices': args.devices,
+        'keysPerMessage': args.keys,
+        'published msgs/s': (published - started_published) / elapsed,
+        'processed msgs/s': (processed - started_processed) / elapsed,
+        'storage calls/s': (messages - started_messages) / elapsed,
+        'datapoints/s': (datapoints - started_datapoints) / elapsed,
+        'endToEndLatencyP50Ms': metrics.end_to_end_latency.percentile(50) * 1000,
+        'endToEndLatencyP99Ms': metrics.end_to_end_latency.percentile(99) * 1000,
+        'batchLatencyP50Ms': metrics.batch_latency.percentile(50) * 1000,
+        'batchLatencyP99Ms': metrics.batch_latency.percentile(99) * 1000,
+        'endToEndLatencyHistogram': metrics.end_to_end_latency.histogram(),
+        'batchLatencyHistogram': metrics.batch_latency.histogram()
+    }
+    for (converter_name, recorder) in metrics.conversion_latency.items():
+        if len(recorder):
+            report[f'{converter_name}LatencyPerMessageHistogram'] = recorder.histogram(
+                buckets_ms=(0.01, 0.05, 0.1, 0.5, 1, 5, 10))
+
+    # Routing is done in "On Message" thread, decoding, merging and statistics - in _convert_messages
+    # outside converters and storage
+    report['cpuSecondsByStage'] = {
+        'routing': cpu_by_thread.get('On Message', 0.0),
+        'decodingAndMerging': max(stage_cpu['convertMessages'] - stage_cpu['conversion'] - stage_cpu['storage'], 0),
+        'conversion': stage_cpu['conversion'],
+        'storage': stage_cpu['storage'],
+        'converterWorkers': sum(cpu for (name, cpu) in cpu_by_thread.items() if 'Worker' in name),
+        'replayer': cpu_by_thread.get(REPLAYER_THREAD_NAME, 0.0)
+    }
+    report['cpuPercent'] = cpu['cpuPercent']
+    report['threads'] = cpu['threads']
+    report['cpuSecondsByThread'] = cpu_by_thread
+    print_report('MQTT connector ingest benchmark', report, as_json=args.json)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,231 @@
+"""
+OPC-UA connector benchmark.
+
+Starts a local asyncua server with a generated address space in a separate process and drives OpcUaConnector
+in subscription or polling mode with a stub gateway, so external containers are not needed and the measured CPU
+belongs to the connector only.
+Every value, written by the server, is the time of its change, so end-to-end latency is measured from the change
+on the server to sending of the converted value to the storage.
+
+Usage:
+    python -m tests.benchmarks.connectors.opcua.opcua_benchmark --devices 50 --nodes 20 --change-period 100
+    python -m tests.benchmarks.connectors.opcua.opcua_benchmark --mode polling --poll-period 500
+"""
+
+import asyncio
+from multiprocessing import Process, Event
+from threading import Lock
+from time import sleep, monotonic, time
+
+from tests.test_utils.benchmark_utils import StubGateway, LatencyRecorder, CpuUsage, base_argument_parser, \
+    print_report, thread_cpu_by_name
+
+NAMESPACE = 'http://thingsboard.io/benchmark'
+
+
+def run_server(port, devices, nodes, change_period, started, stop):
+    from asyncua import Server, ua
+
+    async def serve():
+        server = Server()
+        await server.init()
+        server.set_endpoint(f'opc.tcp://127.0.0.1:{port}/benchmark/')
+        namespace_index = await server.register_namespace(NAMESPACE)
+
+        variables = []
+        for device_index in range(devices):
+            device = await server.nodes.objects.add_object(namespace_index, f'Device{device_index}')
+            await device.add_variable(namespace_index, 'serialNumber', f'SN{device_index}')
+            for node_index in range(nodes):
+                variable = await device.add_variable(namespace_index, f'node{node_index}', 0.0)
+                variables.append(variable.nodeid)
+
+        async with server:
+            started.set()
+            while not stop.is_set():
+                change_started = monotonic()
+                for node_id in variables:
+                    value = ua.DataValue(ua.Variant(time(), ua.VariantType.Double))
+                    await server.write_attribute_value(node_id, value)
+                await asyncio.sleep(max(change_period - (monotonic() - change_started), 0))
+
+    asyncio.run(serve())
+
+
+def generate_config(args):
+    mapping = []
+    for device_index in range(args.devices):
+        device_path = f'Root\\.Objects\\.Device{device_index}'
+        mapping.append({
+            'deviceNodePattern': device_path,
+            'deviceNodeSource': 'path',
+            'deviceInfo': {
+                'deviceNameExpression': f'${{{device_path}\\.serialNumber}}',
+                'deviceNameExpressionSource': 'path',
+                'deviceProfileExpression': 'benchmark',
+                'deviceProfileExpressionSource': 'constant'
+            },
+            'attributes': [],
+            'timeseries': [{'key': f'node{node_index}', 'type': 'path', 'value': f'${{node{node_index}}}'}
+                           for node_index in range(args.nodes)],
+            'attributes_updates': [],
+            'rpc_methods': []
+        })
+
+    return {
+        'name': 'OPC-UA benchmark',
+        'logLevel': 'ERROR',
+        'server': {
+            'url': f'opc.tcp://127.0.0.1:{args.port}/benchmark/',
+            'timeoutInMillis': 10000,
+            'scanPeriodInMillis': 3600000,
+            'pollPeriodInMillis': args.poll_period,
+            'enableSubscriptions': args.mode == 'subscription',
+            'subCheckPeriodInMillis': args.publishing_interval,
+            'enableBrowseCache': args.browse_cache,
+            'security': 'Basic128Rsa15',
+            'identity': {'type': 'anonymous'}
+        },
+        'mapping': mapping
+    }
+
+
+class DataRecorder:
+    """Records end-to-end latency of converted values and the time, when every device sent its first data."""
+
+    def __init__(self, gateway):
+        self.latency = LatencyRecorder()
+        self.__lock = Lock()
+        self.__first_data = {}
+        self.__recording = False
+        gateway.on_storage = self.on_storage
+
+    def on_storage(self, data):
+        received = time()
+        with self.__lock:
+            self.__first_data.setdefault(data.device_name, monotonic())
+        if not self.__recording:
+            return
+
+        for telemetry_entry in data.telemetry:
+            for value in telemetry_entry.values.values():
+                try:
+                    self.latency.record(received - float(value))
+                except (TypeError, ValueError):
+                    pass
+
+    def start(self):
+        self.latency.reset()
+        self.__recording = True
+
+    def devices_with_data(self):
+        with self.__lock:
+            return len(self.__first_data)
+
+    def last_first_data(self):
+        with self.__lock:
+            return max(self.__first_data.values(), default=None)
+
+
+def measure_async(recorder, func):
+    async def inner(*args, **kwargs):
+        started = monotonic()
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            recorder.record(monotonic() - started)
+
+    return inner
+
+
+def main():
+    parser = base_argument_parser('OPC-UA connector benchmark')
+    parser.add_argument('--mode', choices=('subscription', 'polling'), default='subscription')
+    parser.add_argument('--devices', type=int, default=20, help='Number of devices in the address space')
+    parser.add_argument('--nodes', type=int, default=10, help='Number of variables per device')
+    parser.add_argument('--change-period', type=int, default=100,
+                        help='Period of changing of all variables by the server in milliseconds')
+    parser.add_argument('--poll-period', type=int, default=500, help='Poll period in milliseconds')
+    parser.add_argument('--publishing-interval', type=int, default=100,
+                        help='Publishing interval of subscriptions in milliseconds')
+    parser.add_argument('--browse-cache', action='store_true', help='Use the browse cache of the previous run')
+    parser.add_argument('--startup-timeout', type=float, default=120)
+    parser.add_argument('--port', type=int, default=14840)
+    args = parser.parse_args()
+
+    server_started = Event()
+    stop_server = Event()
+    server = Process(target=run_server, args=(args.port, args.devices, args.nodes, args.change_period / 1000,
+                                              server_started, stop_server), daemon=True)
+    server.start()
+    if not server_started.wait(60):
+        raise TimeoutError('OPC-UA server is not started')
+
+    from thingsboard_gateway.connectors.opcua import opcua_connector
+    from thingsboard_gateway.connectors.opcua.opcua_connector import OpcUaConnector
+
+    scan_time = LatencyRecorder()
+    OpcUaConnector._OpcUaConnector__scan_device_nodes = measure_async(
+        scan_time, OpcUaConnector._OpcUaConnector__scan_device_nodes)
+
+    notifications = [0]
+    datachange_notification = opcua_connector.SubHandler.datachange_notification
+
+    def count_notification(self, *args):
+        notifications[0] += 1
+        datachange_notification(self, *args)
+
+    opcua_connector.SubHandler.datachange_notification = count_notification
+
+    gateway = StubGateway()
+    recorder = DataRecorder(gateway)
+    connector = OpcUaConnector(gateway, generate_config(args), 'opcua')
+    started = monotonic()
+    connector.open()
+
+    while recorder.devices_with_data() < args.devices and monotonic() - started < args.startup_timeout:
+        sleep(.05)
+    startup_time = recorder.last_first_data() - started if recorder.devices_with_data() else None
+
+    sleep(args.warmup)
+    recorder.start()
+    cpu_usage = CpuUsage()
+    started_messages, started_datapoints = gateway.snapshot()
+    started_notifications = notifications[0]
+    cpu_usage.start()
+
+    sleep(args.duration)
+
+    cpu = cpu_usage.stop()
+    cpu_by_thread = thread_cpu_by_name(cpu['perThreadCpuSeconds'])
+    messages, datapoints = gateway.snapshot()
+    received_notifications = notifications[0] - started_notifications
+
+    connector.close()
+    stop_server.set()
+    server.join(5)
+
+    report = {
+        'mode': args.mode,
+        'devices': args.devices,
+        'nodesPerDevice': args.nodes,
+        'changePeriodMs': args.change_period,
+        'expectedChanges/s': args.devices * args.nodes * 1000 / args.change_period,
+        'devicesWithData': recorder.devices_with_data(),
+        'startupToAllDevicesDataS': startup_time,
+        'firstScanS': scan_time.percentile(0),
+        'notifications/s': received_notifications / cpu['elapsed'],
+        'messages/s': (messages - started_messages) / cpu['elapsed'],
+        'datapoints/s': (datapoints - started_datapoints) / cpu['elapsed'],
+        'latencyP50Ms': recorder.latency.percentile(50) * 1000,
+        'latencyP99Ms': recorder.latency.percentile(99) * 1000,
+        'latencyHistogram': recorder.latency.histogram(buckets_ms=(10, 50, 100, 250, 500, 1000, 5000)),
+        'cpuPercent': cpu['cpuPercent'],
+        'threads': cpu['threads'],
+        'cpuSecondsByThread': cpu_by_thread
+    }
+    print_report('OPC-UA connector benchmark', report, as_json=args.json)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,203 @@
+from argparse import ArgumentParser
+from threading import Lock
+from time import monotonic, perf_counter
+
+import psutil
+from simplejson import dumps
+
+from thingsboard_gateway.gateway.constants import TELEMETRY_PARAMETER, ATTRIBUTES_PARAMETER
+
+
+class StubGateway:
+    """
+    Minimal replacement of TBGatewayService for running connectors without ThingsBoard and storage.
+    Counts messages and datapoints passed to send_to_storage.
+    """
+
+    def __init__(self, config_path='/tmp/'):
+        self.tb_client = None
+        self.__config_path = config_path
+        self.__lock = Lock()
+        self.messages = 0
+        self.datapoints = 0
+        self.devices = set()
+        self.rpc_replies = []
+        self.on_storage = None
+
+    def get_config_path(self):
+        return self.__config_path
+
+    def send_to_storage(self, connector_name, connector_id, data):
+        datapoints = 0
+        for item in (data if isinstance(data, list) else [data]):
+            datapoints += self.count_datapoints(item)
+
+        with self.__lock:
+            self.messages += 1
+            self.datapoints += datapoints
+
+        if self.on_storage is not None:
+            self.on_storage(data)
+
+    @staticmethod
+    def count_datapoints(data):
+        if hasattr(data, 'telemetry_datapoints_count'):
+            return data.telemetry_datapoints_count + data.attributes_datapoints_count
+
+        datapoints = 0
+        for telemetry_entry in data.get(TELEMETRY_PARAMETER, []):
+            datapoints += len(telemetry_entry.get('values', telemetry_entry))
+        datapoints += sum(len(attribute) for attribute in data.get(ATTRIBUTES_PARAMETER, []))
+        return datapoints
+
+    def add_device(self, device_name, content, device_type=None):
+        self.devices.add(device_name)
+
+    def del_device(self, device_name):
+        self.devices.discard(device_name)
+
+    def update_device(self, device_name, event, content):
+        pass
+
+    def send_telemetry(self, telemetry, quality_of_service=None):
+        pass
+
+    def send_rpc_reply(self, device=None, req_id=None, content=None, success_sent=None, wait_for_publish=None,
+                       quality_of_service=0):
+        self.rpc_replies.append((device, req_id, content, success_sent))
+
+    def update_connector_config_file(self, connector_name, config):
+        pass
+
+    def get_devices(self, connector_id=None):
+        return {device: {} for device in self.devices}
+
+    def snapshot(self):
+        with self.__lock:
+            return self.messages, self.datapoints
+
+
+class LatencyRecorder:
+    def __init__(self):
+        self.__lock = Lock()
+        self.__samples = []
+
+    def record(self, seconds):
+        with self.__lock:
+            self.__samples.append(seconds)
+
+    def measure(self, func):
+        def inner(*args, **kwargs):
+            started = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.record(perf_counter() - started)
+
+        return inner
+
+    def reset(self):
+        with self.__lock:
+            self.__samples = []
+
+    def __len__(self):
+        return len(self.__samples)
+
+    def percentile(self, percent):
+        with self.__lock:
+            samples = sorted(self.__samples)
+
+        if not samples:
+            return 0.0
+
+        index = min(len(samples) - 1, max(0, round(percent / 100 * len(samples)) - 1))
+        return samples[index]
+
+    def histogram(self, buckets_ms=(0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000)):
+        with self.__lock:
+            samples = list(self.__samples)
+
+        result = {}
+        previous = 0
+        for bucket in buckets_ms:
+            result[f'<={bucket}ms'] = sum(1 for sample in samples if previous < sample * 1000 <= bucket)
+            previous = bucket
+        result[f'>{previous}ms'] = sum(1 for sample in samples if sample * 1000 > previous)
+        return result
+
+
+class CpuUsage:
+    """Measures CPU time of the current process and of each of its threads."""
+
+    def __init__(self):
+        self.__process = psutil.Process()
+        self.__started = None
+        self.__started_cpu = None
+        self.__started_threads = {}
+
+    def start(self):
+        self.__started = monotonic()
+        cpu_times = self.__process.cpu_times()
+        self.__started_cpu = cpu_times.user + cpu_times.system
+        self.__started_threads = self.__threads_cpu()
+
+    def stop(self):
+        elapsed = monotonic() - self.__started
+        cpu_times = self.__process.cpu_times()
+        used_cpu = cpu_times.user + cpu_times.system - self.__started_cpu
+        threads_cpu = self.__threads_cpu()
+        per_thread = {thread_id: cpu - self.__started_threads.get(thread_id, 0)
+                      for (thread_id, cpu) in threads_cpu.items()}
+        return {
+            'elapsed': elapsed,
+            'cpuSeconds': used_cpu,
+            'cpuPercent': used_cpu / elapsed * 100 if elapsed else 0,
+            'threads': len(threads_cpu),
+            'perThreadCpuSeconds': per_thread
+        }
+
+    def __threads_cpu(self):
+        return {thread.id: thread.user_time + thread.system_time for thread in self.__process.threads()}
+
+
+def thread_cpu_by_name(per_thread_cpu):
+    """Maps native thread ids from CpuUsage result to Python thread names."""
+    from threading import enumerate as threads
+
+    result = {}
+    for thread in threads():
+        cpu = per_thread_cpu.get(thread.native_id)
+        if cpu:
+            name = thread.name.rstrip('0123456789-_ ')
+            result[name] = result.get(name, 0) + cpu
+    return result
+
+
+def base_argument_parser(description):
+    parser = ArgumentParser(description=description)
+    parser.add_argument('--duration', type=float, default=10, help='Measurement duration in seconds')
+    parser.add_argument('--warmup', type=float, default=2, help='Warm up duration in seconds')
+    parser.add_argument('--json', action='store_true', help='Print result as JSON')
+    return parser
+
+
+def print_report(title, report, as_json=False):
+    if as_json:
+        print(dumps(report, indent=2))
+        return
+
+    print(title)
+    print('-' * len(title))
+    for (key, value) in report.items():
+        if isinstance(value, dict):
+            print(f'{key}:')
+            for (sub_key, sub_value) in value.items():
+                print(f'  {sub_key:<40} {_format(sub_value)}')
+        else:
+            print(f'{key:<42} {_format(value)}')
+
+
+def _format(value):
+    if isinstance(value, float):
+        return f'{value:.3f}'
+    return str(value)
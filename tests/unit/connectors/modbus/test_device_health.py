@@ -0,0 +1,50 @@
+from tests.unit.BaseUnitTest import BaseUnitTest
+from thingsboard_gateway.connectors.modbus.constants import DeviceHealthState
+from thingsboard_gateway.connectors.modbus.device_health import DeviceHealth
+
+
+class DeviceHealthTests(BaseUnitTest):
+    def setUp(self):
+        super().setUp()
+        self.health = DeviceHealth(failure_threshold=3, initial_backoff=1, max_backoff=3)
+
+    def test_circuit_opens_after_threshold(self):
+        self.assertFalse(self.health.record_failure(100))
+        self.assertFalse(self.health.record_failure(100))
+        self.assertTrue(self.health.allow_request(100))
+        self.assertTrue(self.health.record_failure(100))
+        self.assertEqual(self.health.state, DeviceHealthState.OPEN)
+        self.assertFalse(self.health.allow_request(100.5))
+
+    def test_half_open_probe(self):
+        for _ in range(3):
+            self.health.record_failure(100)
+
+        self.assertTrue(self.health.allow_request(101))
+        self.assertEqual(self.health.state, DeviceHealthState.HALF_OPEN)
+        # Only one probe is allowed at once
+        self.assertFalse(self.health.allow_request(101))
+
+    def test_exponential_backoff(self):
+        for _ in range(3):
+            self.health.record_failure(100)
+
+        self.health.allow_request(101)
+        self.health.record_failure(101)
+        self.assertEqual(self.health.backoff, 2)
+        self.assertFalse(self.health.allow_request(102))
+
+        self.health.allow_request(103)
+        self.health.record_failure(103)
+        self.assertEqual(self.health.backoff, 3)
+
+    def test_recovery(self):
+        for _ in range(3):
+            self.health.record_failure(100)
+
+        self.health.allow_request(101)
+        self.assertTrue(self.health.record_success())
+        self.assertEqual(self.health.state, DeviceHealthState.CLOSED)
+        self.assertEqual(self.health.failures, 0)
+        self.assertEqual(self.health.backoff, 1)
+        self.assertFalse(self.health.record_success())
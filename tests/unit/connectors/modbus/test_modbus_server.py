@@ -0,0 +1,94 @@
+import logging
+from unittest import mock
+
+from tests.unit.BaseUnitTest import BaseUnitTest
+from thingsboard_gateway.connectors.modbus.modbus_connector import ModbusConnector
+from thingsboard_gateway.connectors.modbus.server import ContiguousDataBlock, Server
+
+SERVER_CONFIG = {
+    "type": "tcp",
+    "host": "127.0.0.1",
+    "port": 5026,
+    "method": "socket",
+    "deviceName": "Modbus Server",
+    "byteOrder": "BIG",
+    "wordOrder": "BIG",
+    "unitId": 0,
+    "values": {
+        "holding_registers": {
+            "attributes": [{"address": 1, "type": "16int", "tag": "attr", "objectsCount": 1, "value": 42}],
+            "timeseries": [{"address": 2, "type": "32uint", "tag": "ts", "objectsCount": 2, "value": 65537}]
+        },
+        "coils_initializer": {
+            "attributes": [{"address": 5, "type": "bits", "tag": "coil", "objectsCount": 1, "value": 1}]
+        }
+    }
+}
+
+
+class ModbusServerDatablockTests(BaseUnitTest):
+    def setUp(self):
+        super().setUp()
+        self.server = Server(SERVER_CONFIG, mock.MagicMock(logging.Logger))
+
+    def test_registers_block(self):
+        block = ContiguousDataBlock()
+        block.setValues(10, [1, 2, 3])
+        self.assertTrue(block.validate(10, 3))
+        self.assertFalse(block.validate(65535, 2))
+        self.assertEqual(block.getValues(9, 5), [0, 1, 2, 3, 0])
+
+    def test_bits_block(self):
+        block = ContiguousDataBlock(bits=True)
+        block.setValues(0, [True, False, 5])
+        self.assertEqual(block.getValues(0, 3), [1, 0, 1])
+
+    def test_initial_values(self):
+        self.assertEqual(self.server.get_values('holding_registers', 1, 3), [42, 1, 1])
+        self.assertEqual(self.server.get_values('coils_initializer', 5), [1])
+
+    def test_bulk_update(self):
+        updated = self.server.update_values({
+            "holding_registers": [{"address": 1, "type": "16int", "objectsCount": 1, "value": 7},
+                                  {"address": 10, "type": "16uint", "objectsCount": 1, "value": 9}]
+        })
+        self.assertEqual(updated, 2)
+        self.assertEqual(self.server.get_values('holding_registers', 1), [7])
+        self.assertEqual(self.server.get_values('holding_registers', 10), [9])
+
+    def test_write_from_attribute_update(self):
+        item = {"tag": "attr", "type": "16int", "functionCode": 6, "objectsCount": 1, "address": 20}
+        read_item = {"tag": "read", "type": "16int", "functionCode": 3, "objectsCount": 1, "address": 21}
+        not_written = self.server.write([(item, 123), (read_item, 1)])
+        self.assertEqual(not_written, [read_item])
+        self.assertEqual(self.server.get_values('holding_registers', 20), [123])
+
+
+class ModbusServerRpcTests(BaseUnitTest):
+    def setUp(self):
+        super().setUp()
+        self.gateway = mock.MagicMock()
+        del self.gateway.main_handler
+        config = {
+            'name': 'Modbus Connector',
+            'master': {'slaves': []},
+            'slave': {**SERVER_CONFIG, 'port': 5027, 'sendDataToThingsBoard': True, 'pollPeriod': 5000,
+                      'attributeUpdates': [], 'rpc': []}
+        }
+        self.connector = ModbusConnector(self.gateway, config, 'modbus')
+
+    def tearDown(self):
+        self.connector.close()
+        super().tearDown()
+
+    def test_bulk_update_from_rpc(self):
+        self.connector.server_side_rpc_handler({
+            'device': 'Modbus Server',
+            'data': {'id': 1, 'method': 'updateValues',
+                     'params': {'holding_registers': [{'address': 30, 'type': '16uint', 'objectsCount': 1,
+                                                       'value': 77}]}}
+        })
+
+        self.gateway.send_rpc_reply.assert_called_once_with(device='Modbus Server', req_id=1,
+                                                            content={'success': True, 'updated': 1})
+        self.assertEqual(self.connector._ModbusConnector__server.get_values('holding_registers', 30), [77])
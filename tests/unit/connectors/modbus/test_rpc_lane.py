@@ -0,0 +1,76 @@
+from tests.unit.BaseUnitTest import BaseUnitTest
+from thingsboard_gateway.connectors.modbus.constants import *
+from thingsboard_gateway.connectors.modbus.rpc_lane import RpcLane, RpcRequest
+
+
+class RpcLaneTests(BaseUnitTest):
+    def setUp(self):
+        super().setUp()
+        self.lane = RpcLane()
+        self.device = object()
+
+    def _request(self, function_code, address, payload, device=None):
+        return RpcRequest(device or self.device, {}, {FUNCTION_CODE_PARAMETER: function_code,
+                                                      ADDRESS_PARAMETER: address,
+                                                      PAYLOAD_PARAMETER: payload})
+
+    def test_contiguous_register_writes_are_merged(self):
+        self.lane.submit(self._request(6, 0, 1))
+        self.lane.submit(self._request(16, 1, [2, 3]))
+        self.lane.submit(self._request(6, 3, 4))
+
+        batches = self.lane.get_batches()
+
+        self.assertEqual(1, len(batches))
+        config = self.lane.get_batch_config(batches[0])
+        self.assertEqual(16, config[FUNCTION_CODE_PARAMETER])
+        self.assertEqual(0, config[ADDRESS_PARAMETER])
+        self.assertEqual([1, 2, 3, 4], config[PAYLOAD_PARAMETER])
+
+    def test_contiguous_coil_writes_are_merged(self):
+        self.lane.submit(self._request(5, 10, 1))
+        self.lane.submit(self._request(5, 11, 0))
+
+        batches = self.lane.get_batches()
+
+        self.assertEqual(1, len(batches))
+        self.assertEqual(15, self.lane.get_batch_config(batches[0])[FUNCTION_CODE_PARAMETER])
+
+    def test_not_mergeable_requests_keep_order(self):
+        requests = [self._request(6, 0, 1),
+                    self._request(6, 5, 2),
+                    self._request(5, 6, 1),
+                    self._request(3, 7, None),
+                    self._request(6, 8, 1, device=object())]
+        for request in requests:
+            self.lane.submit(request)
+
+        batches = self.lane.get_batches()
+
+        self.assertEqual([[request] for request in requests], batches)
+        self.assertIs(requests[0].config, self.lane.get_batch_config(batches[0]))
+        self.assertTrue(self.lane.is_empty())
+
+    def test_batch_size_is_limited(self):
+        max_count = MAX_WRITE_OBJECTS_COUNT[HOLDING_REGISTERS]
+        self.lane.submit(self._request(16, 0, [0] * max_count))
+        self.lane.submit(self._request(6, max_count, 1))
+
+        self.assertEqual(2, len(self.lane.get_batches()))
+
+    def test_complete_sets_response_and_statistics(self):
+        completed = []
+        requests = [self._request(6, 0, 1), self._request(6, 1, 2)]
+        for request in requests:
+            request.callback = completed.append
+            self.lane.submit(request)
+
+        self.lane.complete(self.lane.get_batches()[0], 'response')
+
+        self.assertEqual(requests, completed)
+        self.assertTrue(all(request.wait(0) and request.response == 'response' for request in requests))
+        statistics = self.lane.get_statistics()
+        self.assertEqual(2, statistics['rpcRequests'])
+        self.assertEqual(1, statistics['rpcModbusRequests'])
+        self.assertEqual(2, statistics['rpcMergedRequests'])
+        self.assertGreaterEqual(statistics['rpcLatencyMaxMs'], statistics['rpcLatencyAvgMs'])
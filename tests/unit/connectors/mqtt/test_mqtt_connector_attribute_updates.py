@@ -0,0 +1,80 @@
+from unittest import mock
+
+from paho.mqtt.client import MQTT_ERR_SUCCESS
+
+from tests.unit.BaseUnitTest import BaseUnitTest
+from thingsboard_gateway.connectors.mqtt.mqtt_connector import MqttConnector
+
+CONFIG = {
+    'name': 'MQTT Broker Connector',
+    'logLevel': 'INFO',
+    'broker': {
+        'host': '127.0.0.1',
+        'port': 1883,
+        'version': 5,
+        'clientId': 'gateway',
+        'sharedTopicsCoalescingWindowInMillis': 1000,
+        'security': {'type': 'anonymous'}
+    },
+    'mapping': [],
+    'attributeUpdates': [
+        {
+            'deviceNameFilter': '.*',
+            'attributeFilter': 'firmware',
+            'topicExpression': 'devices/shared/${attributeKey}',
+            'valueExpression': '{"${attributeKey}": ${attributeValue}}'
+        },
+        {
+            'deviceNameFilter': '.*',
+            'attributeFilter': 'config',
+            'topicExpression': 'devices/${deviceName}/${attributeKey}',
+            'valueExpression': '{"${attributeKey}": ${attributeValue}}'
+        }
+    ]
+}
+
+
+class MqttConnectorAttributeUpdatesTests(BaseUnitTest):
+    def setUp(self):
+        super().setUp()
+        self.gateway = mock.MagicMock()
+        del self.gateway.main_handler
+        self.connector = self.__create_connector(CONFIG)
+
+    def tearDown(self):
+        self.connector.close()
+        super().tearDown()
+
+    def __create_connector(self, config):
+        connector = MqttConnector(self.gateway, config, 'mqtt')
+        connector._client = mock.MagicMock()
+        connector._client.publish.return_value.rc = MQTT_ERR_SUCCESS
+        return connector
+
+    def test_fan_out_to_shared_topic_is_coalesced(self):
+        for device_number in range(100):
+            self.connector.on_attributes_update({'device': f'Device {device_number}', 'data': {'firmware': '1.1'}})
+        self.connector.on_attributes_update({'device': 'Device 0', 'data': {'firmware': '1.2'}})
+
+        self.assertEqual(self.__get_published(), [('devices/shared/firmware', '{"firmware": "1.1"}'),
+                                                  ('devices/shared/firmware', '{"firmware": "1.2"}')])
+
+    def test_fan_out_to_device_topics_is_not_coalesced(self):
+        for device_number in range(3):
+            self.connector.on_attributes_update({'device': f'Device {device_number}', 'data': {'config': 1}})
+
+        self.assertEqual(len(self.__get_published()), 3)
+
+    def test_identical_updates_are_published_without_coalescing_window(self):
+        self.connector.close()
+        broker_config = {key: value for (key, value) in CONFIG['broker'].items()
+                         if key != 'sharedTopicsCoalescingWindowInMillis'}
+        self.connector = self.__create_connector({**CONFIG, 'broker': broker_config})
+
+        self.connector.on_attributes_update({'device': 'Device 0', 'data': {'firmware': '1.1'}})
+        self.connector.on_attributes_update({'device': 'Device 0', 'data': {'firmware': '1.1'}})
+
+        self.assertEqual(len(self.__get_published()), 2)
+
+    def __get_published(self):
+        return [publish_call[0][:2] for publish_call in self.connector._client.publish.call_args_list]
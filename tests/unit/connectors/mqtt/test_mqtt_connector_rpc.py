@@ -0,0 +1,95 @@
+from time import sleep
+from unittest import mock
+
+from paho.mqtt.client import MQTTMessage, MQTT_ERR_SUCCESS
+from paho.mqtt.packettypes import PacketTypes
+from paho.mqtt.properties import Properties
+
+from tests.unit.BaseUnitTest import BaseUnitTest
+from thingsboard_gateway.connectors.mqtt.mqtt_connector import MqttConnector
+
+RESPONSE_TOPIC = 'tb_gateway/rpc/response'
+CONFIG = {
+    'name': 'MQTT Broker Connector',
+    'logLevel': 'INFO',
+    'broker': {
+        'host': '127.0.0.1',
+        'port': 1883,
+        'version': 5,
+        'clientId': 'gateway',
+        'rpcResponseTopic': RESPONSE_TOPIC,
+        'security': {'type': 'anonymous'}
+    },
+    'mapping': [],
+    'serverSideRpc': [{
+        'deviceNameFilter': '.*',
+        'methodFilter': 'echo',
+        'requestTopicExpression': 'sensor/${deviceName}/request/${methodName}/${requestId}',
+        'responseTopicExpression': 'sensor/${deviceName}/response/${methodName}/${requestId}',
+        'responseTimeout': 10000,
+        'valueExpression': '${params}'
+    }]
+}
+EXPECTED_RESPONSE_TOPIC = 'sensor/Device 1/response/echo/7'
+
+
+class MqttConnectorRpcTests(BaseUnitTest):
+    def setUp(self):
+        super().setUp()
+        self.gateway = mock.MagicMock()
+        del self.gateway.main_handler
+        self.gateway.is_rpc_in_progress.return_value = False
+        self.connector = MqttConnector(self.gateway, CONFIG, 'mqtt')
+        self.connector._client = mock.MagicMock()
+        self.connector._client.publish.return_value.rc = MQTT_ERR_SUCCESS
+        self.connector._on_connect(self.connector._client, None, {}, 0)
+
+    def tearDown(self):
+        self.connector.close()
+        super().tearDown()
+
+    def test_request_carries_response_topic_and_correlation_data(self):
+        self.connector.server_side_rpc_handler(self.__get_rpc_request())
+
+        self.connector._client.subscribe.assert_any_call(RESPONSE_TOPIC, 1)
+        properties = self.connector._client.publish.call_args[0][4]
+        self.assertEqual(properties.ResponseTopic, RESPONSE_TOPIC)
+        self.assertEqual(properties.CorrelationData, b'Device 1/7')
+        self.gateway.send_rpc_reply.assert_not_called()
+
+    def test_response_is_matched_by_correlation_data(self):
+        self.connector.server_side_rpc_handler(self.__get_rpc_request())
+        correlation_data = self.connector._client.publish.call_args[0][4].CorrelationData
+        self.gateway.is_rpc_in_progress.return_value = True
+
+        self.connector._on_message_queue.put((None, None, self.__get_response(b'unknown')))
+        self.connector._on_message_queue.put((None, None, self.__get_response(correlation_data)))
+        self.__wait_for(lambda: self.gateway.rpc_with_reply_processing.called)
+
+        self.gateway.rpc_with_reply_processing.assert_called_once_with(EXPECTED_RESPONSE_TOPIC, {'result': 'ok'})
+
+    def test_one_way_rpc_is_not_acknowledged_before_publishing(self):
+        self.connector._client.publish.return_value.is_published.return_value = False
+
+        with mock.patch('thingsboard_gateway.connectors.mqtt.mqtt_connector.RPC_PUBLISH_TIMEOUT', 0.1):
+            self.connector.server_side_rpc_handler({**self.__get_rpc_request(), 'device': 'Device 2'})
+
+        self.assertFalse(self.gateway.send_rpc_reply.call_args[1]['success_sent'])
+
+    @staticmethod
+    def __get_rpc_request():
+        return {'device': 'Device 1', 'data': {'id': 7, 'method': 'echo', 'params': {'value': 1}}}
+
+    @staticmethod
+    def __get_response(correlation_data):
+        message = MQTTMessage(topic=RESPONSE_TOPIC.encode('utf-8'))
+        message.payload = b'{"result": "ok"}'
+        message.properties = Properties(PacketTypes.PUBLISH)
+        message.properties.CorrelationData = correlation_data
+        return message
+
+    @staticmethod
+    def __wait_for(condition, timeout=5):
+        while not condition() and timeout > 0:
+            sleep(.05)
+            timeout -= .05
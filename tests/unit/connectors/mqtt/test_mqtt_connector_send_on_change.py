@@ -0,0 +1,64 @@
+from time import sleep
+from unittest import mock
+
+from paho.mqtt.client import MQTTMessage
+
+from tests.unit.BaseUnitTest import BaseUnitTest
+from thingsboard_gateway.connectors.mqtt.mqtt_connector import MqttConnector
+
+TOPIC = 'sensor/data'
+CONFIG = {
+    'name': 'MQTT Broker Connector',
+    'logLevel': 'INFO',
+    'broker': {
+        'host': '127.0.0.1',
+        'port': 1883,
+        'version': 5,
+        'clientId': 'gateway',
+        'security': {'type': 'anonymous'}
+    },
+    'mapping': [{
+        'topicFilter': TOPIC,
+        'converter': {
+            'type': 'json',
+            'deviceNameJsonExpression': '${serialNumber}',
+            'deviceTypeJsonExpression': 'default',
+            'sendDataOnlyOnChange': True,
+            'attributes': [],
+            'timeseries': [{'type': 'double', 'key': 'temperature', 'value': '${temp}'}]
+        }
+    }]
+}
+
+
+class MqttConnectorSendOnChangeTests(BaseUnitTest):
+    def setUp(self):
+        super().setUp()
+        gateway = mock.MagicMock()
+        del gateway.main_handler
+        self.connector = MqttConnector(gateway, CONFIG, 'mqtt')
+        self.connector._client = mock.MagicMock()
+        self.connector._on_connect(self.connector._client, None, {}, 0)
+        self.connector.put_data_to_convert = mock.MagicMock(return_value=True)
+
+    def tearDown(self):
+        self.connector.close()
+        super().tearDown()
+
+    def test_changes_are_checked_in_order_of_receiving(self):
+        payloads = [b'{"serialNumber": "SN-1", "temp": 1}', b'{"serialNumber": "SN-1", "temp": 1}',
+                    b'{"serialNumber": "SN-1", "temp": 2}', b'{"serialNumber": "SN-1", "temp": 1}']
+        for payload in payloads:
+            message = MQTTMessage(topic=TOPIC.encode('utf-8'))
+            message.payload = payload
+            self.connector._on_message_queue.put((None, None, message))
+
+        timeout = 5
+        while self.connector.put_data_to_convert.call_count < 3 and timeout > 0:
+            sleep(.05)
+            timeout -= .05
+        sleep(.1)
+
+        routed_payloads = [routed_call[0][1].payload
+                           for routed_call in self.connector.put_data_to_convert.call_args_list]
+        self.assertEqual(routed_payloads, [payloads[0], payloads[2], payloads[3]])
@@ -0,0 +1,59 @@
+from tests.unit.BaseUnitTest import BaseUnitTest
+from thingsboard_gateway.connectors.mqtt.topic_aliases import TopicAliases
+
+
+class FakeClient:
+    def __init__(self):
+        self.published = []
+
+    def publish(self, topic, payload=None, qos=0, retain=False, properties=None):
+        self.published.append((topic, getattr(properties, 'TopicAlias', None)))
+
+
+class TopicAliasesTests(BaseUnitTest):
+    def setUp(self):
+        super().setUp()
+        self.client = FakeClient()
+        self.aliases = TopicAliases(limit=2)
+
+    def test_aliases_are_not_used_without_broker_support(self):
+        self.aliases.reset(0)
+
+        self.aliases.publish(self.client, 'devices/1/attributes', '{}')
+
+        self.assertEqual([('devices/1/attributes', None)], self.client.published)
+
+    def test_alias_is_assigned_to_repeated_topic(self):
+        self.aliases.reset(10)
+
+        for topic in ('devices/1', 'devices/1', 'devices/2', 'devices/1', 'devices/2'):
+            self.aliases.publish(self.client, topic, '{}')
+
+        self.assertEqual([('devices/1', None), ('devices/1', 1), ('devices/2', None), ('', 1), ('devices/2', 2)],
+                         self.client.published)
+
+    def test_aliases_are_not_reassigned(self):
+        self.aliases.reset(10)
+
+        for topic in ('devices/1', 'devices/1', 'devices/2', 'devices/2', 'devices/3', 'devices/3', 'devices/1'):
+            self.aliases.publish(self.client, topic, '{}')
+
+        self.assertEqual(('devices/3', None), self.client.published[5])
+        self.assertEqual(('', 1), self.client.published[6])
+
+    def test_aliases_are_not_used_for_qos_messages(self):
+        self.aliases.reset(10)
+
+        self.aliases.publish(self.client, 'devices/1/rpc', '{}', qos=1)
+
+        self.assertEqual([('devices/1/rpc', None)], self.client.published)
+
+    def test_aliases_are_cleared_on_reset(self):
+        self.aliases.reset(10)
+        self.aliases.publish(self.client, 'devices/1', '{}')
+        self.aliases.publish(self.client, 'devices/1', '{}')
+
+        self.aliases.reset(10)
+        self.aliases.publish(self.client, 'devices/1', '{}')
+
+        self.assertEqual([('devices/1', None), ('devices/1', 1), ('devices/1', None)], self.client.published)
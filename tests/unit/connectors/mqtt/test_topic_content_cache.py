@@ -0,0 +1,37 @@
+from time import sleep
+
+from tests.unit.BaseUnitTest import BaseUnitTest
+from thingsboard_gateway.connectors.mqtt.topic_content_cache import TopicContentCache
+
+
+class TopicContentCacheTests(BaseUnitTest):
+    def test_unchanged_payload(self):
+        cache = TopicContentCache()
+
+        self.assertTrue(cache.update('sensor/1', b'{"temperature": 20}'))
+        self.assertFalse(cache.update('sensor/1', b'{"temperature": 20}'))
+        self.assertTrue(cache.update('sensor/1', b'{"temperature": 21}'))
+        self.assertTrue(cache.update('sensor/2', b'{"temperature": 21}'))
+        self.assertEqual(1, cache.get_statistics()['topicContentUnchanged'])
+
+    def test_least_recently_seen_topic_is_evicted(self):
+        cache = TopicContentCache(max_size=2)
+
+        cache.update('sensor/1', b'1')
+        cache.update('sensor/2', b'2')
+        cache.update('sensor/1', b'1')
+        cache.update('sensor/3', b'3')
+
+        self.assertEqual(2, len(cache))
+        self.assertFalse(cache.update('sensor/1', b'1'))
+        self.assertTrue(cache.update('sensor/2', b'2'))
+        self.assertEqual(2, cache.get_statistics()['topicContentCacheEvictions'])
+
+    def test_unchanged_payload_is_sent_after_ttl(self):
+        cache = TopicContentCache(ttl=50)
+
+        cache.update('sensor/1', b'1')
+        self.assertFalse(cache.update('sensor/1', b'1'))
+        sleep(0.06)
+        self.assertTrue(cache.update('sensor/1', b'1'))
+        self.assertEqual(1, cache.get_statistics()['topicContentCacheExpirations'])
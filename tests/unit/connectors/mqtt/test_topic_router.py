@@ -0,0 +1,65 @@
+from tests.unit.BaseUnitTest import BaseUnitTest
+from thingsboard_gateway.connectors.mqtt.topic_router import TopicRouter
+
+
+class TopicRouterTests(BaseUnitTest):
+    def setUp(self):
+        self.router = TopicRouter(cache_size=2)
+
+    def test_exact_topic(self):
+        self.router.add('sensor/data', 'handler')
+
+        self.assertEqual(('handler',), self.router.match('sensor/data'))
+        self.assertEqual((), self.router.match('sensor/data/1'))
+        self.assertEqual((), self.router.match('sensor'))
+
+    def test_single_level_wildcard(self):
+        self.router.add('sensor/+/data', 'handler')
+
+        self.assertEqual(('handler',), self.router.match('sensor/SN-001/data'))
+        self.assertEqual((), self.router.match('sensor/SN-001/raw/data'))
+
+    def test_multi_level_wildcard(self):
+        self.router.add('sensor/#', 'handler')
+
+        self.assertEqual(('handler',), self.router.match('sensor/SN-001/data'))
+        self.assertEqual(('handler',), self.router.match('sensor'))
+        self.assertEqual((), self.router.match('device/SN-001'))
+
+    def test_regex_symbols_are_not_special(self):
+        self.router.add('sensor.data', 'handler')
+
+        self.assertEqual((), self.router.match('sensorXdata'))
+
+    def test_handlers_are_returned_in_order_of_adding(self):
+        self.router.add('sensor/#', 'first')
+        self.router.add('sensor/+/data', 'second')
+        self.router.add('sensor/SN-001/data', 'third')
+        self.router.add('sensor/+/data', 'fourth')
+
+        self.assertEqual(('first', 'second', 'third', 'fourth'), self.router.match('sensor/SN-001/data'))
+        self.assertEqual(['first', 'second', 'third', 'fourth'], self.router.handlers())
+
+    def test_shared_subscription_prefix_is_removed(self):
+        self.router.add('$share/gateway/sensor/+', 'shared')
+        self.router.add('$aws/things/sensor', 'aws')
+
+        self.assertEqual(('shared',), self.router.match('sensor/SN-001'))
+        self.assertEqual(('aws',), self.router.match('$aws/things/sensor'))
+
+    def test_wildcards_do_not_match_system_topics(self):
+        self.router.add('#', 'all')
+        self.router.add('+/broker', 'broker')
+
+        self.assertEqual((), self.router.match('$SYS/broker'))
+        self.assertEqual(('all', 'broker'), self.router.match('SYS/broker'))
+
+    def test_cache_is_updated_after_adding_handler(self):
+        self.assertEqual((), self.router.match('sensor/data'))
+
+        self.router.add('sensor/+', 'handler')
+
+        self.assertEqual(('handler',), self.router.match('sensor/data'))
+        self.router.match('sensor/1')
+        self.router.match('sensor/2')
+        self.assertEqual(('handler',), self.router.match('sensor/data'))
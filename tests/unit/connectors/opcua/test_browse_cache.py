@@ -0,0 +1,99 @@
+from tempfile import TemporaryDirectory
+
+from tests.unit.BaseUnitTest import BaseUnitTest
+from thingsboard_gateway.connectors.opcua.browse_cache import BrowseCache
+
+SERVER_URI = 'urn:test:server'
+NAMESPACES = ['http://opcfoundation.org/UA/', 'urn:test:server', 'http://test']
+
+
+class BrowseCacheTests(BaseUnitTest):
+    def setUp(self):
+        super().setUp()
+        self.directory = TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+        super().tearDown()
+
+    def __create_cache(self, namespaces=NAMESPACES):
+        cache = BrowseCache(self.directory.name, self.log)
+        cache.load(SERVER_URI, namespaces)
+        return cache
+
+    def test_resolved_paths_are_loaded_after_restart(self):
+        cache = self.__create_cache()
+        cache.set_nodes('Root\\.Objects\\.Device1', [['0:Objects', '2:Device1']])
+        cache.set_qualified_path(['0:Objects', '2:Device1', 'Temperature'], ['0:Objects', '2:Device1', '2:Temperature'])
+        cache.set_node_id(['0:Objects', '2:Device1', '2:Temperature'], 'ns=2;i=10')
+        cache.save()
+
+        cache = self.__create_cache()
+
+        self.assertEqual([['0:Objects', '2:Device1']], cache.get_nodes('Root\\.Objects\\.Device1'))
+        self.assertEqual(['0:Objects', '2:Device1', '2:Temperature'],
+                         cache.get_qualified_path(['0:Objects', '2:Device1', 'Temperature']))
+        self.assertEqual('ns=2;i=10', cache.get_node_id('0:Objects\\.2:Device1\\.2:Temperature'))
+
+    def test_cache_is_not_used_for_changed_namespaces(self):
+        cache = self.__create_cache()
+        cache.set_node_id(['0:Objects', '2:Device1'], 'ns=2;i=1')
+        cache.save()
+
+        cache = self.__create_cache(namespaces=[*NAMESPACES, 'http://new'])
+
+        self.assertIsNone(cache.get_node_id(['0:Objects', '2:Device1']))
+
+    def test_not_found_path_is_removed(self):
+        cache = self.__create_cache()
+        cache.set_node_id(['0:Objects', '2:Device1'], 'ns=2;i=1')
+
+        cache.set_node_id(['0:Objects', '2:Device1'], None)
+
+        self.assertIsNone(cache.get_node_id(['0:Objects', '2:Device1']))
+
+    def test_path_is_found_by_node_id(self):
+        cache = self.__create_cache()
+        cache.set_node_id(['0:Objects', '2:Device1'], 'ns=2;i=1')
+        cache.set_node_id(['0:Objects', '2:Device1'], 'ns=2;i=2')
+
+        self.assertIsNone(cache.get_path('ns=2;i=1'))
+        self.assertEqual('0:Objects\\.2:Device1', cache.get_path('ns=2;i=2'))
+
+    def test_subtree_of_deleted_node_is_invalidated(self):
+        cache = self.__create_cache()
+        cache.set_nodes('Root\\.Objects\\.Device1', [['0:Objects', '2:Device1']])
+        cache.set_nodes('Root\\.Objects\\.Device2', [['0:Objects', '2:Device2']])
+        cache.set_qualified_path(['0:Objects', '2:Device1', 'Temperature'],
+                                 [['0:Objects', '2:Device1', '2:Temperature']])
+        cache.set_node_id(['0:Objects', '2:Device1'], 'ns=2;i=1')
+        cache.set_node_id(['0:Objects', '2:Device1', '2:Temperature'], 'ns=2;i=10')
+        cache.set_node_id(['0:Objects', '2:Device2'], 'ns=2;i=2')
+
+        cache.invalidate(['0:Objects', '2:Device1'])
+
+        self.assertIsNone(cache.get_nodes('Root\\.Objects\\.Device1'))
+        self.assertIsNone(cache.get_qualified_path(['0:Objects', '2:Device1', 'Temperature']))
+        self.assertIsNone(cache.get_node_id(['0:Objects', '2:Device1', '2:Temperature']))
+        self.assertIsNone(cache.get_path('ns=2;i=1'))
+        self.assertIsNotNone(cache.get_nodes('Root\\.Objects\\.Device2'))
+        self.assertEqual('ns=2;i=2', cache.get_node_id(['0:Objects', '2:Device2']))
+
+    def test_only_results_found_by_new_child_name_are_invalidated(self):
+        cache = self.__create_cache()
+        cache.set_nodes('Root\\.Objects\\.Device1', [['0:Objects', '2:Device1']])
+        cache.set_nodes('Root\\.Objects\\.Device2', [['0:Objects', '2:Device2']])
+        cache.set_qualified_path(['0:Objects', '2:Device1', 'Sensor', 'Humidity'],
+                                 [['0:Objects', '2:Device1', '2:Sensor', '2:Humidity']])
+        cache.set_qualified_path(['0:Objects', '2:Device1', 'Temperature'],
+                                 [['0:Objects', '2:Device1', '2:Temperature']])
+        cache.set_node_id(['0:Objects', '2:Device1'], 'ns=2;i=1')
+
+        cache.invalidate(['0:Objects'], children_only=True, child_name='Device2')
+        cache.invalidate(['0:Objects', '2:Device1', '2:Sensor'], children_only=True, child_name='Humidity')
+
+        self.assertIsNotNone(cache.get_nodes('Root\\.Objects\\.Device1'))
+        self.assertIsNone(cache.get_nodes('Root\\.Objects\\.Device2'))
+        self.assertIsNone(cache.get_qualified_path(['0:Objects', '2:Device1', 'Sensor', 'Humidity']))
+        self.assertIsNotNone(cache.get_qualified_path(['0:Objects', '2:Device1', 'Temperature']))
+        self.assertEqual('ns=2;i=1', cache.get_node_id(['0:Objects', '2:Device1']))
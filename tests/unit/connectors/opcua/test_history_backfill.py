@@ -0,0 +1,82 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from logging import getLogger
+
+from asyncua import ua
+
+from tests.unit.BaseUnitTest import BaseUnitTest
+from thingsboard_gateway.connectors.opcua.history_backfill import HistoryBackfill
+
+END_TIME = datetime(2024, 1, 1, 12, tzinfo=timezone.utc)
+
+
+def data_value(value, seconds_before_end):
+    return ua.DataValue(ua.Variant(value), SourceTimestamp=END_TIME - timedelta(seconds=seconds_before_end))
+
+
+class HistoryBackfillTests(BaseUnitTest):
+    def setUp(self):
+        super().setUp()
+        self.backfill = HistoryBackfill(getLogger('opcua'), values_per_node=2, max_period_in_millis=60000)
+        self.temperature = ua.NodeId.from_string('ns=2;s=Temperature')
+        self.humidity = ua.NodeId.from_string('ns=2;s=Humidity')
+        self.requests = []
+
+    def test_start_times(self):
+        self.backfill.update(self.temperature, data_value(1, 10))
+        self.backfill.update(self.temperature, data_value(0, 20))
+        self.backfill.update(self.humidity, data_value(1, 3600))
+
+        start_times = self.backfill.get_start_times([self.temperature, self.humidity, ua.NodeId(1)], END_TIME)
+
+        self.assertEqual(END_TIME - timedelta(seconds=10) + timedelta(microseconds=1), start_times[self.temperature])
+        self.assertEqual(END_TIME - timedelta(seconds=60), start_times[self.humidity])
+        self.assertEqual(2, len(start_times))
+
+    def test_read_with_continuation_points(self):
+        self.backfill.update(self.temperature, data_value(0, 10))
+        start_times = self.backfill.get_start_times([self.temperature], END_TIME)
+        responses = [[self.__result([data_value(0, 10), data_value(1, 8), data_value(2, 6)], b'1')],
+                     [self.__result([data_value(3, 4)])]]
+
+        async def history_read(params):
+            self.requests.append(params)
+            return responses.pop(0)
+
+        async def read():
+            return [history async for history in self.backfill.read(history_read, start_times, END_TIME, 10)]
+
+        history = asyncio.run(read())
+
+        self.assertEqual([[1, 2], [3]], [[value.Value.Value for (_, values) in chunk for value in values]
+                                         for chunk in history])
+        self.assertEqual(b'1', self.requests[1].NodesToRead[0].ContinuationPoint)
+        self.assertEqual(END_TIME - timedelta(seconds=4),
+                         self.backfill.get_start_times([self.temperature], END_TIME)[self.temperature]
+                         - timedelta(microseconds=1))
+
+    def test_continuation_points_released_on_close(self):
+        self.backfill.update(self.temperature, data_value(0, 10))
+        start_times = self.backfill.get_start_times([self.temperature], END_TIME)
+
+        async def history_read(params):
+            self.requests.append(params)
+            return [self.__result([data_value(1, 8)], b'1')]
+
+        async def read_first_chunk():
+            reader = self.backfill.read(history_read, start_times, END_TIME, 10)
+            await reader.__anext__()
+            await reader.aclose()
+
+        asyncio.run(read_first_chunk())
+
+        self.assertTrue(self.requests[-1].ReleaseContinuationPoints)
+        self.assertEqual(b'1', self.requests[-1].NodesToRead[0].ContinuationPoint)
+
+    @staticmethod
+    def __result(data_values, continuation_point=None):
+        result = ua.HistoryReadResult()
+        result.ContinuationPoint = continuation_point
+        result.HistoryData = ua.HistoryData()
+        result.HistoryData.DataValues = data_values
+        return result
@@ -0,0 +1,52 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+from asyncua import ua
+from asyncua.common.subscription import Subscription
+
+from tests.unit.BaseUnitTest import BaseUnitTest
+from thingsboard_gateway.connectors.opcua.monitored_items import create_monitored_item_request, \
+    get_restored_server_handles
+
+
+def monitored_item_result(server_handle):
+    result = ua.MonitoredItemCreateResult()
+    result.MonitoredItemId = server_handle
+    return result
+
+
+class MonitoredItemsTests(BaseUnitTest):
+    def setUp(self):
+        super().setUp()
+        self.server = MagicMock()
+        self.subscription = Subscription(self.server, ua.CreateSubscriptionParameters(), MagicMock())
+        self.subscription.subscription_id = 1
+        self.requests = [create_monitored_item_request(ua.NodeId(index, 2), index, None, 1, 100)
+                         for index in (1, 2)]
+
+    def test_items_created_with_client_handles_of_connector(self):
+        self.server.create_monitored_items = AsyncMock(return_value=[monitored_item_result(10),
+                                                                     monitored_item_result(11)])
+
+        results = asyncio.run(self.subscription.create_monitored_items(self.requests))
+
+        self.assertEqual([10, 11], results)
+        self.assertEqual({1: 10, 2: 11}, get_restored_server_handles(self.subscription))
+
+    def test_server_handles_after_recreate(self):
+        self.server.create_monitored_items = AsyncMock(return_value=[monitored_item_result(10),
+                                                                     monitored_item_result(11)])
+        asyncio.run(self.subscription.create_monitored_items(self.requests))
+        create_subscription_result = ua.CreateSubscriptionResult()
+        create_subscription_result.SubscriptionId = 2
+        self.server.create_subscription = AsyncMock(return_value=create_subscription_result)
+        self.server.create_monitored_items = AsyncMock(return_value=[monitored_item_result(20),
+                                                                     monitored_item_result(21)])
+        self.server.delete_subscriptions = AsyncMock()
+
+        asyncio.run(self.subscription.recreate())
+
+        self.assertEqual({1: 20, 2: 21}, get_restored_server_handles(self.subscription))
+
+    def test_not_available_server_handles(self):
+        self.assertIsNone(get_restored_server_handles(object()))
@@ -0,0 +1,233 @@
+import asyncio
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+import asyncua
+
+from tests.unit.BaseUnitTest import BaseUnitTest
+from thingsboard_gateway.connectors.opcua.opcua_connector import OpcUaConnector, DEFAULT_MAX_NODES_PER_REQUEST
+
+
+class OpcUaConnectorTestCase(BaseUnitTest):
+    SERVER_CONFIG = {}
+
+    def setUp(self):
+        super().setUp()
+        self.directory = TemporaryDirectory()
+        gateway = mock.MagicMock()
+        del gateway.main_handler
+        gateway.get_config_path.return_value = self.directory.name
+        config = {
+            'name': 'OPC-UA Connector',
+            'server': {
+                'url': 'opc.tcp://127.0.0.1:4840',
+                'enableBrowseCache': False,
+                'identity': {'type': 'anonymous'},
+                **self.SERVER_CONFIG
+            },
+            'mapping': []
+        }
+        self.connector = OpcUaConnector(gateway, config, 'opcua')
+        self.runtime = self.connector._OpcUaConnector__runtime
+        self.client = mock.MagicMock()
+        self.connector._OpcUaConnector__client = self.client
+
+    def tearDown(self):
+        self.connector._OpcUaConnector__stopped = True
+        self.directory.cleanup()
+        super().tearDown()
+
+    def run_in_loop(self, func, *args):
+        """Runs the method of the connector in the event loop of the connector and returns its result."""
+        async def run():
+            result = func(*args)
+            return await result if asyncio.iscoroutine(result) else result
+
+        return self.runtime.run(run(), timeout=10)
+
+    @staticmethod
+    def create_device(name, config=None):
+        device = mock.MagicMock()
+        device.name = name
+        device.config = config or {}
+        return device
+
+
+class OpcUaConnectorPollingTests(OpcUaConnectorTestCase):
+    SERVER_CONFIG = {'maxConcurrentReads': 2, 'pollPeriodInMillis': 1000}
+
+    def setUp(self):
+        super().setUp()
+        self.read_sizes = []
+        self.reads_in_flight = 0
+        self.max_reads_in_flight = 0
+        self.client.uaclient.read = self.__read
+
+        async def create_semaphore():
+            self.connector._OpcUaConnector__reads_semaphore = asyncio.Semaphore(2)
+
+        self.runtime.run(create_semaphore(), timeout=10)
+
+    async def __read(self, params):
+        self.read_sizes.append(len(params.NodesToRead))
+        self.reads_in_flight += 1
+        self.max_reads_in_flight = max(self.max_reads_in_flight, self.reads_in_flight)
+        await asyncio.sleep(.01)
+        self.reads_in_flight -= 1
+        return [read_value_id.NodeId for read_value_id in params.NodesToRead]
+
+    def test_reads_are_split_by_server_limit(self):
+        self.connector._OpcUaConnector__operation_limits = {'read': 3}
+
+        values = self.run_in_loop(self.connector._OpcUaConnector__read_values, list(range(7)))
+
+        self.assertEqual(sorted(self.read_sizes, reverse=True), [3, 3, 1])
+        self.assertEqual(values, list(range(7)))
+
+    def test_reads_are_split_by_default_limit(self):
+        node_ids = list(range(DEFAULT_MAX_NODES_PER_REQUEST * 2 + 5))
+
+        values = self.run_in_loop(self.connector._OpcUaConnector__read_values, node_ids)
+
+        self.assertEqual(sorted(self.read_sizes, reverse=True),
+                         [DEFAULT_MAX_NODES_PER_REQUEST, DEFAULT_MAX_NODES_PER_REQUEST, 5])
+        self.assertEqual(values, node_ids)
+
+    def test_concurrent_reads_are_limited(self):
+        self.connector._OpcUaConnector__operation_limits = {'read': 1}
+
+        self.run_in_loop(self.connector._OpcUaConnector__read_values, list(range(10)))
+
+        self.assertEqual(len(self.read_sizes), 10)
+        self.assertEqual(self.max_reads_in_flight, 2)
+
+    def test_devices_are_polled_in_groups_by_poll_period(self):
+        fast_devices = [self.create_device('Fast 1', {'pollPeriodInMillis': 500}),
+                        self.create_device('Fast 2', {'pollPeriodInMillis': 500})]
+        default_device = self.create_device('Default')
+        self.connector._OpcUaConnector__device_nodes = [fast_devices[0], default_device, fast_devices[1]]
+        polls = []
+
+        async def poll_nodes(devices):
+            polls.append(devices)
+
+        self.connector._OpcUaConnector__poll_nodes = poll_nodes
+
+        self.run_in_loop(self.connector._OpcUaConnector__start_polling)
+
+        self.assertCountEqual(polls, [fast_devices, [default_device]])
+        self.assertEqual(set(self.connector._OpcUaConnector__next_polls), {0.5, 1})
+
+    def test_group_is_skipped_while_previous_poll_is_running(self):
+        self.connector._OpcUaConnector__device_nodes = [self.create_device('Device', {'pollPeriodInMillis': 1})]
+        polls = []
+        poll_finished = self.run_in_loop(asyncio.Event)
+
+        async def poll_nodes(devices):
+            polls.append(devices)
+            await poll_finished.wait()
+
+        self.connector._OpcUaConnector__poll_nodes = poll_nodes
+        start_polling = self.connector._OpcUaConnector__start_polling
+
+        self.run_in_loop(start_polling)
+        self.run_in_loop(asyncio.sleep, .01)
+        self.run_in_loop(start_polling)
+        self.assertEqual(len(polls), 1)
+
+        self.run_in_loop(poll_finished.set)
+        self.run_in_loop(asyncio.sleep, .01)
+        self.run_in_loop(start_polling)
+        self.assertEqual(len(polls), 2)
+
+
+class OpcUaConnectorSubscriptionTests(OpcUaConnectorTestCase):
+    SERVER_CONFIG = {'subCheckPeriodInMillis': 100, 'samplingIntervalInMillis': 10, 'queueSize': 1}
+    filter_is_rejected = False
+
+    def setUp(self):
+        super().setUp()
+        self.subscriptions = {}
+        self.client.create_subscription = self.__create_subscription
+
+    async def __create_subscription(self, publishing_interval, handler):
+        subscription = mock.MagicMock()
+        subscription.requests = []
+
+        async def create_monitored_items(requests):
+            subscription.requests.append(requests)
+            return [asyncua.ua.StatusCode(asyncua.ua.StatusCodes.BadFilterNotAllowed)
+                    if self.filter_is_rejected and isinstance(request.RequestedParameters.Filter,
+                                                              asyncua.ua.DataChangeFilter)
+                    else request.RequestedParameters.ClientHandle * 10
+                    for request in requests]
+
+        subscription.create_monitored_items = create_monitored_items
+        self.subscriptions[publishing_interval] = subscription
+        return subscription
+
+    def __add_node(self, device, key, node_config):
+        node_subscription = {
+            'node': mock.MagicMock(nodeid=asyncua.ua.NodeId(len(device.nodes_data_change_subscriptions) + 1, 2)),
+            'key': key,
+            'subscription': None,
+            'clientHandle': None,
+            'parameters': self.connector._OpcUaConnector__get_monitoring_parameters(device, node_config)
+        }
+        device.nodes_data_change_subscriptions[key] = node_subscription
+        return node_subscription
+
+    def __create_device(self, name, config=None):
+        device = self.create_device(name, config)
+        device.nodes_data_change_subscriptions = {}
+        self.connector._OpcUaConnector__device_nodes.append(device)
+        return device
+
+    def test_node_parameters_override_device_and_server_parameters(self):
+        device = self.create_device('Device', {'samplingIntervalInMillis': 20, 'publishingIntervalInMillis': 500,
+                                               'deadbandType': 'Percent', 'deadbandValue': 5})
+        get_monitoring_parameters = self.connector._OpcUaConnector__get_monitoring_parameters
+
+        self.assertEqual(get_monitoring_parameters(device, {}), (500, 20, 1, 'percent', 5.0))
+        self.assertEqual(get_monitoring_parameters(device, {'publishingIntervalInMillis': 1000, 'queueSize': 3,
+                                                            'deadbandType': 'absolute', 'deadbandValue': '0.5'}),
+                         (1000, 20, 3, 'absolute', 0.5))
+        self.assertEqual(get_monitoring_parameters(self.create_device('Default device'), {}),
+                         (100, 10, 1, None, 0.0))
+
+    def test_unknown_deadband_type_is_ignored(self):
+        with mock.patch.object(self.connector._OpcUaConnector__log, 'warning') as warning:
+            data_change_filter = self.connector._OpcUaConnector__create_data_change_filter('relative', 1.0)
+
+        self.assertIsNone(data_change_filter)
+        warning.assert_called_once()
+
+    def test_nodes_are_grouped_in_subscriptions_by_publishing_interval(self):
+        device = self.__create_device('Device', {'publishingIntervalInMillis': 500})
+        nodes = [self.__add_node(device, 'first', {}),
+                 self.__add_node(device, 'second', {'samplingIntervalInMillis': 1000}),
+                 self.__add_node(device, 'third', {})]
+        other_device = self.__create_device('Other device')
+        other_nodes = [self.__add_node(other_device, 'first', {}),
+                       self.__add_node(other_device, 'second', {'publishingIntervalInMillis': 500})]
+
+        self.run_in_loop(self.connector._OpcUaConnector__subscribe_to_nodes)
+
+        self.assertEqual(set(self.subscriptions), {100, 500})
+        self.assertEqual(sorted(len(requests) for requests in self.subscriptions[500].requests), [1, 3])
+        self.assertEqual([len(requests) for requests in self.subscriptions[100].requests], [1])
+        for node_subscription in nodes + other_nodes:
+            self.assertEqual(node_subscription['subscription'], node_subscription['clientHandle'] * 10)
+
+    def test_nodes_are_subscribed_without_filter_if_deadband_is_rejected(self):
+        self.filter_is_rejected = True
+        device = self.__create_device('Device', {'deadbandType': 'percent', 'deadbandValue': 5})
+        node_subscription = self.__add_node(device, 'temperature', {})
+
+        self.run_in_loop(self.connector._OpcUaConnector__subscribe_to_nodes)
+
+        filtered_requests, not_filtered_requests = self.subscriptions[100].requests
+        self.assertIsInstance(filtered_requests[0].RequestedParameters.Filter, asyncua.ua.DataChangeFilter)
+        self.assertNotIsInstance(not_filtered_requests[0].RequestedParameters.Filter, asyncua.ua.DataChangeFilter)
+        self.assertEqual(node_subscription['subscription'], node_subscription['clientHandle'] * 10)
+        self.assertEqual(node_subscription['clientHandle'], not_filtered_requests[0].RequestedParameters.ClientHandle)
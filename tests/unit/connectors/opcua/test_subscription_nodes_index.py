@@ -0,0 +1,35 @@
+from asyncua.ua import NodeId
+
+from tests.unit.BaseUnitTest import BaseUnitTest
+from thingsboard_gateway.connectors.opcua.subscription_nodes_index import SubscriptionNodesIndex
+
+
+class SubscriptionNodesIndexTests(BaseUnitTest):
+    def setUp(self):
+        super().setUp()
+        self.index = SubscriptionNodesIndex()
+        self.node_id = NodeId.from_string('ns=2;s=Device1.Temperature')
+
+    def test_node_of_several_devices(self):
+        self.index.add(self.node_id, 'device 1', 'timeseries', 'temperature', 'converter 1')
+        self.index.add(self.node_id, 'device 2', 'attributes', 'temp', 'converter 2')
+        self.index.add(self.node_id, 'device 1', 'timeseries', 'temperature', 'converter 1')
+
+        entries = self.index.get(NodeId.from_string('ns=2;s=Device1.Temperature'))
+
+        self.assertEqual([('device 1', {'section': 'timeseries', 'key': 'temperature'}, 'converter 1'),
+                          ('device 2', {'section': 'attributes', 'key': 'temp'}, 'converter 2')], list(entries))
+
+    def test_unknown_node(self):
+        self.assertEqual((), self.index.get(NodeId.from_string('ns=2;i=1')))
+
+    def test_removed_nodes(self):
+        self.index.add(self.node_id, 'device 1', 'timeseries', 'temperature', 'converter')
+        self.index.add(self.node_id, 'device 1', 'timeseries', 'temperature_copy', 'converter')
+        self.index.add(NodeId.from_string('ns=2;i=1'), 'device 1', 'timeseries', 'humidity', 'converter')
+
+        self.index.remove(self.node_id, 'device 1', 'temperature')
+        self.assertEqual(['temperature_copy'], [entry[1]['key'] for entry in self.index.get(self.node_id)])
+
+        self.index.remove(self.node_id, 'device 1')
+        self.assertEqual(1, len(self.index))
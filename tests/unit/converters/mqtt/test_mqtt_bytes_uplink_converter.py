@@ -0,0 +1,142 @@
+#     Copyright 2024. ThingsBoard
+#
+#     Licensed under the Apache License, Version 2.0 (the "License"];
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+
+from struct import pack
+
+from tests.unit.BaseUnitTest import BaseUnitTest
+from thingsboard_gateway.connectors.mqtt.bytes_mqtt_uplink_converter import BytesMqttUplinkConverter
+
+
+class BytesMqttUplinkConverterTests(BaseUnitTest):
+    CONFIG = {
+        "topicFilter": "sensor/raw_data",
+        "converter": {
+            "type": "bytes",
+            "deviceInfo": {
+                "deviceNameExpression": "[0:4]",
+                "deviceProfileExpression": "default"
+            },
+            "attributes": [
+                {
+                    "type": "raw",
+                    "key": "rawData",
+                    "value": "[:]"
+                }
+            ],
+            "timeseries": [
+                {
+                    "type": "raw",
+                    "key": "temp",
+                    "value": "[4:]"
+                }
+            ]
+        }
+    }
+
+    def test_raw_payload_is_used(self):
+        self.assertTrue(BytesMqttUplinkConverter.RAW_PAYLOAD)
+
+    def test_bytes_and_text_payloads_are_converted_equally(self):
+        converter = BytesMqttUplinkConverter(self.CONFIG, logger=self.log)
+
+        converted_bytes = converter.convert("sensor/raw_data", b"AM1221.5")
+        converted_text = converter.convert("sensor/raw_data", "AM1221.5")
+
+        self.assertEqual("AM12", converted_bytes["deviceName"])
+        self.assertEqual("default", converted_bytes["deviceType"])
+        self.assertEqual([{"rawData": "AM1221.5"}], converted_bytes["attributes"])
+        self.assertEqual("21.5", converted_bytes["telemetry"][0]["values"]["temp"])
+        self.assertEqual(converted_text["attributes"], converted_bytes["attributes"])
+
+    def test_batch_conversion(self):
+        converter = BytesMqttUplinkConverter(self.CONFIG, logger=self.log)
+
+        converted_data = converter.convert_batch([("sensor/raw_data", b"AM1221.5"), ("sensor/raw_data", b"AM1322.5")])
+
+        self.assertEqual(["AM12", "AM13"], [item["deviceName"] for item in converted_data])
+        self.assertEqual("22.5", converted_data[1]["telemetry"][0]["values"]["temp"])
+
+    def test_typed_values_are_unpacked(self):
+        config = {
+            "converter": {
+                "type": "bytes",
+                "byteOrder": "LITTLE",
+                "deviceInfo": {
+                    "deviceNameExpression": "SN-[0:2]",
+                    "deviceProfileExpression": "default"
+                },
+                "attributes": [
+                    {"type": "bits", "key": "alarm", "value": "[8:9]", "bit": 0},
+                    {"type": "bits", "key": "mode", "value": "[8:9]", "bit": 1, "bitLength": 3}
+                ],
+                "timeseries": [
+                    {"type": "int", "key": "temperature", "value": "[2:4]"},
+                    {"type": "float", "key": "humidity", "value": "[4:8]"},
+                    {"type": "uint", "key": "counter", "value": "[9:11]", "byteOrder": "BIG"},
+                    {"type": "uint", "key": "crc", "value": "[-1:]"}
+                ]
+            }
+        }
+        converter = BytesMqttUplinkConverter(config, logger=self.log)
+        payload = b"AB" + pack('<h', -125) + pack('<f', 45.5) + bytes([0b1011]) + pack('>H', 1000) + b"\x7f"
+
+        converted_data = converter.convert("sensor/raw_data", payload)
+
+        self.assertEqual("SN-AB", converted_data["deviceName"])
+        self.assertEqual([{"alarm": True}, {"mode": 5}], converted_data["attributes"])
+        self.assertEqual([{"temperature": -125}, {"humidity": 45.5}, {"counter": 1000}, {"crc": 127}],
+                         [item["values"] for item in converted_data["telemetry"]])
+
+    def test_short_payload_is_dropped(self):
+        config = {
+            "converter": {
+                "type": "bytes",
+                "deviceInfo": {
+                    "deviceNameExpression": "sensor",
+                    "deviceProfileExpression": "default"
+                },
+                "timeseries": [
+                    {"type": "double", "key": "value", "value": "[0:8]"}
+                ]
+            }
+        }
+        converter = BytesMqttUplinkConverter(config, logger=self.log)
+
+        converted_data = converter.convert("sensor/raw_data", b"\x00\x01")
+
+        self.assertEqual([], converted_data["telemetry"])
+
+    def test_fields_fitting_short_payload_are_converted(self):
+        config = {
+            "converter": {
+                "type": "bytes",
+                "deviceInfo": {
+                    "deviceNameExpression": "sensor",
+                    "deviceProfileExpression": "default"
+                },
+                "attributes": [
+                    {"type": "raw", "key": "model", "value": "[0:2]"}
+                ],
+                "timeseries": [
+                    {"type": "uint", "key": "status", "value": "[0:1]"},
+                    {"type": "int", "key": "temperature", "value": "[4:6]"}
+                ]
+            }
+        }
+        converter = BytesMqttUplinkConverter(config, logger=self.log)
+
+        converted_data = converter.convert("sensor/raw_data", b"AB")
+
+        self.assertEqual([{"model": "AB"}], converted_data["attributes"])
+        self.assertEqual([{"status": 65}], [item["values"] for item in converted_data["telemetry"]])
@@ -14,6 +14,7 @@
 
 import unittest
 from random import randint
+from unittest import mock
 
 from tests.unit.BaseUnitTest import BaseUnitTest
 from thingsboard_gateway.gateway.constants import *
@@ -58,6 +59,28 @@ class JsonMqttUplinkConverterTests(BaseUnitTest):
             self.assertDictEqual(single_data, self._convert_to_dict(item.get('telemetry')))
             self.assertDictEqual(single_data, self._convert_to_dict(item.get('attributes')))
 
+    def test_batch_result(self):
+        topic, config, single_data = self._get_device_1_test_data()
+        converter = JsonMqttUplinkConverter(config, logger=self.log)
+        converted_data = converter.convert_batch([(topic, single_data), (topic, [single_data, single_data])])
+
+        self.assertEqual(3, len(converted_data))
+        for item in converted_data:
+            self.assertEqual(self.DEVICE_NAME, item["deviceName"])
+            self.assertDictEqual(single_data, self._convert_to_dict(item.get('telemetry')))
+
+    def test_failed_batch_statistics_not_counted(self):
+        topic, config, single_data = self._get_device_1_test_data()
+        converter = JsonMqttUplinkConverter(config, logger=self.log)
+
+        with mock.patch.object(converter, 'parse_device_name', side_effect=[self.DEVICE_NAME, ValueError]), \
+                mock.patch('thingsboard_gateway.connectors.mqtt.json_mqtt_uplink_converter.StatisticsService') \
+                as statistics_service:
+            with self.assertRaises(ValueError):
+                converter.convert_batch([(topic, single_data), (topic, single_data)])
+
+        statistics_service.count_connector_message.assert_not_called()
+
     def test_without_send_on_change_option(self):
         topic, config, data = self._get_device_1_test_data()
         converter = JsonMqttUplinkConverter(config, logger=self.log)
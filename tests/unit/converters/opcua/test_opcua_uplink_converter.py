@@ -0,0 +1,62 @@
+from datetime import datetime, timezone
+from logging import getLogger
+
+from asyncua.ua import DataValue, Variant, VariantType
+
+from tests.unit.BaseUnitTest import BaseUnitTest
+from thingsboard_gateway.connectors.opcua.opcua_uplink_converter import OpcUaUplinkConverter, ConversionPlan
+
+SOURCE_TIMESTAMP = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+class OpcUaUplinkConverterTests(BaseUnitTest):
+    def setUp(self):
+        super().setUp()
+        self.converter = OpcUaUplinkConverter({'device_name': 'Device 1', 'device_type': 'default'},
+                                              getLogger('opcua'))
+        self.configs = [
+            {'key': 'temperature', 'section': 'timeseries', 'timestampLocation': 'SourceTimestamp'},
+            {'key': 'humidity', 'section': 'timeseries', 'timestampLocation': 'sourceTimestamp'},
+            {'key': 'pressure', 'section': 'timeseries'},
+            {'key': 'serial', 'section': 'attributes'}
+        ]
+        self.values = [
+            DataValue(Variant(21.5, VariantType.Double), SourceTimestamp=SOURCE_TIMESTAMP),
+            DataValue(Variant(40, VariantType.Int32), SourceTimestamp=SOURCE_TIMESTAMP),
+            DataValue(Variant(1013.2, VariantType.Double)),
+            DataValue(Variant('SN1', VariantType.String))
+        ]
+
+    def test_compiled_plan(self):
+        plan = self.converter.compile(self.configs)
+
+        self.assertIsInstance(plan, ConversionPlan)
+        self.assertEqual(('temperature', True, 'SourceTimestamp'), plan[0])
+        self.assertEqual(('pressure', True, None), plan[2])
+        self.assertEqual(('serial', False, None), plan[3])
+
+    def test_telemetry_grouped_by_timestamp(self):
+        converted_data = self.converter.convert(self.converter.compile(self.configs), self.values)
+
+        self.assertEqual(2, len(converted_data.telemetry))
+        self.assertEqual(SOURCE_TIMESTAMP.timestamp() * 1000, converted_data.telemetry[0].ts)
+        self.assertEqual({'temperature': '21.5', 'humidity': '40'}, converted_data.telemetry[0].values)
+        self.assertEqual({'pressure': '1013.2'}, converted_data.telemetry[1].values)
+        self.assertEqual({'serial': 'SN1'}, converted_data.attributes.to_dict())
+
+    def test_not_compiled_configs(self):
+        converted_data = self.converter.convert(self.configs, self.values)
+        compiled_converted_data = self.converter.convert(self.converter.compile(self.configs), self.values)
+
+        self.assertEqual([entry.values for entry in compiled_converted_data.telemetry],
+                         [entry.values for entry in converted_data.telemetry])
+        self.assertEqual(compiled_converted_data.attributes.to_dict(), converted_data.attributes.to_dict())
+        self.assertEqual(3, converted_data.telemetry_datapoints_count)
+
+    def test_newest_value_of_key_wins(self):
+        config = {'key': 'temperature', 'section': 'timeseries'}
+        values = [DataValue(Variant(1.0, VariantType.Double)), DataValue(Variant(2.0, VariantType.Double))]
+
+        converted_data = self.converter.convert(self.converter.compile([config, config]), values)
+
+        self.assertEqual({'temperature': '2.0'}, converted_data.telemetry[0].values)
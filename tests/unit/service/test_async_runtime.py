@@ -0,0 +1,39 @@
+import asyncio
+import threading
+
+from tests.unit.BaseUnitTest import BaseUnitTest
+from thingsboard_gateway.gateway.async_runtime import AsyncRuntime
+
+
+class AsyncRuntimeTests(BaseUnitTest):
+    def setUp(self):
+        super().setUp()
+        self.runtime = AsyncRuntime()
+
+    def tearDown(self):
+        self.runtime.stop()
+        super().tearDown()
+
+    def test_coroutines_run_in_one_thread(self):
+        async def get_thread_name():
+            await asyncio.sleep(0)
+            return threading.current_thread().name
+
+        futures = [self.runtime.submit(get_thread_name()) for _ in range(3)]
+
+        self.assertEqual({future.result(timeout=5) for future in futures}, {AsyncRuntime.THREAD_NAME})
+
+    def test_run_is_not_allowed_in_runtime_thread(self):
+        async def run_nested():
+            return self.runtime.run(asyncio.sleep(0))
+
+        with self.assertRaises(RuntimeError):
+            self.runtime.run(run_nested(), timeout=5)
+
+    def test_stop_cancels_tasks(self):
+        future = self.runtime.submit(asyncio.sleep(60))
+
+        self.runtime.stop()
+
+        self.assertTrue(future.cancelled())
+        self.assertFalse(self.runtime.is_running())
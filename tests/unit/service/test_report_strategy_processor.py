@@ -0,0 +1,88 @@
+import logging
+from time import monotonic
+
+from tests.unit.BaseUnitTest import BaseUnitTest
+from thingsboard_gateway.gateway.constants import *
+from thingsboard_gateway.gateway.report_strategy_processor import ReportStrategyProcessor, \
+    get_report_strategy_from_config
+
+
+class TestReportStrategyProcessor(BaseUnitTest):
+    DEVICE_NAME = 'Test device'
+    DEVICE_TYPE = 'default'
+
+    def setUp(self):
+        self.sent = []
+        self.processor = ReportStrategyProcessor('Test report strategy processor', self.sent.append,
+                                                 logging.getLogger('test'))
+        self.processor.register_device(self.DEVICE_NAME, self.DEVICE_TYPE,
+                                       {'type': ReportStrategy.ON_CHANGE_OR_REPORT_PERIOD,
+                                        REPORT_PERIOD_PARAMETER: 1})
+        self.processor.register_key(self.DEVICE_NAME, TELEMETRY_PARAMETER, 'onChange',
+                                    {'type': ReportStrategy.ON_CHANGE})
+        self.processor.register_key(self.DEVICE_NAME, TELEMETRY_PARAMETER, 'periodic',
+                                    {'type': ReportStrategy.ON_REPORT_PERIOD, REPORT_PERIOD_PARAMETER: 1})
+
+    def _data(self, telemetry=None, attributes=None):
+        return {DEVICE_NAME_PARAMETER: self.DEVICE_NAME, DEVICE_TYPE_PARAMETER: self.DEVICE_TYPE,
+                TELEMETRY_PARAMETER: telemetry or [], ATTRIBUTES_PARAMETER: attributes or []}
+
+    def _flush(self, after_seconds):
+        self.processor._ReportStrategyProcessor__flush(monotonic() + after_seconds)
+
+    def test_first_values_are_sent(self):
+        result = self.processor.filter_data(self._data([{'onChange': 1, 'periodic': 2}], [{'attr': 'a'}]))
+
+        self.assertEqual([{'onChange': 1, 'periodic': 2}], result[TELEMETRY_PARAMETER])
+        self.assertEqual([{'attr': 'a'}], result[ATTRIBUTES_PARAMETER])
+
+    def test_only_changed_values_are_sent(self):
+        self.processor.filter_data(self._data([{'onChange': 1, 'periodic': 2}]))
+
+        self.assertIsNone(self.processor.filter_data(self._data([{'onChange': 1, 'periodic': 2}])))
+
+        result = self.processor.filter_data(self._data([{'onChange': 3, 'periodic': 4}]))
+        self.assertEqual([{'onChange': 3}], result[TELEMETRY_PARAMETER])
+
+    def test_timestamped_telemetry_keeps_timestamp(self):
+        result = self.processor.filter_data(
+            self._data([{TELEMETRY_TIMESTAMP_PARAMETER: 100, TELEMETRY_VALUES_PARAMETER: {'onChange': 1}}]))
+
+        self.assertEqual([{TELEMETRY_TIMESTAMP_PARAMETER: 100, TELEMETRY_VALUES_PARAMETER: {'onChange': 1}}],
+                         result[TELEMETRY_PARAMETER])
+
+    def test_unregistered_device_data_is_not_filtered(self):
+        data = {DEVICE_NAME_PARAMETER: 'Unknown', DEVICE_TYPE_PARAMETER: 'default',
+                TELEMETRY_PARAMETER: [{'key': 1}], ATTRIBUTES_PARAMETER: []}
+
+        self.assertIs(data, self.processor.filter_data(data))
+        self.assertIs(data, self.processor.filter_data(data))
+
+    def test_periodic_values_are_merged_into_one_message_per_device(self):
+        self.processor.filter_data(self._data([{'onChange': 1, 'periodic': 2}], [{'attr': 'a'}]))
+
+        self._flush(0.5)
+        self.assertEqual([], self.sent)
+
+        self._flush(1.5)
+        self.assertEqual([{DEVICE_NAME_PARAMETER: self.DEVICE_NAME, DEVICE_TYPE_PARAMETER: self.DEVICE_TYPE,
+                           TELEMETRY_PARAMETER: [{'periodic': 2}], ATTRIBUTES_PARAMETER: [{'attr': 'a'}]}],
+                         self.sent)
+
+    def test_deleted_device_is_not_flushed(self):
+        self.processor.filter_data(self._data([{'periodic': 2}]))
+        self.processor.delete_device(self.DEVICE_NAME)
+
+        self._flush(1.5)
+        self.assertEqual([], self.sent)
+
+    def test_report_strategy_from_config(self):
+        default = {'type': ReportStrategy.ON_REPORT_PERIOD, REPORT_PERIOD_PARAMETER: 10}
+
+        self.assertIs(default, get_report_strategy_from_config({}, default, 5))
+        self.assertEqual({'type': ReportStrategy.ON_CHANGE, REPORT_PERIOD_PARAMETER: 10},
+                         get_report_strategy_from_config({SEND_ON_CHANGE_PARAMETER: True}, default, 5))
+        self.assertEqual({'type': ReportStrategy.ON_CHANGE_OR_REPORT_PERIOD, REPORT_PERIOD_PARAMETER: 2},
+                         get_report_strategy_from_config(
+                             {REPORT_STRATEGY_PARAMETER: {'type': 'ON_CHANGE_OR_REPORT_PERIOD',
+                                                          REPORT_PERIOD_PARAMETER: 2000}}, default, 5))
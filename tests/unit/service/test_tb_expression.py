@@ -0,0 +1,39 @@
+from tests.unit.BaseUnitTest import BaseUnitTest
+from thingsboard_gateway.tb_utility.tb_expression import TBExpression
+
+
+class TBExpressionTests(BaseUnitTest):
+    def test_expression_is_compiled_once(self):
+        self.assertIs(TBExpression.compile('${serialNumber}'), TBExpression.compile('${serialNumber}'))
+
+    def test_constant_expression(self):
+        expression = TBExpression.compile('temperature')
+
+        self.assertTrue(expression.is_constant)
+        self.assertEqual('temperature', expression.render({'temperature': 10}))
+
+    def test_render_with_keys_and_json_path(self):
+        expression = TBExpression.compile('${serialNumber}_${sensor.model}-${values[1]}')
+        body = {'serialNumber': 'SN-001', 'sensor': {'model': 'T1000'}, 'values': [1, 2]}
+
+        self.assertEqual(['serialNumber', 'sensor.model', 'values[1]'], expression.tags)
+        self.assertEqual('SN-001_T1000-2', expression.render(body))
+        self.assertEqual('SN-001_T1000-2', expression.render('{"serialNumber": "SN-001", "sensor": {"model": '
+                                                             '"T1000"}, "values": [1, 2]}'))
+
+    def test_render_key_with_spaces(self):
+        self.assertEqual('25', TBExpression.compile('${sensor.inner temperature}').render(
+            {'sensor': {'inner temperature': 25}}))
+
+    def test_missing_value(self):
+        expression = TBExpression.compile('Device ${serialNumber}')
+
+        self.assertEqual('Device None', expression.render({}))
+        self.assertEqual('Device ${serialNumber}', expression.render({}, expression_instead_none=True))
+
+    def test_null_value(self):
+        expression = TBExpression.compile('${temperature}')
+
+        self.assertEqual('None', expression.render({'temperature': None}, expression_instead_none=True))
+        self.assertEqual('${temperature}', expression.render({'temperature': None}, expression_instead_none=True,
+                                                             value_type='double'))
@@ -0,0 +1,17 @@
+from types import SimpleNamespace
+
+from tests.unit.BaseUnitTest import BaseUnitTest
+from thingsboard_gateway.tb_utility.tb_utility import TBUtility
+
+
+class TBUtilityDecodeTests(BaseUnitTest):
+    def test_json_payload(self):
+        self.assertEqual({'temperature': 21.5}, TBUtility.decode(SimpleNamespace(payload=b'{"temperature": 21.5}')))
+
+    def test_json_payload_with_invalid_utf8_bytes(self):
+        message = SimpleNamespace(payload=b'{"name": "Device\xff 1", "temperature": 21.5}')
+
+        self.assertEqual({'name': 'Device 1', 'temperature': 21.5}, TBUtility.decode(message))
+
+    def test_not_json_payload(self):
+        self.assertEqual('temperature=21.5', TBUtility.decode(SimpleNamespace(payload=b'temperature=21.5')))
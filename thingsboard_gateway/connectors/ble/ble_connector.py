@@ -12,13 +12,13 @@
 #     See the License for the specific language governing permissions and
 #     limitations under the License.
 
-import asyncio
 from time import sleep
 from random import choice
 from string import ascii_lowercase
 from threading import Thread
 from queue import Queue
 
+from thingsboard_gateway.gateway.async_runtime import AsyncRuntime
 from thingsboard_gateway.gateway.statistics.decorators import CollectAllReceivedBytesStatistics
 from thingsboard_gateway.tb_utility.tb_utility import TBUtility
 from thingsboard_gateway.gateway.statistics.statistics_service import StatisticsService
@@ -55,8 +55,7 @@ class BLEConnector(Connector, Thread):
         self.__connected = False
 
         if self.__config.get('showMap', False):
-            loop = asyncio.new_event_loop()
-            loop.run_until_complete(self.__show_map())
+            AsyncRuntime.get_instance().run(self.__show_map())
 
         self.__devices = []
         self.__configure_and_load_devices()
@@ -153,7 +152,7 @@ class BLEConnector(Connector, Thread):
     @CollectAllReceivedBytesStatistics(start_stat_type='allReceivedBytesFromTB')
     def on_attributes_update(self, content):
         try:
-            device = tuple(filter(lambda i: i.getName() == content['device'], self.__devices))[0]
+            device = tuple(filter(lambda i: i.name == content['device'], self.__devices))[0]
 
             for attribute_update_config in device.config['attributeUpdates']:
                 for attribute_update in content['data']:
@@ -168,7 +167,7 @@ class BLEConnector(Connector, Thread):
     @CollectAllReceivedBytesStatistics(start_stat_type='allReceivedBytesFromTB')
     def server_side_rpc_handler(self, content):
         try:
-            device = tuple(filter(lambda i: i.getName() == content['device'], self.__devices))[0]
+            device = tuple(filter(lambda i: i.name == content['device'], self.__devices))[0]
 
             for rpc_config in device.config['serverSideRpc']:
                 for (key, value) in content['data'].items():
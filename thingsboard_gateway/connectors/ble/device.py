@@ -24,13 +24,13 @@
 #     See the License for the specific language governing permissions and
 #     limitations under the License.
 
-from threading import Thread
 from platform import system
-from time import time, sleep
+from time import time
 import asyncio
 
 from bleak import BleakClient, BleakScanner
 
+from thingsboard_gateway.gateway.async_runtime import AsyncRuntime
 from thingsboard_gateway.gateway.statistics.decorators import CollectStatistics
 from thingsboard_gateway.tb_utility.tb_loader import TBModuleLoader
 from thingsboard_gateway.connectors.ble.error_handler import ErrorHandler
@@ -42,11 +42,13 @@ MAC_ADDRESS_FORMAT = {
 DEFAULT_CONVERTER_CLASS_NAME = 'BytesBLEUplinkConverter'
 
 
-class Device(Thread):
+class Device:
     def __init__(self, config, logger):
-        super().__init__()
         self._log = logger
-        self.loop = None
+        # Devices run in the event loop, shared by all asynchronous connectors
+        self.__runtime = AsyncRuntime.get_instance()
+        self.loop = self.__runtime.loop
+        self.__task = None
         self.stopped = False
         self.name = config['name']
         self.device_type = config.get('deviceType', 'default')
@@ -57,8 +59,6 @@ class Device(Thread):
         self.show_map = config.get('showMap', False)
         self.__connector_type = config['connector_type']
 
-        self.daemon = True
-
         try:
             self.mac_address = self.validate_mac_address(config['MACAddress'])
             self.client = BleakClient(self.mac_address)
@@ -75,7 +75,7 @@ class Device(Thread):
 
         self.notifying_chars = []
 
-        self.start()
+        self.__task = self.__runtime.submit(self.run_client())
 
     def _check_adv_mode(self):
         if len(self.config['characteristic']['telemetry']) or len(self.config['characteristic']['attributes']):
@@ -130,7 +130,7 @@ class Device(Thread):
             self.stopped = True
 
     async def timer(self):
-        while True:
+        while not self.stopped:
             try:
                 if time() - self.last_polled_time >= self.poll_period:
                     self.last_polled_time = time()
@@ -152,10 +152,10 @@ class Device(Thread):
 
                     connect_try += 1
                     if connect_try == self.connect_retry:
-                        sleep(self.wait_after_connect_retries)
+                        await asyncio.sleep(self.wait_after_connect_retries)
 
-                    sleep(self.connect_retry_in_seconds)
-                    sleep(.2)
+                    await asyncio.sleep(self.connect_retry_in_seconds)
+                    await asyncio.sleep(.2)
 
     async def notify_callback(self, sender: int, data: bytearray):
         not_converted_data = {'telemetry': [], 'attributes': []}
@@ -273,7 +273,7 @@ class Device(Thread):
         while not self.stopped and not self.client.is_connected:
             await self._connect_to_device()
 
-            sleep(.2)
+            await asyncio.sleep(.2)
 
     async def run_client(self):
         if not self.adv_only or self.show_map:
@@ -290,11 +290,7 @@ class Device(Thread):
         else:
             while not self.stopped:
                 await self._process_adv_data()
-                sleep(self.poll_period)
-
-    def run(self):
-        self.loop = asyncio.new_event_loop()
-        self.loop.run_until_complete(self.run_client())
+                await asyncio.sleep(self.poll_period)
 
     async def __show_map(self, return_result=False):
         result = f'MAP FOR {self.name.upper()}'
@@ -328,12 +324,7 @@ class Device(Thread):
             self._log.info(result)
 
     def scan_self(self, return_result):
-        task = self.loop.create_task(self.__show_map(return_result))
-
-        while not task.done():
-            sleep(.2)
-
-        return task.result()
+        return self.__runtime.run(self.__show_map(return_result))
 
     async def __write_char(self, char_id, data):
         try:
@@ -346,12 +337,7 @@ class Device(Thread):
 
     @CollectStatistics(start_stat_type='allBytesSentToDevices')
     def write_char(self, char_id, data):
-        task = self.loop.create_task(self.__write_char(char_id, data))
-
-        while not task.done():
-            sleep(.2)
-
-        return task.result()
+        return self.__runtime.run(self.__write_char(char_id, data))
 
     async def __read_char(self, char_id):
         try:
@@ -360,15 +346,12 @@ class Device(Thread):
             self._log.exception(e)
 
     def read_char(self, char_id):
-        task = self.loop.create_task(self.__read_char(char_id))
-
-        while not task.done():
-            sleep(.2)
-
-        return task.result().decode('UTF-8')
+        return self.__runtime.run(self.__read_char(char_id)).decode('UTF-8')
 
     def __str__(self):
         return f'{self.name}'
 
     def stop(self):
         self.stopped = True
+        if self.__task is not None:
+            self.__task.cancel()
@@ -20,7 +20,7 @@ from simplejson import dumps
 from thingsboard_gateway.connectors.ftp.ftp_converter import FTPConverter
 from thingsboard_gateway.gateway.statistics.decorators import CollectStatistics
 from thingsboard_gateway.gateway.statistics.statistics_service import StatisticsService
-from thingsboard_gateway.tb_utility.tb_utility import TBUtility
+from thingsboard_gateway.tb_utility.tb_expression import TBExpression
 
 
 class FTPUplinkConverter(FTPConverter):
@@ -129,35 +129,14 @@ class FTPUplinkConverter(FTPConverter):
 
         try:
             if self.__config.get("devicePatternName") is not None:
-                device_name_tags = TBUtility.get_values(self.__config.get("devicePatternName"), data,
-                                                        get_tag=True)
-                device_name_values = TBUtility.get_values(self.__config.get("devicePatternName"), data,
-                                                          expression_instead_none=True)
-
-                dict_result["deviceName"] = self.__config.get("devicePatternName")
-                for (device_name_tag, device_name_value) in zip(device_name_tags, device_name_values):
-                    is_valid_key = "${" in self.__config.get("devicePatternName") and "}" in \
-                                   self.__config.get("devicePatternName")
-                    dict_result['deviceName'] = dict_result['deviceName'].replace('${' + str(device_name_tag) + '}',
-                                                                                  str(device_name_value)) \
-                        if is_valid_key else device_name_tag
-
+                dict_result["deviceName"] = TBExpression.compile(self.__config.get("devicePatternName")) \
+                    .render(data, expression_instead_none=True)
             else:
                 self._log.error("The expression for looking \"deviceName\" not found in config %s", dumps(self.__config))
 
             if self.__config.get("devicePatternType") is not None:
-                device_type_tags = TBUtility.get_values(self.__config.get("devicePatternType"), data,
-                                                        get_tag=True)
-                device_type_values = TBUtility.get_values(self.__config.get("devicePatternType"), data,
-                                                          expression_instead_none=True)
-                dict_result["deviceType"] = self.__config.get("devicePatternType")
-
-                for (device_type_tag, device_type_value) in zip(device_type_tags, device_type_values):
-                    is_valid_key = "${" in self.__config.get("devicePatternType") and "}" in \
-                                   self.__config.get("devicePatternType")
-                    dict_result["deviceType"] = dict_result["deviceType"].replace('${' + str(device_type_tag) + '}',
-                                                                                  str(device_type_value)) \
-                        if is_valid_key else device_type_tag
+                dict_result["deviceType"] = TBExpression.compile(self.__config.get("devicePatternType")) \
+                    .render(data, expression_instead_none=True)
         except Exception as e:
             StatisticsService.count_connector_message(self._log.name, 'convertersMsgDropped')
             self._log.error('Error in converter, for config: \n%s\n and message: \n%s\n %s', dumps(self.__config), data,
@@ -168,29 +147,10 @@ class FTPUplinkConverter(FTPConverter):
                 dict_result[self.__data_types[datatype]] = []
 
                 for datatype_config in self.__config.get(datatype, []):
-                    values = TBUtility.get_values(datatype_config["value"], data, datatype_config["type"],
-                                                  expression_instead_none=True)
-                    values_tags = TBUtility.get_values(datatype_config["value"], data, datatype_config["type"],
-                                                       get_tag=True)
-
-                    keys = TBUtility.get_values(datatype_config["key"], data, datatype_config["type"],
-                                                expression_instead_none=True)
-                    keys_tags = TBUtility.get_values(datatype_config["key"], data, get_tag=True)
-
-                    full_key = datatype_config["key"]
-                    for (key, key_tag) in zip(keys, keys_tags):
-                        is_valid_key = "${" in datatype_config["key"] and "}" in \
-                                       datatype_config["key"]
-                        full_key = full_key.replace('${' + str(key_tag) + '}',
-                                                    str(key)) if is_valid_key else key_tag
-
-                    full_value = datatype_config["value"]
-                    for (value, value_tag) in zip(values, values_tags):
-                        is_valid_value = "${" in datatype_config["value"] and "}" in \
-                                         datatype_config["value"]
-
-                        full_value = full_value.replace('${' + str(value_tag) + '}',
-                                                        str(value)) if is_valid_value else str(value)
+                    full_key = TBExpression.compile(datatype_config["key"]).render(
+                        data, expression_instead_none=True, value_type=datatype_config["type"])
+                    full_value = TBExpression.compile(datatype_config["value"]).render(
+                        data, expression_instead_none=True, value_type=datatype_config["type"])
 
                     if datatype == 'timeseries' and (
                             data.get("ts") is not None or data.get("timestamp") is not None):
@@ -72,10 +72,39 @@ HOLDING_REGISTERS = "holding_registers"
 INPUT_REGISTERS = "input_registers"
 DISCRETE_INPUTS = "discrete_inputs"
 
+WRITE_FUNCTION_CODE_REGISTER_TYPE = {
+    5: COILS_INITIALIZER,
+    15: COILS_INITIALIZER,
+    6: HOLDING_REGISTERS,
+    16: HOLDING_REGISTERS
+}
+# Reserved RPC method of the gateway Modbus server device, params have the structure of "values" section
+# of the server configuration and are written to the datablocks in bulk
+UPDATE_SERVER_VALUES_RPC_METHOD = "updateValues"
+
+WRITE_MULTIPLE_FUNCTION_CODE = {
+    COILS_INITIALIZER: 15,
+    HOLDING_REGISTERS: 16
+}
+# Protocol limits for one Write Multiple Coils/Registers request
+MAX_WRITE_OBJECTS_COUNT = {
+    COILS_INITIALIZER: 1968,
+    HOLDING_REGISTERS: 123
+}
+
 class RequestType(Enum):
     POLL = "POLL"
-    SEND_DATA = "SEND_DATA"
+
+class DeviceHealthState(Enum):
+    CLOSED = "CLOSED"
+    OPEN = "OPEN"
+    HALF_OPEN = "HALF_OPEN"
 
 # Default values
 
 TIMEOUT = 30
+DEFAULT_CONNECT_ATTEMPT_COUNT = 5
+MIN_CONNECT_ATTEMPT_TIME_MS = 500
+DEFAULT_WAIT_AFTER_FAILED_ATTEMPTS_MS = 60000
+DATABLOCK_SIZE = 65536
+RPC_LATENCY_WINDOW = 1000
@@ -0,0 +1,81 @@
+#     Copyright 2024. ThingsBoard
+#
+#     Licensed under the Apache License, Version 2.0 (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+
+from threading import Lock
+from time import monotonic
+
+from thingsboard_gateway.connectors.modbus.constants import DeviceHealthState
+
+
+class DeviceHealth:
+    """
+    Circuit breaker for a polled device.
+    After failure_threshold consecutive failures the circuit is opened and polls are skipped until the backoff
+    time passes, then a single probe poll is allowed (half-open state). A failed probe opens the circuit again
+    with doubled backoff, limited by max_backoff, a successful one closes it.
+    """
+
+    def __init__(self, failure_threshold, initial_backoff, max_backoff, backoff_multiplier=2):
+        self.failure_threshold = max(failure_threshold, 1)
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max(max_backoff, initial_backoff)
+        self.backoff_multiplier = backoff_multiplier
+
+        self.state = DeviceHealthState.CLOSED
+        self.failures = 0
+        self.backoff = initial_backoff
+        self.next_attempt_time = 0
+        self.__lock = Lock()
+
+    def allow_request(self, current_monotonic=None):
+        with self.__lock:
+            if self.state == DeviceHealthState.CLOSED:
+                return True
+
+            if self.state == DeviceHealthState.OPEN:
+                if (current_monotonic or monotonic()) >= self.next_attempt_time:
+                    self.state = DeviceHealthState.HALF_OPEN
+                    return True
+
+            return False
+
+    def record_success(self):
+        """Returns True if the device was recovered after the circuit was opened."""
+        with self.__lock:
+            recovered = self.state != DeviceHealthState.CLOSED
+            self.state = DeviceHealthState.CLOSED
+            self.failures = 0
+            self.backoff = self.initial_backoff
+            return recovered
+
+    def record_failure(self, current_monotonic=None):
+        """Returns True if the circuit was opened by this failure."""
+        with self.__lock:
+            self.failures += 1
+
+            if self.state == DeviceHealthState.HALF_OPEN:
+                self.backoff = min(self.backoff * self.backoff_multiplier, self.max_backoff)
+            elif self.state == DeviceHealthState.OPEN or self.failures < self.failure_threshold:
+                return False
+
+            opened = self.state == DeviceHealthState.CLOSED
+            self.state = DeviceHealthState.OPEN
+            self.next_attempt_time = (current_monotonic or monotonic()) + self.backoff
+            return opened
+
+    def is_available(self):
+        return self.state == DeviceHealthState.CLOSED
+
+    def __str__(self):
+        return f'{self.state.value} (failures: {self.failures}, backoff: {self.backoff}s)'
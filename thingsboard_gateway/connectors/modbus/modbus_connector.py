@@ -20,6 +20,9 @@ from random import choice
 from string import ascii_lowercase
 from packaging import version
 
+from simplejson import loads
+
+from thingsboard_gateway.gateway.report_strategy_processor import ReportStrategyProcessor
 from thingsboard_gateway.gateway.statistics.statistics_service import StatisticsService
 from thingsboard_gateway.tb_utility.tb_utility import TBUtility
 from thingsboard_gateway.tb_utility.tb_logger import init_logger
@@ -64,47 +67,24 @@ from pymodbus.framer.rtu_framer import ModbusRtuFramer
 from pymodbus.framer.socket_framer import ModbusSocketFramer
 from pymodbus.framer.ascii_framer import ModbusAsciiFramer
 from pymodbus.exceptions import ConnectionException, ModbusIOException
-from pymodbus.server import StartTcpServer, StartTlsServer, StartUdpServer, StartSerialServer, ServerStop
-from pymodbus.device import ModbusDeviceIdentification
-from pymodbus.version import version
-from pymodbus.datastore import ModbusSlaveContext, ModbusServerContext
-from pymodbus.datastore import ModbusSparseDataBlock
 from pymodbus.pdu import ExceptionResponse
 
 from thingsboard_gateway.connectors.connector import Connector
 from thingsboard_gateway.connectors.modbus.constants import *
 from thingsboard_gateway.connectors.modbus.slave import Slave
+from thingsboard_gateway.connectors.modbus.server import Server
+from thingsboard_gateway.connectors.modbus.rpc_lane import RpcLane, RpcRequest
 from thingsboard_gateway.connectors.modbus.backward_compability_adapter import BackwardCompatibilityAdapter
-from thingsboard_gateway.connectors.modbus.bytes_modbus_downlink_converter import BytesModbusDownlinkConverter
 
-CONVERTED_DATA_SECTIONS = [ATTRIBUTES_PARAMETER, TELEMETRY_PARAMETER]
 FRAMER_TYPE = {
     'rtu': ModbusRtuFramer,
     'socket': ModbusSocketFramer,
     'ascii': ModbusAsciiFramer
 }
-SLAVE_TYPE = {
-    'tcp': StartTcpServer,
-    'tls': StartTlsServer,
-    'udp': StartUdpServer,
-    'serial': StartSerialServer
-}
-FUNCTION_TYPE = {
-    COILS_INITIALIZER: 'co',
-    HOLDING_REGISTERS: 'hr',
-    INPUT_REGISTERS: 'ir',
-    DISCRETE_INPUTS: 'di'
-}
 FUNCTION_CODE_WRITE = {
     HOLDING_REGISTERS: (6, 16),
     COILS_INITIALIZER: (5, 15)
 }
-FUNCTION_CODE_SLAVE_INITIALIZATION = {
-    HOLDING_REGISTERS: (6, 16),
-    COILS_INITIALIZER: (5, 15),
-    INPUT_REGISTERS: (6, 16),
-    DISCRETE_INPUTS: (5, 15)
-}
 FUNCTION_CODE_READ = {
     HOLDING_REGISTERS: 3,
     COILS_INITIALIZER: 1,
@@ -148,14 +128,15 @@ class ModbusConnector(Connector, Thread):
         self.__max_number_of_workers = config.get('maxNumberOfWorkers', 100)
 
         self.__slaves = []
-        self.__slave_thread = None
+        self.__server = None
+        self.__rpc_lane = RpcLane()
 
         self.__main_report_strategy = self.__config.get(REPORT_STRATEGY_PARAMETER, {})
+        self.__report_strategy_processor = ReportStrategyProcessor(self.name + ' report strategy processor',
+                                                                   self._save_data, self.__log)
 
         if self.__config.get('slave') and self.__config.get('slave', {}).get('sendDataToThingsBoard', False):
-            self.__slave_thread = Thread(target=self.__configure_and_run_slave, args=(self.__config['slave'],),
-                                         daemon=True, name='Gateway modbus slave')
-            self.__slave_thread.start()
+            self.__configure_and_run_slave(self.__config['slave'])
         self.__load_slaves()
 
     def is_connected(self):
@@ -181,6 +162,8 @@ class ModbusConnector(Connector, Thread):
     def run(self):
         self.__connected = True
 
+        self.__report_strategy_processor.start()
+
         thread = Thread(target=self.__process_slaves, daemon=True, name="Modbus connector master processor thread")
         thread.start()
 
@@ -191,51 +174,27 @@ class ModbusConnector(Connector, Thread):
             sleep(.001)
 
     def __configure_and_run_slave(self, config):
-        identity = None
-        if config.get('identity'):
-            identity = ModbusDeviceIdentification()
-            identity.VendorName = config['identity'].get('vendorName', '')
-            identity.ProductCode = config['identity'].get('productCode', '')
-            identity.VendorUrl = config['identity'].get('vendorUrl', '')
-            identity.ProductName = config['identity'].get('productName', '')
-            identity.ModelName = config['identity'].get('ModelName', '')
-            identity.MajorMinorRevision = version.short()
-
-        blocks = {}
         if (config.get('values') is None) or (not len(config.get('values'))):
             self.__log.error("No values to read from device %s", config.get('deviceName', 'Modbus Slave'))
             return
 
-        for (key, value) in config.get('values').items():
-            values = {}
-            converter = BytesModbusDownlinkConverter({}, self.__log)
-            for section in ('attributes', 'timeseries', 'attributeUpdates', 'rpc'):
-                for item in value.get(section, []):
-                    function_code = FUNCTION_CODE_SLAVE_INITIALIZATION[key][0] if item['objectsCount'] <= 1 else \
-                        FUNCTION_CODE_SLAVE_INITIALIZATION[key][1]
-                    converted_value = converter.convert(
-                        {**item,
-                         'device': config.get('deviceName', 'Gateway'), 'functionCode': function_code,
-                         'byteOrder': config['byteOrder'], 'wordOrder': config.get('wordOrder', 'LITTLE')},
-                        {'data': {'params': item['value']}})
-                    if converted_value is not None:
-                        values[item['address'] + 1] = converted_value
-                    else:
-                        self.__log.error("Failed to convert value %s with type %s, skipping...", item['value'], item['type'])
-                if len(values):
-                    blocks[FUNCTION_TYPE[key]] = ModbusSparseDataBlock(values)
-
-        if not len(blocks):
-            self.__log.info("%s - will be initialized without values", config.get('deviceName', 'Modbus Slave'))
-
+        self.__server = Server(config, self.__log)
         self.__add_slave_to_devices()
+        self.__server.start()
+
+    def update_server_values(self, values):
+        """
+        Bulk update of the gateway Modbus server datablocks, values should have the same structure as "values"
+        section of the slave configuration. ThingsBoard updates the values with "updateValues" RPC of the server device.
+        """
+        if self.__server is None:
+            self.__log.error("Modbus server is not configured for %s", self.get_name())
+            return 0
 
-        context = ModbusServerContext(slaves=ModbusSlaveContext(**blocks), single=True)
-        SLAVE_TYPE[config['type']](context=context, identity=identity,
-                                   address=(config.get('host'), config.get('port')) if (
-                                           config['type'] == 'tcp' or 'udp') else None,
-                                   port=config.get('port') if config['type'] == 'serial' else None,
-                                   framer=FRAMER_TYPE[config['method']], **config.get('security', {}))
+        if isinstance(values, str):
+            values = loads(values)
+
+        return self.__server.update_values(values)
 
     def __add_slave_to_devices(self):
         config = self.__config['slave']
@@ -257,7 +216,8 @@ class ModbusConnector(Connector, Thread):
     def __load_slaves(self):
         for device in self.__config.get('master', {'slaves': []}).get('slaves', []):
             slave_config = {**device, 'connector': self, 'gateway': self.__gateway, 'logger': self.__log,
-                'callback': ModbusConnector.callback}
+                            'callback': ModbusConnector.callback,
+                            'report_strategy_processor': self.__report_strategy_processor}
             if REPORT_STRATEGY_PARAMETER not in slave_config:
                 slave_config[REPORT_STRATEGY_PARAMETER] = self.__main_report_strategy
             self.__slaves.append(Slave(**slave_config))
@@ -301,22 +261,11 @@ class ModbusConnector(Connector, Thread):
         except Exception as e:
             self.__log.error(e)
 
-        to_send = {DEVICE_NAME_PARAMETER: converted_data[DEVICE_NAME_PARAMETER],
-                   DEVICE_TYPE_PARAMETER: converted_data[DEVICE_TYPE_PARAMETER],
-                   TELEMETRY_PARAMETER: [],
-                   ATTRIBUTES_PARAMETER: []
-                   }
+        if not converted_data:
+            return None
 
         # Check report strategy for each key in attributes and telemetry for device and send data only if it is necessary
-        for converted_data_section in CONVERTED_DATA_SECTIONS:
-            for current_section_dict in converted_data[converted_data_section]:
-                for key, value in current_section_dict.items():
-                    should_send = device.update_cached_data_and_check_is_data_should_be_send(converted_data_section, key, value)
-                    if should_send:
-                        to_send[converted_data_section].append({key: value})
-
-        if to_send.get(ATTRIBUTES_PARAMETER) or to_send.get(TELEMETRY_PARAMETER):
-            return to_send
+        return self.__report_strategy_processor.filter_data(converted_data)
 
     def _save_data(self, data):
         StatisticsService.count_connector_message(self.name, stat_parameter_name='storageMsgPushed')
@@ -334,17 +283,15 @@ class ModbusConnector(Connector, Thread):
         for slave in self.__slaves:
             slave.close()
 
-        if self.__slave_thread is not None:
-            try:
-                ServerStop()
-            except AttributeError:
-                self.__slave_thread.join()
+        self.__report_strategy_processor.stop()
+
+        if self.__server is not None:
+            self.__server.stop()
 
         # Stop all workers
         for worker in self.__workers_thread_pool:
             worker.close()
 
-        # self.__slave_thread.join()
         self.__log.info('%s has been stopped.', self.get_name())
         self.__log.stop()
         self.__stopping = False
@@ -357,22 +304,17 @@ class ModbusConnector(Connector, Thread):
 
     def __process_slaves(self):
         while not self.__stopped:
+            if not self.__rpc_lane.is_empty():
+                self.__process_rpc_requests()
             if not self.__stopped and not ModbusConnector.process_requests.empty():
                 (device, request_type, data) = ModbusConnector.process_requests.get()
                 if request_type == RequestType.POLL:
                     self.__poll_device(device)
-                elif request_type == RequestType.SEND_DATA:
-                    self.__send_data_from_device_by_strategy(device, data)
             sleep(.001)
 
-    def __send_data_from_device_by_strategy(self, device, data):
-        self.__gateway.send_to_storage(self.get_name(), self.get_id(), data)
-        self.statistics[STATISTIC_MESSAGE_SENT_PARAMETER] += 1
-
-
     def __poll_device(self, device):
         device_connected = device.last_connect_time != 0 and monotonic() - device.last_connect_time < 10
-        device_disconnected = False
+        device_failed = False
 
         self.__log.debug("Checking %s", device)
         if device.config.get(TYPE_PARAMETER).lower() == 'serial':
@@ -384,36 +326,16 @@ class ModbusConnector(Connector, Thread):
             for config_section in device_responses:
                 if device.config.get(config_section) is not None and len(device.config.get(config_section)):
                     current_device_config = device.config
-                    connected_to_current_master = self.__connect_to_current_master(device)
-                    if connected_to_current_master:
-                        is_socket_open = device.config['master'].is_socket_open()
-                        if not device_connected and is_socket_open:
-                            device_connected = True
-                            device.last_connect_time = monotonic()
-                            self.__gateway.add_device(device.device_name, {CONNECTOR_PARAMETER: self},
-                                                      device_type=device.config.get(DEVICE_TYPE_PARAMETER))
-                        elif not is_socket_open:
-                            device.last_connect_time = 0
-                            device_disconnected = True
-                    else:
-                        if not device_disconnected:
-                            device.last_connect_time = 0
-                            device_disconnected = True
-                            self.__gateway.del_device(device.device_name)
-                        continue
-
-                    if (not device.config['master'].is_socket_open()
-                            or not len(current_device_config[config_section])):
-                        if not device.config['master'].is_socket_open():
-                            error = 'Socket is closed, connection is lost, for device %s with config %s' % (
-                                device.device_name, current_device_config)
-                        else:
-                            error = 'Config is invalid or empty for device %s, config %s' % (
-                                device.device_name, current_device_config)
-                        self.__log.error(error)
-                        self.__log.debug("Device %s is not connected, data will not be processed",
-                                         device.device_name)
-                        continue
+                    if not self.__connect_to_current_master(device):
+                        self.__log.error('Socket is closed, connection is lost, for device %s', device.device_name)
+                        device_failed = True
+                        break
+
+                    if not device_connected:
+                        device_connected = True
+                        device.last_connect_time = monotonic()
+                        self.__gateway.add_device(device.device_name, {CONNECTOR_PARAMETER: self},
+                                                  device_type=device.config.get(DEVICE_TYPE_PARAMETER))
 
                     # Reading data from device
                     for interested_data in range(len(current_device_config[config_section])):
@@ -421,13 +343,19 @@ class ModbusConnector(Connector, Thread):
                         current_data[DEVICE_NAME_PARAMETER] = device.device_name
                         input_data = self.__function_to_device(device, current_data)
 
-                        # due to issue #1056
-                        if isinstance(input_data, ModbusIOException) or isinstance(input_data, ExceptionResponse):
-                            device.config.pop('master', None)
-                            self.__gateway.del_device(device.device_name)
-                            self.__connect_to_current_master(device)
+                        # Device doesn't respond, the rest of tags will be read on the next allowed poll
+                        if isinstance(input_data, ModbusIOException):
+                            device_failed = True
                             break
 
+                        # Device responded with an error for the tag, skipping only this tag
+                        if isinstance(input_data, ExceptionResponse):
+                            continue
+
+                        # RPC requests are not waiting for the end of the poll cycle
+                        if not self.__rpc_lane.is_empty():
+                            self.__process_rpc_requests()
+
                         device_responses[config_section][current_data[TAG_PARAMETER]] = {
                             "data_sent": current_data,
                             "input_data": input_data
@@ -436,6 +364,9 @@ class ModbusConnector(Connector, Thread):
                     self.__log.debug("Checking %s for device %s", config_section, device)
                     self.__log.debug('Device response: ', device_responses)
 
+                    if device_failed:
+                        break
+
             if device_responses.get('timeseries') or device_responses.get('attributes'):
                 self._convert_msg_queue.put((self.__convert_data, (device, current_device_config, {
                     **current_device_config,
@@ -444,69 +375,54 @@ class ModbusConnector(Connector, Thread):
                 }, device_responses)))
 
         except ConnectionException:
-            self.__gateway.del_device(device.device_name)
-            sleep(5)
-            self.__log.error("Connection lost! Reconnecting...")
+            device_failed = True
+            self.__log.error("Connection lost for device %s!", device.device_name)
         except Exception as e:
-            self.__gateway.del_device(device.device_name)
+            device_failed = True
             self.__log.exception(e)
         finally:
             # Release mutex if "serial" type only
             if device.config.get(TYPE_PARAMETER) == 'serial':
                 self.lock.release()
 
-    def __connect_to_current_master(self, device: Slave=None):
-        connect_attempt_count = 5
-        connect_attempt_time_ms = 100
-        wait_after_failed_attempts_ms = 300000
-
-        force_update_master = device.config['connection_attempt'] > 0
-        if device.config.get('master') is None or force_update_master:
-            device.config['master'], device.config['available_functions'] = self.__get_or_create_connection(device.config, force_update_master)
-
-        if connect_attempt_count < 1:
-            connect_attempt_count = 1
-
-        connect_attempt_time_ms = device.config.get('connectAttemptTimeMs', connect_attempt_time_ms)
-
-        if connect_attempt_time_ms < 500:
-            connect_attempt_time_ms = 500
-
-        wait_after_failed_attempts_ms = device.config.get('waitAfterFailedAttemptsMs', wait_after_failed_attempts_ms)
-
-        if wait_after_failed_attempts_ms < 1000:
-            wait_after_failed_attempts_ms = 1000
+            self.__update_device_health(device, device_failed)
 
-        current_time = time() * 1000
-
-        if not device.config['master'].is_socket_open():
-            if (device.config['connection_attempt'] >= connect_attempt_count
-                    and current_time - device.config['last_connection_attempt_time'] >= wait_after_failed_attempts_ms):
-                device.config['connection_attempt'] = 0
-
-            while not device.config['master'].is_socket_open() \
-                    and device.config['connection_attempt'] < connect_attempt_count \
-                    and current_time - device.config.get('last_connection_attempt_time', 0) >= connect_attempt_time_ms:
-                if self.__stopped:
-                    return False
-                device.config['connection_attempt'] = device.config['connection_attempt'] + 1
-                device.config['last_connection_attempt_time'] = current_time
-                self.__log.debug("Modbus trying connect to %s", device)
-                device.config['master'].connect()
+    def __update_device_health(self, device, device_failed):
+        if not device_failed:
+            if device.health.record_success():
+                self.__log.info("Device %s is available again, polling resumed", device.device_name)
+            return
 
-                if device.config['connection_attempt'] == connect_attempt_count:
-                    self.__log.warn("Maximum attempt count (%i) for device \"%s\" - encountered.",
-                                    connect_attempt_count,
-                                    device)
-                    return False
+        if device.health.record_failure():
+            self.__log.warning("Device %s is not responding, polling is paused for %.1f seconds",
+                               device.device_name, device.health.backoff)
+            device.last_connect_time = 0
+            self.__gateway.del_device(device.device_name)
 
-        if device.config['connection_attempt'] >= 0 and device.config['master'].is_socket_open():
-            device.config['connection_attempt'] = 0
-            device.config['last_connection_attempt_time'] = current_time
+            # Connection is closed only if other devices do not use it, they may be still available
+            master = device.config.get('master')
+            if master is not None and not any(slave is not device and slave.config.get('master') is master
+                                              for slave in self.__slaves):
+                master.close()
+        elif not device.health.is_available():
+            self.__log.debug("Device %s is still not responding, next attempt in %.1f seconds",
+                             device.device_name, device.health.backoff)
+
+    def __connect_to_current_master(self, device: Slave = None):
+        if device.config.get('master') is None:
+            device.config['master'], device.config['available_functions'] = self.__get_or_create_connection(
+                device.config)
+
+        if device.config['master'].is_socket_open():
             return True
-        else:
+
+        if self.__stopped:
             return False
 
+        self.__log.debug("Modbus trying connect to %s", device)
+        device.config['master'].connect()
+        return device.config['master'].is_socket_open()
+
     @staticmethod
     def __configure_master(config):
         current_config = config
@@ -621,11 +537,6 @@ class ModbusConnector(Connector, Thread):
             self.__log.error("Reading failed for device %s function code %s address %s unit id %s",
                              device.device_name, function_code, config[ADDRESS_PARAMETER], device.config['unitId'])
             self.__log.exception("Reading failed with exception:", exc_info=result)
-            self.__log.debug("Trying to reconnect to device %s", device.device_name)
-            if device.config.get('master') is not None and device.config['master'].is_socket_open():
-                device.config['master'].close()
-                device.config['master'], device.config['available_functions'] = self.__get_or_create_connection(device.config, force=True)
-            self.__connect_to_current_master(device)
 
         self.__log.debug("Sending request to device with unit id: %s, on address: %s, function code: %r using "
                          "connection: %r",
@@ -640,6 +551,10 @@ class ModbusConnector(Connector, Thread):
         try:
             device = ModbusConnector.__get_device_by_name(content[DEVICE_SECTION_PARAMETER], self.__slaves)
 
+            if self.__is_server_device(device):
+                self.__write_attributes_to_server(device, content)
+                return
+
             for attribute_updates_command_config in device.config['attributeUpdates']:
                 for attribute_updated in content[DATA_PARAMETER]:
                     if attribute_updates_command_config[TAG_PARAMETER] == attribute_updated:
@@ -657,6 +572,18 @@ class ModbusConnector(Connector, Thread):
         except Exception as e:
             self.__log.exception(e)
 
+    def __is_server_device(self, device):
+        return self.__server is not None and device.device_name == self.__server.device_name
+
+    def __write_attributes_to_server(self, device, content):
+        items = [(attribute_updates_command_config, content[DATA_PARAMETER][attribute_updates_command_config[TAG_PARAMETER]])
+                 for attribute_updates_command_config in device.config['attributeUpdates']
+                 if attribute_updates_command_config[TAG_PARAMETER] in content[DATA_PARAMETER]]
+
+        for attribute_updates_command_config in self.__server.write(items):
+            self.__log.error("Failed to write attribute %s to the Modbus server %s",
+                             attribute_updates_command_config[TAG_PARAMETER], self.__server.device_name)
+
     def server_side_rpc_handler(self, server_rpc_request):
         try:
             if server_rpc_request.get('data') is None:
@@ -681,8 +608,11 @@ class ModbusConnector(Connector, Thread):
                 device = ModbusConnector.__get_device_by_name(server_rpc_request[DEVICE_SECTION_PARAMETER],
                                                               self.__slaves)
 
+                if rpc_method == UPDATE_SERVER_VALUES_RPC_METHOD and self.__is_server_device(device):
+                    updated = self.update_server_values(server_rpc_request['data']['params'])
+                    self.__send_rpc_response(server_rpc_request, {"success": updated > 0, "updated": updated}, False)
                 # check if RPC method is reserved get/set
-                if rpc_method == 'get' or rpc_method == 'set':
+                elif rpc_method == 'get' or rpc_method == 'set':
                     params = {}
                     for param in server_rpc_request['data']['params'].split(';'):
                         try:
@@ -732,7 +662,11 @@ class ModbusConnector(Connector, Thread):
             rpc_command_config[UNIT_ID_PARAMETER] = device.config['unitId']
             rpc_command_config[BYTE_ORDER_PARAMETER] = device.config.get("byteOrder", "LITTLE")
             rpc_command_config[WORD_ORDER_PARAMETER] = device.config.get("wordOrder", "LITTLE")
-            self.__connect_to_current_master(device)
+
+            if (self.__is_server_device(device)
+                    and not self.__server.write([(rpc_command_config, content[DATA_PARAMETER].get(RPC_PARAMS_PARAMETER))])):
+                # Write requests to the gateway Modbus server are applied to its datablocks directly
+                return self.__send_rpc_response(content, {"success": True}, return_result)
 
             if rpc_command_config.get(FUNCTION_CODE_PARAMETER) in (5, 6):
                 converted_data = device.config[DOWNLINK_PREFIX + CONVERTER_PARAMETER].convert(rpc_command_config,
@@ -746,70 +680,110 @@ class ModbusConnector(Connector, Thread):
                                                                                               content)
                 rpc_command_config[PAYLOAD_PARAMETER] = converted_data
 
+            # Request is executed by the polling thread, the config is copied because the same command
+            # can be queued again before the previous one is written
+            request = RpcRequest(device, content, {**rpc_command_config}, request_type,
+                                 callback=None if return_result else self.__on_rpc_request_done)
+            self.__rpc_lane.submit(request)
+
+            if return_result:
+                if not request.wait(TIMEOUT):
+                    return self.__send_rpc_response(content, TimeoutError("Modbus request timeout"), return_result)
+                return self.__send_rpc_response(content, self.__process_rpc_response(request), return_result)
+
+    def __process_rpc_requests(self):
+        for batch in self.__rpc_lane.get_batches():
+            device = batch[0].device
+            config = self.__rpc_lane.get_batch_config(batch)
+            if len(batch) > 1:
+                self.__log.debug("Merged %d write requests to device %s into one request with function code %d",
+                                 len(batch), device.device_name, config[FUNCTION_CODE_PARAMETER])
+
             try:
-                response = self.__function_to_device(device, rpc_command_config)
+                if self.__connect_to_current_master(device):
+                    response = self.__function_to_device(device, config)
+                else:
+                    response = ConnectionException("Failed to connect to device %s" % device.device_name)
             except Exception as e:
                 self.__log.exception(e)
                 response = e
 
-            if isinstance(response, (ReadRegistersResponseBase, ReadBitsResponseBase)):
-                to_converter = {
-                    RPC_SECTION: {
-                        content[DATA_PARAMETER][RPC_METHOD_PARAMETER]: {
-                            "data_sent": rpc_command_config,
-                            "input_data": response
-                        }
+            self.__rpc_lane.complete(batch, response)
+
+        self.statistics.update(self.__rpc_lane.get_statistics())
+
+    def __on_rpc_request_done(self, request: RpcRequest):
+        try:
+            self.__send_rpc_response(request.content, self.__process_rpc_response(request), False)
+        except Exception as e:
+            self.__log.exception(e)
+
+    def __process_rpc_response(self, request: RpcRequest):
+        response = request.response
+        content = request.content
+        device = request.device
+
+        if isinstance(response, (ReadRegistersResponseBase, ReadBitsResponseBase)):
+            to_converter = {
+                RPC_SECTION: {
+                    content[DATA_PARAMETER][RPC_METHOD_PARAMETER]: {
+                        "data_sent": request.config,
+                        "input_data": response
                     }
                 }
-                response = device.config[
-                    UPLINK_PREFIX + CONVERTER_PARAMETER].convert(
-                    config={**device.config,
-                            BYTE_ORDER_PARAMETER: device.byte_order,
-                            WORD_ORDER_PARAMETER: device.word_order
-                            },
-                    data=to_converter)
-                self.__log.debug("Received %s method: %s, result: %r", request_type,
-                                 content[DATA_PARAMETER][RPC_METHOD_PARAMETER],
-                                 response)
-            elif isinstance(response, (WriteMultipleRegistersResponse,
-                                       WriteMultipleCoilsResponse,
-                                       WriteSingleCoilResponse,
-                                       WriteSingleRegisterResponse)):
-                self.__log.debug("Write %r", str(response))
-                response = {"success": True}
-
-            if content.get(RPC_ID_PARAMETER) or (content.get(DATA_PARAMETER) is not None
-                    and content[DATA_PARAMETER].get(RPC_ID_PARAMETER)) is not None:
-                if isinstance(response, Exception) or isinstance(response, ExceptionResponse):
-                    if not return_result:
-                        self.__gateway.send_rpc_reply(device=content[DEVICE_SECTION_PARAMETER],
-                                                      req_id=content[DATA_PARAMETER].get(RPC_ID_PARAMETER),
-                                                      content={
-                                                          content[DATA_PARAMETER][RPC_METHOD_PARAMETER]: str(response)
-                                                      },
-                                                      success_sent=False)
-                    else:
-                        return {
-                            'device': content[DEVICE_SECTION_PARAMETER],
-                            'req_id': content[DATA_PARAMETER].get(RPC_ID_PARAMETER),
-                            'content': {
-                                content[DATA_PARAMETER][RPC_METHOD_PARAMETER]: str(response)
-                            },
-                            'success_sent': False
-                        }
+            }
+            response = device.config[
+                UPLINK_PREFIX + CONVERTER_PARAMETER].convert(
+                config={**device.config,
+                        BYTE_ORDER_PARAMETER: device.byte_order,
+                        WORD_ORDER_PARAMETER: device.word_order
+                        },
+                data=to_converter)
+            self.__log.debug("Received %s method: %s, result: %r", request.request_type,
+                             content[DATA_PARAMETER][RPC_METHOD_PARAMETER],
+                             response)
+        elif isinstance(response, (WriteMultipleRegistersResponse,
+                                   WriteMultipleCoilsResponse,
+                                   WriteSingleCoilResponse,
+                                   WriteSingleRegisterResponse)):
+            self.__log.debug("Write %r", str(response))
+            response = {"success": True}
+
+        return response
+
+    def __send_rpc_response(self, content, response, return_result):
+        self.__log.debug("%r", response)
+
+        if content.get(RPC_ID_PARAMETER) or (content.get(DATA_PARAMETER) is not None
+                and content[DATA_PARAMETER].get(RPC_ID_PARAMETER)) is not None:
+            if isinstance(response, Exception) or isinstance(response, ExceptionResponse):
+                if not return_result:
+                    self.__gateway.send_rpc_reply(device=content[DEVICE_SECTION_PARAMETER],
+                                                  req_id=content[DATA_PARAMETER].get(RPC_ID_PARAMETER),
+                                                  content={
+                                                      content[DATA_PARAMETER][RPC_METHOD_PARAMETER]: str(response)
+                                                  },
+                                                  success_sent=False)
                 else:
-                    if not return_result:
-                        self.__gateway.send_rpc_reply(device=content[DEVICE_SECTION_PARAMETER],
-                                                      req_id=content[DATA_PARAMETER].get(RPC_ID_PARAMETER),
-                                                      content=response)
-                    else:
-                        return {
-                            'device': content[DEVICE_SECTION_PARAMETER],
-                            'req_id': content[DATA_PARAMETER].get(RPC_ID_PARAMETER),
-                            'content': response
-                        }
-
-            self.__log.debug("%r", response)
+                    return {
+                        'device': content[DEVICE_SECTION_PARAMETER],
+                        'req_id': content[DATA_PARAMETER].get(RPC_ID_PARAMETER),
+                        'content': {
+                            content[DATA_PARAMETER][RPC_METHOD_PARAMETER]: str(response)
+                        },
+                        'success_sent': False
+                    }
+            else:
+                if not return_result:
+                    self.__gateway.send_rpc_reply(device=content[DEVICE_SECTION_PARAMETER],
+                                                  req_id=content[DATA_PARAMETER].get(RPC_ID_PARAMETER),
+                                                  content=response)
+                else:
+                    return {
+                        'device': content[DEVICE_SECTION_PARAMETER],
+                        'req_id': content[DATA_PARAMETER].get(RPC_ID_PARAMETER),
+                        'content': response
+                    }
 
     @staticmethod
     def __get_device_by_name(device_name, devices):
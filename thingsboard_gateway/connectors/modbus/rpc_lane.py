@@ -0,0 +1,156 @@
+#     Copyright 2024. ThingsBoard
+#
+#     Licensed under the Apache License, Version 2.0 (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+
+from collections import deque
+from queue import SimpleQueue, Empty
+from threading import Event, Lock
+from time import monotonic
+
+from thingsboard_gateway.connectors.modbus.constants import *
+
+
+class RpcRequest:
+    """RPC or attribute update request to a Modbus device, that is waiting in the RPC lane."""
+
+    __slots__ = ('device', 'content', 'config', 'request_type', 'callback', 'created', 'response', 'done')
+
+    def __init__(self, device, content, config, request_type='RPC', callback=None):
+        self.device = device
+        self.content = content
+        self.config = config
+        self.request_type = request_type
+        self.callback = callback
+        self.created = monotonic()
+        self.response = None
+        self.done = Event()
+
+    @property
+    def register_type(self):
+        return WRITE_FUNCTION_CODE_REGISTER_TYPE.get(self.config.get(FUNCTION_CODE_PARAMETER))
+
+    @property
+    def address(self):
+        return self.config[ADDRESS_PARAMETER]
+
+    @property
+    def values(self):
+        payload = self.config.get(PAYLOAD_PARAMETER)
+        return list(payload) if isinstance(payload, (list, tuple)) else [payload]
+
+    def wait(self, timeout=None):
+        return self.done.wait(timeout)
+
+
+class RpcLane:
+    """
+    Prioritized lane for RPC and attribute update requests.
+    The polling thread drains it before every poll and between tag reads, so operator commands
+    do not wait for the whole poll cycle. Consecutive writes of the same device to contiguous addresses
+    are merged into one Write Multiple Coils (FC15) or Write Multiple Registers (FC16) request.
+    """
+
+    def __init__(self, latency_window=RPC_LATENCY_WINDOW):
+        self.__requests = SimpleQueue()
+        self.__lock = Lock()
+        self.__latencies = deque(maxlen=latency_window)
+        self.__requests_count = 0
+        self.__batches_count = 0
+        self.__merged_requests_count = 0
+        self.__max_latency = 0.0
+
+    def submit(self, request: RpcRequest):
+        self.__requests.put(request)
+
+    def is_empty(self):
+        return self.__requests.empty()
+
+    def get_batches(self):
+        """Takes all pending requests and returns them as a list of batches, every batch is one Modbus request."""
+        batches = []
+        while True:
+            try:
+                request = self.__requests.get_nowait()
+            except Empty:
+                break
+
+            if batches and self.__can_be_merged(batches[-1], request):
+                batches[-1].append(request)
+            else:
+                batches.append([request])
+
+        return batches
+
+    @staticmethod
+    def __can_be_merged(batch, request: RpcRequest):
+        register_type = request.register_type
+        if register_type is None:
+            return False
+
+        last_request = batch[-1]
+        if last_request.device is not request.device or last_request.register_type != register_type:
+            return False
+
+        last_values_count = len(last_request.values)
+        if last_request.address + last_values_count != request.address:
+            return False
+
+        return sum(len(batch_request.values) for batch_request in batch) + len(request.values) \
+            <= MAX_WRITE_OBJECTS_COUNT[register_type]
+
+    @staticmethod
+    def get_batch_config(batch):
+        """Returns configuration of the Modbus request for the batch."""
+        if len(batch) == 1:
+            return batch[0].config
+
+        return {**batch[0].config,
+                FUNCTION_CODE_PARAMETER: WRITE_MULTIPLE_FUNCTION_CODE[batch[0].register_type],
+                OBJECTS_COUNT_PARAMETER: sum(len(request.values) for request in batch),
+                PAYLOAD_PARAMETER: [value for request in batch for value in request.values]}
+
+    def complete(self, batch, response):
+        completed = monotonic()
+        with self.__lock:
+            self.__batches_count += 1
+            self.__requests_count += len(batch)
+            if len(batch) > 1:
+                self.__merged_requests_count += len(batch)
+            for request in batch:
+                latency = completed - request.created
+                self.__latencies.append(latency)
+                self.__max_latency = max(self.__max_latency, latency)
+
+        for request in batch:
+            request.response = response
+            request.done.set()
+            if request.callback is not None:
+                request.callback(request)
+
+    def get_statistics(self):
+        with self.__lock:
+            latencies = sorted(self.__latencies)
+            statistics = {
+                'rpcRequests': self.__requests_count,
+                'rpcModbusRequests': self.__batches_count,
+                'rpcMergedRequests': self.__merged_requests_count,
+                'rpcLatencyMaxMs': self.__max_latency * 1000
+            }
+
+        if latencies:
+            statistics['rpcLatencyAvgMs'] = sum(latencies) / len(latencies) * 1000
+            statistics['rpcLatencyP95Ms'] = latencies[min(len(latencies) - 1, int(len(latencies) * .95))] * 1000
+        else:
+            statistics['rpcLatencyAvgMs'] = statistics['rpcLatencyP95Ms'] = 0.0
+
+        return statistics
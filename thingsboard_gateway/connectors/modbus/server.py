@@ -0,0 +1,268 @@
+#     Copyright 2024. ThingsBoard
+#
+#     Licensed under the Apache License, Version 2.0 (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+
+import asyncio
+from array import array
+from concurrent.futures import CancelledError
+from threading import Lock
+
+from pymodbus.datastore import ModbusSlaveContext, ModbusServerContext
+from pymodbus.datastore.store import BaseModbusDataBlock
+from pymodbus.device import ModbusDeviceIdentification
+from pymodbus.framer.ascii_framer import ModbusAsciiFramer
+from pymodbus.framer.rtu_framer import ModbusRtuFramer
+from pymodbus.framer.socket_framer import ModbusSocketFramer
+from pymodbus.server import StartAsyncTcpServer, StartAsyncTlsServer, StartAsyncUdpServer, StartAsyncSerialServer
+from pymodbus.version import version
+
+from thingsboard_gateway.connectors.modbus.constants import *
+from thingsboard_gateway.connectors.modbus.bytes_modbus_downlink_converter import BytesModbusDownlinkConverter
+from thingsboard_gateway.gateway.async_runtime import AsyncRuntime
+
+FRAMER_TYPE = {
+    'rtu': ModbusRtuFramer,
+    'socket': ModbusSocketFramer,
+    'ascii': ModbusAsciiFramer
+}
+SERVER_TYPE = {
+    'tcp': StartAsyncTcpServer,
+    'tls': StartAsyncTlsServer,
+    'udp': StartAsyncUdpServer,
+    'serial': StartAsyncSerialServer
+}
+FUNCTION_TYPE = {
+    COILS_INITIALIZER: 'co',
+    HOLDING_REGISTERS: 'hr',
+    INPUT_REGISTERS: 'ir',
+    DISCRETE_INPUTS: 'di'
+}
+FUNCTION_CODE_SLAVE_INITIALIZATION = {
+    HOLDING_REGISTERS: (6, 16),
+    COILS_INITIALIZER: (5, 15),
+    INPUT_REGISTERS: (6, 16),
+    DISCRETE_INPUTS: (5, 15)
+}
+BIT_REGISTER_TYPES = (COILS_INITIALIZER, DISCRETE_INPUTS)
+
+
+class ContiguousDataBlock(BaseModbusDataBlock):
+    """
+    Datablock backed by a single typed array covering the whole address space.
+    Reads are plain slice copies, so a request for thousands of registers does not touch the writers lock.
+    """
+
+    def __init__(self, bits=False, size=DATABLOCK_SIZE):
+        self.address = 0
+        self.default_value = 0
+        self.values = array('B' if bits else 'H', [0]) * size
+        self.__bits = bits
+        self.__lock = Lock()
+
+    def validate(self, address, count=1):
+        return 0 <= address and address + count <= len(self.values)
+
+    def getValues(self, address, count=1):
+        return self.values[address:address + count].tolist()
+
+    def setValues(self, address, values):
+        if not isinstance(values, (list, tuple)):
+            values = [values]
+
+        with self.__lock:
+            self.values[address:address + len(values)] = self.__to_array(values)
+
+    def set_bulk(self, updates):
+        """Apply several (address, values) updates at once, holding the writers lock only one time."""
+        with self.__lock:
+            for (address, values) in updates:
+                self.values[address:address + len(values)] = self.__to_array(values)
+
+    def reset(self):
+        with self.__lock:
+            self.values = array(self.values.typecode, [0]) * len(self.values)
+
+    def __to_array(self, values):
+        if self.__bits:
+            return array('B', [1 if value else 0 for value in values])
+
+        return array('H', [int(value) & 0xFFFF for value in values])
+
+
+class Server:
+    def __init__(self, config, logger):
+        self.name = 'Gateway modbus slave'
+        self._log = logger
+
+        self.__config = config
+        self.device_name = config.get('deviceName', 'Modbus Slave')
+        self.__converter = BytesModbusDownlinkConverter({}, self._log)
+        self.__blocks = {register_type: ContiguousDataBlock(bits=register_type in BIT_REGISTER_TYPES)
+                         for register_type in FUNCTION_TYPE}
+
+        self.__runtime = None
+        self.__main_task = None
+        self.__serve_task = None
+        self.__server = None
+        self.__stopped = False
+
+        self.__init_values(config.get('values', {}))
+
+    def __init_values(self, values):
+        initialized = self.update_values(values)
+        if not initialized:
+            self._log.info("%s - will be initialized without values", self.device_name)
+
+    def start(self):
+        self.__runtime = AsyncRuntime.get_instance()
+        self.__main_task = self.__runtime.submit(self.__run())
+
+    async def __run(self):
+        self.__serve_task = asyncio.ensure_future(self.__serve())
+        try:
+            await self.__serve_task
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            self._log.exception("Modbus server %s stopped with error: %s", self.device_name, e)
+        finally:
+            if self.__server is not None and hasattr(self.__server, 'shutdown'):
+                await self.__server.shutdown()
+
+    async def __serve(self):
+        config = self.__config
+        context = ModbusServerContext(slaves=ModbusSlaveContext(**{FUNCTION_TYPE[register_type]: block
+                                                                   for (register_type, block) in self.__blocks.items()}),
+                                      single=True)
+        self.__server = await SERVER_TYPE[config['type']](context=context, identity=self.__get_identity(),
+                                                          address=(config.get('host'), config.get('port')) if (
+                                                                  config['type'] != 'serial') else None,
+                                                          port=config.get('port') if config['type'] == 'serial' else None,
+                                                          framer=FRAMER_TYPE[config['method']], defer_start=True,
+                                                          **config.get('security', {}))
+        if config['type'] == 'serial':
+            await self.__server.start()
+
+        self._log.info("Modbus server %s started on %s:%s", self.device_name, config.get('host'), config.get('port'))
+        await self.__server.serve_forever()
+
+    def __get_identity(self):
+        if not self.__config.get('identity'):
+            return None
+
+        identity = ModbusDeviceIdentification()
+        identity.VendorName = self.__config['identity'].get('vendorName', '')
+        identity.ProductCode = self.__config['identity'].get('productCode', '')
+        identity.VendorUrl = self.__config['identity'].get('vendorUrl', '')
+        identity.ProductName = self.__config['identity'].get('productName', '')
+        identity.ModelName = self.__config['identity'].get('ModelName', '')
+        identity.MajorMinorRevision = version.short()
+        return identity
+
+    def stop(self):
+        self.__stopped = True
+        if self.__main_task is None:
+            return
+
+        # Only the task of the server is cancelled, other connectors use the same event loop
+        if self.__serve_task is not None:
+            self.__runtime.call_soon(self.__serve_task.cancel)
+        else:
+            self.__main_task.cancel()
+        try:
+            self.__main_task.result(TIMEOUT)
+        except CancelledError:
+            pass
+        except Exception as e:
+            self._log.error("Failed to stop Modbus server %s: %s", self.device_name, e)
+
+    def is_stopped(self):
+        return self.__stopped
+
+    def update_values(self, values):
+        """
+        Bulk update of the server datablocks.
+        Values should have the same structure as "values" section of the slave configuration:
+        {"holding_registers": [{"address": 1, "type": "16int", "objectsCount": 1, "value": 12}, ...], ...}
+        Returns the number of updated items.
+        """
+        updated = 0
+        for (register_type, register_values) in values.items():
+            if register_type not in self.__blocks:
+                self._log.error("Unknown register type %s, skipping...", register_type)
+                continue
+
+            if isinstance(register_values, dict):
+                register_values = [item for section in register_values.values() for item in section]
+
+            updates = []
+            for item in register_values:
+                function_code = FUNCTION_CODE_SLAVE_INITIALIZATION[register_type][0] \
+                    if item.get(OBJECTS_COUNT_PARAMETER, 1) <= 1 else FUNCTION_CODE_SLAVE_INITIALIZATION[register_type][1]
+                converted_value = self.convert_value(item, function_code, item.get('value'))
+                if converted_value is None:
+                    self._log.error("Failed to convert value %s with type %s, skipping...",
+                                    item.get('value'), item.get(TYPE_PARAMETER))
+                    continue
+
+                updates.append((item[ADDRESS_PARAMETER] + 1, converted_value))
+
+            if updates:
+                self.__blocks[register_type].set_bulk(updates)
+                updated += len(updates)
+
+        return updated
+
+    def write(self, items):
+        """
+        Write values from attribute updates or RPC directly to the datablocks, without going through a Modbus client.
+        Items is a list of (item_config, value) pairs, every datablock is updated in one step.
+        Returns the list of item configs that were not written (not a write function code or conversion failed).
+        """
+        updates = {}
+        not_written = []
+        for (item, value) in items:
+            register_type = WRITE_FUNCTION_CODE_REGISTER_TYPE.get(item.get(FUNCTION_CODE_PARAMETER))
+            converted_value = None
+            if register_type is not None:
+                converted_value = self.convert_value(item, item[FUNCTION_CODE_PARAMETER], value)
+
+            if converted_value is None:
+                not_written.append(item)
+                continue
+
+            updates.setdefault(register_type, []).append((item[ADDRESS_PARAMETER] + 1, converted_value))
+
+        for (register_type, register_updates) in updates.items():
+            self.__blocks[register_type].set_bulk(register_updates)
+
+        return not_written
+
+    def convert_value(self, item, function_code, value):
+        converted_value = self.__converter.convert(
+            {**item,
+             'device': self.device_name, FUNCTION_CODE_PARAMETER: function_code,
+             BYTE_ORDER_PARAMETER: self.__config.get(BYTE_ORDER_PARAMETER, 'LITTLE'),
+             WORD_ORDER_PARAMETER: self.__config.get(WORD_ORDER_PARAMETER, 'LITTLE')},
+            {'data': {'params': value}})
+
+        if converted_value is None or isinstance(converted_value, str):
+            return None
+        if isinstance(converted_value, (bytes, bytearray)):
+            return list(converted_value)
+        if isinstance(converted_value, (list, tuple)):
+            return list(converted_value)
+        return [converted_value]
+
+    def get_values(self, register_type, address, count=1):
+        return self.__blocks[register_type].getValues(address + 1, count)
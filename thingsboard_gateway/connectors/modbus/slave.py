@@ -20,6 +20,8 @@ from pymodbus.constants import Defaults
 from thingsboard_gateway.connectors.modbus.constants import *
 from thingsboard_gateway.connectors.modbus.bytes_modbus_uplink_converter import BytesModbusUplinkConverter
 from thingsboard_gateway.connectors.modbus.bytes_modbus_downlink_converter import BytesModbusDownlinkConverter
+from thingsboard_gateway.connectors.modbus.device_health import DeviceHealth
+from thingsboard_gateway.gateway.report_strategy_processor import get_report_strategy_from_config
 from thingsboard_gateway.tb_utility.tb_loader import TBModuleLoader
 
 
@@ -50,10 +52,9 @@ class Slave(Thread):
             'parity': kwargs.get('parity', Defaults.Parity),
             'strict': kwargs.get('strict', True),
             'retries': kwargs.get('retries', 3),
-            'connection_attempt': 0,
-            'last_connection_attempt_time': 0,
-            'waitAfterFailedAttemptsMs': kwargs.get('waitAfterFailedAttemptsMs', 0),
-            'connectAttemptTimeMs': kwargs.get('connectAttemptTimeMs', 0),
+            'connectAttemptCount': kwargs.get('connectAttemptCount', DEFAULT_CONNECT_ATTEMPT_COUNT),
+            'waitAfterFailedAttemptsMs': kwargs.get('waitAfterFailedAttemptsMs', DEFAULT_WAIT_AFTER_FAILED_ATTEMPTS_MS),
+            'connectAttemptTimeMs': kwargs.get('connectAttemptTimeMs', MIN_CONNECT_ATTEMPT_TIME_MS),
             'retry_on_empty': kwargs.get('retryOnEmpty', False),
             'retry_on_invalid': kwargs.get('retryOnInvalid', False),
             'method': kwargs.get('method', 'rtu'),
@@ -64,37 +65,24 @@ class Slave(Thread):
             'rpc': kwargs.get('rpc', [])
         }
 
-        self.__basic_device_report_strategy_config = (
-            self.__get_report_strategy_from_config(kwargs, kwargs.get(REPORT_STRATEGY_PARAMETER, {})))
+        self.__basic_device_report_strategy_config = get_report_strategy_from_config(
+            kwargs, kwargs.get(REPORT_STRATEGY_PARAMETER, {}), self.poll_period, self._log)
 
         self.__load_converters(kwargs['connector'])
 
+        # Circuit breaker, polls are skipped while the device is known to be unavailable
+        self.health = DeviceHealth(
+            failure_threshold=self.config[CONNECT_ATTEMPT_COUNT_PARAMETER],
+            initial_backoff=max(self.config[CONNECT_ATTEMPT_TIME_MS_PARAMETER], MIN_CONNECT_ATTEMPT_TIME_MS) / 1000,
+            max_backoff=self.config[WAIT_AFTER_FAILED_ATTEMPTS_MS_PARAMETER] / 1000)
+
         self.callback = kwargs['callback']
 
         self.__last_polled_time = None
-        self.__last_checked_time = monotonic()
         self.daemon = True
         self.stop = False
-        # Cache for devices data for report strategy
-        # Two possible for keys options, depending on type of slave:
-        # 1. For tcp, tls, udp slaves:
-        # (host, port, unit_id, datatype, function_code, address, bit - Optional, byteOrder - Optional, wordOrder - Optional)
-        # 2. For serial slaves:
-        # (port, unit_id, datatype, function_code, address, bit - Optional, byteOrder - Optional, wordOrder - Optional)
-        # Value
-        # {last_telemetry:{key: {strategy, reportPeriodMs(Depends on strategy), next_send_monotonic_ms, previous_value, values_for_calculation(In next release), processing_function(In next release)}},
-        # last_attributes:{...}}
-
-        self.cached_data = {
-            LAST_PREFIX + TELEMETRY_PARAMETER: {},
-            LAST_PREFIX + ATTRIBUTES_PARAMETER: {}
-        }
-
-        # Data to send periodically, key is monotonic of time when data should be sent
 
-        self.__data_to_send_periodically = {}
-
-        self.__init_cache_for_data()
+        self.__register_keys_for_report_strategy(kwargs['report_strategy_processor'])
 
         self.name = "Modbus slave processor for unit " + str(self.config['unitId']) + " on host " + str(
             self.config['host']) + ":" + str(self.config['port'])
@@ -109,11 +97,9 @@ class Slave(Thread):
             try:
                 current_monotonic = monotonic()
                 if current_monotonic - self.__last_polled_time >= self.poll_period:
-                    self.callback(self, RequestType.POLL)
+                    if self.health.allow_request(current_monotonic):
+                        self.callback(self, RequestType.POLL)
                     self.__last_polled_time = current_monotonic
-                if current_monotonic - self.__last_checked_time >= 1.0:
-                    self.__check_data_to_send_periodically(current_monotonic)
-                    self.__last_checked_time = current_monotonic
             except Exception as e:
                 self._log.exception("Error in slave timer: %s", e)
 
@@ -128,83 +114,16 @@ class Slave(Thread):
     def get_name(self):
         return self.device_name
 
-    def __check_data_to_send_periodically(self, current_monotonic):
-        telemetry_data_to_send = []
-        attributes_data_to_send = []
-
-        self.__check_data_to_send_periodically_entry(TELEMETRY_PARAMETER, telemetry_data_to_send, current_monotonic)
-        self.__check_data_to_send_periodically_entry(ATTRIBUTES_PARAMETER, attributes_data_to_send, current_monotonic)
-
-        if telemetry_data_to_send or attributes_data_to_send:
-            self.callback(self, RequestType.SEND_DATA, {DEVICE_NAME_PARAMETER: self.device_name,
-                            DEVICE_TYPE_PARAMETER: self.config["deviceType"],
-                            TELEMETRY_PARAMETER: telemetry_data_to_send,
-                            ATTRIBUTES_PARAMETER: attributes_data_to_send})
-
-    def __check_data_to_send_periodically_entry(self, section, data_array: list, current_monotonic: float):
-        for key, report_data_config in self.cached_data[LAST_PREFIX + section].items():
-            if (report_data_config['type'] in (ReportStrategy.ON_CHANGE_OR_REPORT_PERIOD, ReportStrategy.ON_REPORT_PERIOD)
-                    and report_data_config['previous_value'] is not None
-                    and report_data_config['next_send_monotonic_ms'] <= current_monotonic):
-                data_array.append({key: report_data_config['previous_value']})
-                report_data_config['next_send_monotonic_ms'] = current_monotonic + report_data_config[REPORT_PERIOD_PARAMETER]
-
-    def __init_cache_for_data(self):
-        for index, key_config in enumerate(self.config[TIMESERIES_PARAMETER]):
-            key = key_config.get('key', key_config.get('tag'))
-            self.cached_data[LAST_PREFIX + TELEMETRY_PARAMETER][key] = {
-                **self.__get_report_strategy_from_config(key_config, self.__basic_device_report_strategy_config),
-                'next_send_monotonic_ms': 0,
-                'previous_value': None
-            }
-        for index, key_config in enumerate(self.config[ATTRIBUTES_PARAMETER]):
-            key = key_config.get('key', key_config.get('tag'))
-            self.cached_data[LAST_PREFIX + ATTRIBUTES_PARAMETER][key] = {
-                **self.__get_report_strategy_from_config(key_config, self.__basic_device_report_strategy_config),
-                'next_send_monotonic_ms': 0,
-                'previous_value': None
-            }
-
-    def update_cached_data_and_check_is_data_should_be_send(self, configuration_section, key, value) -> bool:
-        section_with_prefix = LAST_PREFIX + configuration_section
-        previous_value = self.cached_data.get(section_with_prefix, {}).get(key, {}).get('previous_value')
-        if previous_value is None:
-            self.cached_data[section_with_prefix][key]['previous_value'] = value
-            if self.cached_data[section_with_prefix][key]['type'] in (ReportStrategy.ON_CHANGE_OR_REPORT_PERIOD,
-                                                                      ReportStrategy.ON_REPORT_PERIOD):
-                self.cached_data[section_with_prefix][key]['next_send_monotonic_ms'] = (
-                        monotonic() + self.cached_data[section_with_prefix][key][REPORT_PERIOD_PARAMETER])
-            return True
-        if previous_value != value:
-            self.cached_data[section_with_prefix][key]['previous_value'] = value
-            if self.cached_data[section_with_prefix][key]['type'] == ReportStrategy.ON_CHANGE:
-                return True
-            elif self.cached_data[section_with_prefix][key]['type'] == ReportStrategy.ON_CHANGE_OR_REPORT_PERIOD:
-                self.cached_data[section_with_prefix][key]['next_send_monotonic_ms'] = (
-                        monotonic() + self.cached_data[section_with_prefix][key][REPORT_PERIOD_PARAMETER])
-                return True
-
-        return False
-
-    def __get_report_strategy_from_config(self, config: dict, default_report_strategy_config):
-        report_strategy_config = default_report_strategy_config
-        if not config:
-            return report_strategy_config
-        if config.get(SEND_DATA_ONLY_ON_CHANGE_PARAMETER) is not None:
-            report_strategy_config = {
-                'type': ReportStrategy.ON_CHANGE if config.get(SEND_DATA_ONLY_ON_CHANGE_PARAMETER) else ReportStrategy.ON_REPORT_PERIOD,
-                REPORT_PERIOD_PARAMETER: config.get(REPORT_PERIOD_PARAMETER, report_strategy_config.get(REPORT_PERIOD_PARAMETER, self.poll_period))
-            }
-        if config.get(REPORT_STRATEGY_PARAMETER) is not None:
-            try:
-                report_strategy_config = {
-                    'type': ReportStrategy[config[REPORT_STRATEGY_PARAMETER].get('type', ReportStrategy.ON_REPORT_PERIOD.name).upper()],
-                    REPORT_PERIOD_PARAMETER: config[REPORT_STRATEGY_PARAMETER].get(REPORT_PERIOD_PARAMETER, 60000) / 1000
-                }
-            except Exception:
-                self._log.error("Report strategy config is not valid. Using default report strategy for config: %r", config)
-                report_strategy_config = default_report_strategy_config
-        return report_strategy_config
+    def __register_keys_for_report_strategy(self, report_strategy_processor):
+        report_strategy_processor.register_device(self.device_name, self.config['deviceType'],
+                                                  self.__basic_device_report_strategy_config)
+        for section in (TIMESERIES_PARAMETER, ATTRIBUTES_PARAMETER):
+            for key_config in self.config[section]:
+                report_strategy_processor.register_key(
+                    self.device_name, TELEMETRY_PARAMETER if section == TIMESERIES_PARAMETER else section,
+                    key_config.get('key', key_config.get('tag')),
+                    get_report_strategy_from_config(key_config, self.__basic_device_report_strategy_config,
+                                                    self.poll_period, self._log))
 
     def __load_converters(self, connector):
         try:
@@ -1,17 +1,215 @@
 import time
-from re import findall
+from re import compile as compile_regex
+from struct import Struct, error as StructError
 
 from simplejson import dumps
 
 from thingsboard_gateway.connectors.mqtt.mqtt_uplink_converter import MqttUplinkConverter
-from thingsboard_gateway.gateway.statistics.decorators import CollectStatistics
+from thingsboard_gateway.gateway.statistics.decorators import CollectStatistics, CollectBatchStatistics
 from thingsboard_gateway.gateway.statistics.statistics_service import StatisticsService
 
+BYTES_EXPRESSION_PATTERN = compile_regex(r'\[\S[0-9:]*]')
+
+BYTE_ORDERS = {
+    'BIG': '>',
+    'LITTLE': '<'
+}
+
+# Struct format characters of typed values by value size in bytes
+STRUCT_FORMATS = {
+    'int': {1: 'b', 2: 'h', 4: 'i', 8: 'q'},
+    'uint': {1: 'B', 2: 'H', 4: 'I', 8: 'Q'},
+    'float': {2: 'e', 4: 'f', 8: 'd'},
+    'double': {8: 'd'},
+    'bits': {1: 'B', 2: 'H', 4: 'I', 8: 'Q'}
+}
+
+
+class BytesExpression:
+    """
+    Compiled "[start:end]" expression, that takes characters of the payload, like "[0:4]" or "temp_[4:]".
+    The expression is parsed only once, rendering only takes the slices of the payload.
+    """
+
+    __slots__ = ('__parts',)
+
+    def __init__(self, expression: str):
+        self.__parts = []
+
+        position = 0
+        for expression_match in BYTES_EXPRESSION_PATTERN.finditer(expression):
+            if expression_match.start() > position:
+                self.__parts.append(expression[position:expression_match.start()])
+            self.__parts.append(self.__parse_index(expression_match.group(0)[1:-1]))
+            position = expression_match.end()
+
+        if position < len(expression):
+            self.__parts.append(expression[position:])
+
+    @staticmethod
+    def __parse_index(index_expression):
+        indexes = index_expression.split(':')
+        try:
+            if len(indexes) == 2:
+                from_index, to_index = indexes
+                return slice(int(from_index) if from_index != '' else None, int(to_index) if to_index != '' else None)
+            return int(indexes[0])
+        except ValueError:
+            # Invalid index is kept as is, so conversion of every message fails like with not compiled expression
+            return index_expression
+
+    def render(self, data):
+        result = []
+        for part in self.__parts:
+            if isinstance(part, str):
+                result.append(part)
+            elif isinstance(part, slice):
+                result.append(''.join(str(item) for item in data[part]))
+            else:
+                result.append(str(data[part]))
+        return ''.join(result)
+
+
+class BytesField:
+    """Typed value (int, uint, float, double or bits) of the binary payload."""
+
+    __slots__ = ('key', 'offset', 'size', 'struct_format', 'byte_order', 'bit', 'bit_mask', '__slice', '__type')
+
+    def __init__(self, key, datatype_config, default_byte_order):
+        self.key = key
+        value_type = datatype_config['type'].lower()
+        self.byte_order = BYTE_ORDERS.get(datatype_config.get('byteOrder', default_byte_order).upper(), '>')
+
+        index_expression = datatype_config['value'].strip()[1:-1]
+        indexes = index_expression.split(':')
+        if len(indexes) == 2:
+            self.__slice = slice(int(indexes[0]) if indexes[0] != '' else None,
+                                 int(indexes[1]) if indexes[1] != '' else None)
+        else:
+            index = int(indexes[0])
+            self.__slice = slice(index, index + 1 if index != -1 else None)
+
+        start, stop = self.__slice.start or 0, self.__slice.stop
+        if start >= 0 and stop is not None and stop > start:
+            # Fixed position of the value, it can be read with other fixed values in one struct call
+            self.offset = start
+            self.size = stop - start
+            self.struct_format = STRUCT_FORMATS[value_type].get(self.size)
+            if self.struct_format is None:
+                raise ValueError(f'Unsupported size {self.size} of "{value_type}" value "{key}"')
+        else:
+            self.offset = self.size = self.struct_format = None
+
+        self.bit = datatype_config.get('bit', 0) if value_type == 'bits' else None
+        self.bit_mask = (1 << datatype_config.get('bitLength', 1)) - 1 if value_type == 'bits' else None
+        self.__type = value_type
+
+    @property
+    def is_fixed(self):
+        return self.struct_format is not None
+
+    def get_value(self, unpacked_value):
+        if self.bit is None:
+            return unpacked_value
+        value = (unpacked_value >> self.bit) & self.bit_mask
+        return bool(value) if self.bit_mask == 1 else value
+
+    def read_fixed(self, payload: bytes):
+        """Reads the value with fixed position alone, when values of its struct can not be read together."""
+        return self.get_value(Struct(self.byte_order + self.struct_format).unpack_from(payload, self.offset)[0])
+
+    def read(self, payload: bytes):
+        """Reads the value with position relative to the payload end (not fixed)."""
+        value_bytes = payload[self.__slice]
+        struct_format = STRUCT_FORMATS[self.__type].get(len(value_bytes))
+        if struct_format is None:
+            raise ValueError(f'Unsupported size {len(value_bytes)} of "{self.__type}" value "{self.key}"')
+        return self.get_value(Struct(self.byte_order + struct_format).unpack(value_bytes)[0])
+
+
+class BytesLayout:
+    """
+    Typed values of the payload, compiled to struct formats.
+    Values with fixed position and the same byte order are read with one struct.unpack_from call
+    (gaps between values are skipped with pad bytes), overlapping values, like bits of the same byte,
+    are read with additional struct calls.
+    """
+
+    def __init__(self, fields):
+        self.__plans = []
+        self.__dynamic_fields = [field for field in fields if not field.is_fixed]
+
+        fixed_fields = sorted((field for field in fields if field.is_fixed), key=lambda field: field.offset)
+        pending_fields = fixed_fields
+        while pending_fields:
+            plan_fields, overlapped_fields = self.__get_not_overlapped_fields(pending_fields)
+            for byte_order in {field.byte_order for field in plan_fields}:
+                byte_order_fields = [field for field in plan_fields if field.byte_order == byte_order]
+                self.__plans.append((self.__compile_struct(byte_order, byte_order_fields), byte_order_fields))
+            pending_fields = overlapped_fields
+
+    @staticmethod
+    def __get_not_overlapped_fields(fields):
+        plan_fields, overlapped_fields = [], []
+        end = 0
+        for field in fields:
+            if field.offset >= end:
+                plan_fields.append(field)
+                end = field.offset + field.size
+            else:
+                overlapped_fields.append(field)
+        return plan_fields, overlapped_fields
+
+    @staticmethod
+    def __compile_struct(byte_order, fields):
+        struct_format = byte_order
+        position = 0
+        for field in fields:
+            if field.offset > position:
+                struct_format += f'{field.offset - position}x'
+            struct_format += field.struct_format
+            position = field.offset + field.size
+        return Struct(struct_format)
+
+    @property
+    def struct_calls_count(self):
+        return len(self.__plans)
+
+    def read(self, payload: bytes):
+        """
+        Returns dictionary with values of the fields, that were read, and dictionary with errors of the fields,
+        that do not fit the payload. If values of a struct can not be read together, they are read one by one,
+        so one failed field does not prevent reading of the others.
+        """
+        values = {}
+        errors = {}
+        for (struct, fields) in self.__plans:
+            try:
+                for (field, unpacked_value) in zip(fields, struct.unpack_from(payload)):
+                    values[field] = field.get_value(unpacked_value)
+            except StructError:
+                for field in fields:
+                    self.__read_field(field.read_fixed, field, payload, values, errors)
+
+        for field in self.__dynamic_fields:
+            self.__read_field(field.read, field, payload, values, errors)
+
+        return values, errors
+
+    @staticmethod
+    def __read_field(read, field, payload, values, errors):
+        try:
+            values[field] = read(payload)
+        except (StructError, ValueError) as e:
+            errors[field] = e
+
 
 class BytesMqttUplinkConverter(MqttUplinkConverter):
+    RAW_PAYLOAD = True
+
     def __init__(self, config, logger):
-        self.__config = config.get('converter')
         self._log = logger
+        self.config = config.get('converter')
 
     @property
     def config(self):
@@ -20,37 +218,39 @@ class BytesMqttUplinkConverter(MqttUplinkConverter):
     @config.setter
     def config(self, value):
         self.__config = value
+        self.__compile()
+
+    def __compile(self):
+        """Compiles expressions and typed values of the configuration, so they are not parsed for every message."""
+        datatypes = {"attributes": "attributes",
+                     "timeseries": "telemetry"}
+        default_byte_order = self.__config.get('byteOrder', 'BIG')
+
+        self.__device_name_expression = BytesExpression(self.__config['deviceInfo']['deviceNameExpression'])
+        self.__device_type_expression = BytesExpression(self.__config['deviceInfo']['deviceProfileExpression'])
+
+        self.__datatypes_fields = []
+        typed_fields = []
+        for datatype in datatypes:
+            for datatype_config in self.__config.get(datatype, []):
+                if datatype_config.get('type', '').lower() in STRUCT_FORMATS:
+                    field = BytesField(datatype_config['key'], datatype_config, default_byte_order)
+                    typed_fields.append(field)
+                else:
+                    field = BytesExpression(datatype_config['value'])
+                self.__datatypes_fields.append((datatypes[datatype], datatype_config['key'], field))
+
+        self.__layout = BytesLayout(typed_fields) if typed_fields else None
 
     @CollectStatistics(start_stat_type='receivedBytesFromDevices',
                        end_stat_type='convertedBytesFromDevice')
     def convert(self, topic, data):
         StatisticsService.count_connector_message(self._log.name, 'convertersMsgProcessed')
 
-        datatypes = {"attributes": "attributes",
-                     "timeseries": "telemetry"}
-        dict_result = {
-            "deviceName": self.parse_data(self.__config['deviceInfo']['deviceNameExpression'], data),
-            "deviceType": self.parse_data(self.__config['deviceInfo']['deviceProfileExpression'], data),
-            "attributes": [],
-            "telemetry": []
-        }
+        dict_result, dropped = self._convert_single_item(topic, data)
 
-        try:
-            for datatype in datatypes:
-                dict_result[datatypes[datatype]] = []
-                for datatype_config in self.__config.get(datatype, []):
-                    value_item = {datatype_config['key']: self.parse_data(datatype_config['value'], data)}
-                    if datatype == 'timeseries':
-                        dict_result[datatypes[datatype]].append({"ts": int(time.time()) * 1000, 'values': value_item})
-                    else:
-                        dict_result[datatypes[datatype]].append(value_item)
-        except Exception as e:
-            self._log.error('Error in converter, for config: \n%s\n and message: \n%s\n %s', dumps(self.__config),
-                            str(data), e)
+        if dropped:
             StatisticsService.count_connector_message(self._log.name, 'convertersMsgDropped')
-
-        self._log.debug('Converted data: %s', dict_result)
-
         StatisticsService.count_connector_message(self._log.name, 'convertersAttrProduced',
                                                   count=len(dict_result["attributes"]))
         StatisticsService.count_connector_message(self._log.name, 'convertersTsProduced',
@@ -58,25 +258,71 @@ class BytesMqttUplinkConverter(MqttUplinkConverter):
 
         return dict_result
 
-    @staticmethod
-    def parse_data(expression, data):
-        expression_arr = findall(r'\[\S[0-9:]*]', expression)
-        converted_data = expression
+    @CollectBatchStatistics(start_stat_type='receivedBytesFromDevices',
+                            end_stat_type='convertedBytesFromDevice')
+    def convert_batch(self, messages):
+        results = [self._convert_single_item(topic, data) for (topic, data) in messages]
+        converted_data = [dict_result for dict_result, _ in results]
+        dropped_count = sum(dropped for _, dropped in results)
 
-        for exp in expression_arr:
-            indexes = exp[1:-1].split(':')
+        # Statistics are counted only for converted batches, messages of failed batches are converted one by one
+        StatisticsService.count_connector_message(self._log.name, 'convertersMsgProcessed', count=len(messages))
+        if dropped_count:
+            StatisticsService.count_connector_message(self._log.name, 'convertersMsgDropped', count=dropped_count)
+        StatisticsService.count_connector_message(self._log.name, 'convertersAttrProduced',
+                                                  count=sum(len(item["attributes"]) for item in converted_data))
+        StatisticsService.count_connector_message(self._log.name, 'convertersTsProduced',
+                                                  count=sum(len(item["telemetry"]) for item in converted_data))
 
-            data_to_replace = ''
-            if len(indexes) == 2:
-                from_index, to_index = indexes
-                concat_arr = data[
-                             int(from_index) if from_index != '' else None:int(
-                                 to_index) if to_index != '' else None]
-                for sub_item in concat_arr:
-                    data_to_replace += str(sub_item)
+        return converted_data
+
+    def _convert_single_item(self, topic, data):
+        """Returns converted data and whether the message was dropped, statistics are counted by callers."""
+        dropped = False
+        # Typed values are read from the payload bytes, expressions take characters of the payload text
+        if isinstance(data, (bytes, bytearray)):
+            payload = data
+            data = data.decode('utf-8', 'ignore')
+        else:
+            payload = data.encode('utf-8') if isinstance(data, str) else data
+
+        dict_result = {
+            "deviceName": self.__device_name_expression.render(data),
+            "deviceType": self.__device_type_expression.render(data),
+            "attributes": [],
+            "telemetry": []
+        }
+
+        typed_values, errors = self.__layout.read(payload) if self.__layout is not None else ({}, {})
+
+        # Every field is converted separately, so a field, that does not fit the payload, is skipped alone
+        ts = int(time.time()) * 1000
+        for (datatype, key, field) in self.__datatypes_fields:
+            if isinstance(field, BytesField):
+                if field not in typed_values:
+                    continue
+                value_item = {key: typed_values[field]}
             else:
-                data_to_replace += str(data[int(indexes[0])])
+                try:
+                    value_item = {key: field.render(data)}
+                except Exception as e:
+                    errors[field] = e
+                    continue
 
-            converted_data = converted_data.replace(exp, data_to_replace)
+            if datatype == 'telemetry':
+                dict_result[datatype].append({"ts": ts, 'values': value_item})
+            else:
+                dict_result[datatype].append(value_item)
 
-        return converted_data
+        if errors:
+            self._log.error('Error in converter, for config: \n%s\n and message: \n%s\n %s', dumps(self.__config),
+                            str(data), '; '.join(str(error) for error in errors.values()))
+            dropped = True
+
+        self._log.debug('Converted data: %s', dict_result)
+
+        return dict_result, dropped
+
+    @staticmethod
+    def parse_data(expression, data):
+        return BytesExpression(expression).render(data)
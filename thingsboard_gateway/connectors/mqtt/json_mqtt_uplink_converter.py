@@ -18,7 +18,8 @@ from simplejson import dumps
 
 from thingsboard_gateway.gateway.constants import SEND_ON_CHANGE_PARAMETER
 from thingsboard_gateway.connectors.mqtt.mqtt_uplink_converter import MqttUplinkConverter
-from thingsboard_gateway.gateway.statistics.decorators import CollectStatistics
+from thingsboard_gateway.gateway.statistics.decorators import CollectStatistics, CollectBatchStatistics
+from thingsboard_gateway.tb_utility.tb_expression import TBExpression
 from thingsboard_gateway.tb_utility.tb_utility import TBUtility
 from thingsboard_gateway.gateway.statistics.statistics_service import StatisticsService
 
@@ -54,7 +55,43 @@ class JsonMqttUplinkConverter(MqttUplinkConverter):
         else:
             return self._convert_single_item(topic, data)
 
+    @CollectBatchStatistics(start_stat_type='receivedBytesFromDevices',
+                            end_stat_type='convertedBytesFromDevice')
+    def convert_batch(self, messages):
+        converted_data = []
+        dropped_count = 0
+        for (topic, data) in messages:
+            for item in (data if isinstance(data, list) else (data,)):
+                dict_result, dropped = self.__convert_item(topic, item)
+                converted_data.append(dict_result)
+                dropped_count += dropped
+
+        # Statistics are counted only for converted batches, messages of failed batches are converted one by one
+        StatisticsService.count_connector_message(self._log.name, 'convertersMsgProcessed', count=len(messages))
+        if dropped_count:
+            StatisticsService.count_connector_message(self._log.name, 'convertersMsgDropped', count=dropped_count)
+        StatisticsService.count_connector_message(self._log.name, 'convertersAttrProduced',
+                                                  count=sum(len(item["attributes"]) for item in converted_data))
+        StatisticsService.count_connector_message(self._log.name, 'convertersTsProduced',
+                                                  count=sum(len(item["telemetry"]) for item in converted_data))
+
+        return converted_data
+
     def _convert_single_item(self, topic, data):
+        dict_result, dropped = self.__convert_item(topic, data)
+
+        if dropped:
+            StatisticsService.count_connector_message(self._log.name, 'convertersMsgDropped')
+        StatisticsService.count_connector_message(self._log.name, 'convertersAttrProduced',
+                                                  count=len(dict_result["attributes"]))
+        StatisticsService.count_connector_message(self._log.name, 'convertersTsProduced',
+                                                  count=len(dict_result["telemetry"]))
+
+        return dict_result
+
+    def __convert_item(self, topic, data):
+        """Returns converted data and whether the message was dropped, statistics are counted by callers."""
+        dropped = False
         datatypes = {"attributes": "attributes",
                      "timeseries": "telemetry"}
         dict_result = {
@@ -77,24 +114,8 @@ class JsonMqttUplinkConverter(MqttUplinkConverter):
                             dict_result[datatypes[datatype]].append(
                                 self.create_timeseries_record(item, data[item], timestamp))
                     else:
-                        values = TBUtility.get_values(datatype_config["value"], data, datatype_config["type"],
-                                                      expression_instead_none=False)
-                        values_tags = TBUtility.get_values(datatype_config["value"], data, datatype_config["type"],
-                                                           get_tag=True)
-
-                        keys = TBUtility.get_values(datatype_config["key"], data, datatype_config["type"],
-                                                    expression_instead_none=False)
-                        keys_tags = TBUtility.get_values(datatype_config["key"], data, get_tag=True)
-
-                        full_key = datatype_config["key"]
-                        for (key, key_tag) in zip(keys, keys_tags):
-                            is_valid_key = "${" in datatype_config["key"] and "}" in datatype_config["key"]
-                            full_key = full_key.replace('${' + str(key_tag) + '}', str(key)) if is_valid_key else key_tag
-
-                        full_value = datatype_config["value"]
-                        for (value, value_tag) in zip(values, values_tags):
-                            is_valid_value = "${" in datatype_config["value"] and "}" in datatype_config["value"]
-                            full_value = full_value.replace('${' + str(value_tag) + '}', str(value)) if is_valid_value else value
+                        full_key = TBExpression.compile(datatype_config["key"]).render(data)
+                        full_value = TBExpression.compile(datatype_config["value"]).render(data)
 
                         if full_key != 'None' and full_value != 'None':
                             dict_result[datatypes[datatype]].append(
@@ -103,16 +124,11 @@ class JsonMqttUplinkConverter(MqttUplinkConverter):
         except Exception as e:
             self._log.error('Error in converter, for config: \n%s\n and message: \n%s\n %s', dumps(self.__config),
                             str(data), e)
-            StatisticsService.count_connector_message(self._log.name, 'convertersMsgDropped')
+            dropped = True
 
         self._log.debug(dict_result)
 
-        StatisticsService.count_connector_message(self._log.name, 'convertersAttrProduced',
-                                                  count=len(dict_result["attributes"]))
-        StatisticsService.count_connector_message(self._log.name, 'convertersTsProduced',
-                                                  count=len(dict_result["telemetry"]))
-
-        return dict_result
+        return dict_result, dropped
 
     @staticmethod
     def create_timeseries_record(key, value, timestamp):
@@ -136,14 +152,7 @@ class JsonMqttUplinkConverter(MqttUplinkConverter):
 
         try:
             if device_info.get(expression_source) == 'message' or device_info.get(expression_source) == 'constant':
-                result_tags = TBUtility.get_values(expression, data, get_tag=True)
-                result_values = TBUtility.get_values(expression, data, expression_instead_none=True)
-
-                result = expression
-                for (result_tag, result_value) in zip(result_tags, result_values):
-                    is_valid_key = "${" in expression and "}" in expression
-                    result = result.replace('${' + str(result_tag) + '}',
-                                            str(result_value)) if is_valid_key else result_tag
+                result = TBExpression.compile(expression).render(data, expression_instead_none=True)
             elif device_info.get(expression_source) == 'topic':
                 search_result = search(expression, topic)
                 if search_result is not None:
@@ -16,8 +16,8 @@ import random
 import socket
 import ssl
 import string
-from queue import Queue
-from re import fullmatch, match, search
+from queue import Queue, Empty
+from re import match, search
 from threading import Thread
 from time import sleep, time
 
@@ -25,10 +25,15 @@ import simplejson
 
 from thingsboard_gateway.connectors.mqtt.backward_compatibility_adapter import BackwardCompatibilityAdapter
 from thingsboard_gateway.gateway.constants import SEND_ON_CHANGE_PARAMETER, DEFAULT_SEND_ON_CHANGE_VALUE, \
-    ATTRIBUTES_PARAMETER, TELEMETRY_PARAMETER, SEND_ON_CHANGE_TTL_PARAMETER, DEFAULT_SEND_ON_CHANGE_INFINITE_TTL_VALUE
+    ATTRIBUTES_PARAMETER, TELEMETRY_PARAMETER, SEND_ON_CHANGE_TTL_PARAMETER, DEFAULT_SEND_ON_CHANGE_INFINITE_TTL_VALUE, \
+    DEVICE_NAME_PARAMETER, DEVICE_TYPE_PARAMETER
 from thingsboard_gateway.gateway.constant_enums import Status
 from thingsboard_gateway.connectors.connector import Connector
 from thingsboard_gateway.connectors.mqtt.mqtt_decorators import CustomCollectStatistics
+from thingsboard_gateway.connectors.mqtt.topic_content_cache import TopicContentCache, \
+    DEFAULT_TOPIC_CONTENT_CACHE_SIZE
+from thingsboard_gateway.connectors.mqtt.topic_aliases import TopicAliases, DEFAULT_TOPIC_ALIAS_MAXIMUM
+from thingsboard_gateway.connectors.mqtt.topic_router import TopicRouter, DEFAULT_TOPICS_CACHE_SIZE
 from thingsboard_gateway.gateway.statistics.decorators import CollectAllReceivedBytesStatistics
 from thingsboard_gateway.tb_utility.tb_loader import TBModuleLoader
 from thingsboard_gateway.tb_utility.tb_utility import TBUtility
@@ -44,9 +49,19 @@ except ImportError:
     from paho.mqtt.client import Client, Properties
     from paho.mqtt.packettypes import PacketTypes
 
-from paho.mqtt.client import MQTTv31, MQTTv311, MQTTv5
+from paho.mqtt.client import MQTTv31, MQTTv311, MQTTv5, MQTT_ERR_SUCCESS, error_string
 
 
+# Blocking queue reads wake up immediately when a message arrives, timeout only limits the time to notice the stop
+QUEUE_GET_TIMEOUT = 1
+
+# Time in seconds to wait until an RPC request is written to the broker, before it is acknowledged or failed
+RPC_PUBLISH_TIMEOUT = 10
+
+# Window in milliseconds, during which the same attribute payload is published to a topic, shared by devices, once.
+# Coalescing is disabled by default, as repeated identical updates (e.g. commands) must reach devices
+DEFAULT_SHARED_TOPICS_COALESCING_WINDOW = 0
+
 MQTT_VERSIONS = {
     3: MQTTv31,
     4: MQTTv311,
@@ -141,7 +156,9 @@ class MqttConnector(Connector, Thread):
                                                                                 DEFAULT_SEND_ON_CHANGE_INFINITE_TTL_VALUE))
 
         # for sendDataOnlyOnChange param
-        self.__topic_content = {}
+        self.__topic_content = TopicContentCache(self.__broker.get('topicContentCacheSize',
+                                                                   DEFAULT_TOPIC_CONTENT_CACHE_SIZE),
+                                                 self.__send_data_only_on_change_ttl)
 
         self.__mapping = []
         self.__server_side_rpc = []
@@ -181,11 +198,13 @@ class MqttConnector(Connector, Thread):
         # Attributes updates requests, i.e., asking ThingsBoard to send updates about an attribute
         self.load_handlers('attributeUpdates', mandatory_keys['attributeUpdates'], self.__attribute_updates)
 
-        # Setup topic substitution lists for each class of handlers ----------------------------------------------------
-        self.__mapping_sub_topics = {}
-        self.__connect_requests_sub_topics = {}
-        self.__disconnect_requests_sub_topics = {}
-        self.__attribute_requests_sub_topics = {}
+        # Setup topic routers for each class of handlers --------------------------------------------------------------
+        topics_cache_size = self.__broker.get('topicsCacheSize', DEFAULT_TOPICS_CACHE_SIZE)
+        self.__mapping_sub_topics = TopicRouter(topics_cache_size)
+        self.__connect_requests_sub_topics = TopicRouter(topics_cache_size)
+        self.__disconnect_requests_sub_topics = TopicRouter(topics_cache_size)
+        self.__attribute_requests_sub_topics = TopicRouter(topics_cache_size)
+        self.__rpc_response_sub_topics = TopicRouter(topics_cache_size)
 
         # Set up external MQTT broker connection -----------------------------------------------------------------------
         client_id = self.__broker.get("clientId", ''.join(random.choice(string.ascii_lowercase) for _ in range(23)))
@@ -194,49 +213,32 @@ class MqttConnector(Connector, Thread):
         self._cleanStart = self.__broker.get("cleanStart",True)
         self._sessionExpiryInterval = self.__broker.get("sessionExpiryInterval", 0)
 
+        self.name = config.get("name", self.__broker.get(
+            "name",
+            'Mqtt Broker ' + ''.join(random.choice(string.ascii_lowercase) for _ in range(5))))
+
         self._mqtt_version = self.__broker.get('version', 5)
-        try:
-            if self._mqtt_version != 5:
-                self._client = Client(client_id, clean_session=self._cleanSession, protocol=MQTT_VERSIONS[self._mqtt_version])
-            else:
-                self._client = Client(client_id, protocol=MQTT_VERSIONS[self._mqtt_version])
-        except KeyError:
+        if self._mqtt_version not in MQTT_VERSIONS:
             self.__log.error('Unknown MQTT version. Starting up on version 5...')
-            self._client = Client(client_id, protocol=MQTTv5)
             self._mqtt_version = 5
 
-        self.name = config.get("name", self.__broker.get(
-            "name",
-            'Mqtt Broker ' + ''.join(random.choice(string.ascii_lowercase) for _ in range(5))))
+        self._client = self.__create_client(client_id)
 
-        if "username" in self.__broker["security"]:
-            self._client.username_pw_set(self.__broker["security"]["username"],
-                                         self.__broker["security"]["password"])
+        # MQTT 5 topic aliases for messages, published to devices
+        self.__topic_aliases = TopicAliases(self.__broker.get('topicAliasMaximum', DEFAULT_TOPIC_ALIAS_MAXIMUM))
 
-        if "caCert" in self.__broker["security"] \
-                or self.__broker["security"].get("type", "none").lower() == "tls":
-            ca_cert = self.__broker["security"].get("caCert")
-            private_key = self.__broker["security"].get("privateKey")
-            cert = self.__broker["security"].get("cert")
+        # MQTT 5 request/response: RPC requests carry the fixed response topic and correlation data, devices,
+        # that support it, reply to the response topic and responses are matched by the correlation data
+        self.__rpc_response_topic = None
+        if self._mqtt_version == 5:
+            self.__rpc_response_topic = self.__broker.get('rpcResponseTopic', f'tb_gateway/{client_id}/rpc/response')
+        self.__rpc_correlations = {}
 
-            if ca_cert is None:
-                self._client.tls_set_context(ssl.SSLContext(ssl.PROTOCOL_TLSv1_2))
-            else:
-                try:
-                    self._client.tls_set(ca_certs=ca_cert,
-                                         certfile=cert,
-                                         keyfile=private_key,
-                                         cert_reqs=ssl.CERT_REQUIRED,
-                                         tls_version=ssl.PROTOCOL_TLSv1_2,
-                                         ciphers=None)
-                except Exception as e:
-                    self.__log.error("Cannot setup connection to broker %s using SSL. "
-                                     "Please check your configuration.\nError: %s",
-                                     self.get_name(), e)
-                if self.__broker["security"].get("insecure", False):
-                    self._client.tls_insecure_set(True)
-                else:
-                    self._client.tls_insecure_set(False)
+        # Attribute updates (and responses) to topics, shared by devices (topic expression without ${deviceName}),
+        # are coalesced: a shared attribute, changed for many devices, is published to the topic once per window
+        self.__shared_topics_coalescing_window = self.__broker.get('sharedTopicsCoalescingWindowInMillis',
+                                                                   DEFAULT_SHARED_TOPICS_COALESCING_WINDOW)
+        self.__shared_topics_content = TopicContentCache(ttl=self.__shared_topics_coalescing_window)
 
         # Set up external MQTT broker callbacks ------------------------------------------------------------------------
         self._client.on_connect = self._on_connect
@@ -245,6 +247,24 @@ class MqttConnector(Connector, Thread):
         self._client.on_disconnect = self._on_disconnect
         # self._client.on_log = self._on_log
 
+        # Set up additional clients for data ingestion -----------------------------------------------------------------
+        # Mapping topics are subscribed with shared subscriptions, so the broker spreads messages between the clients
+        # (and between gateways, that use the same group)
+        self.__shared_subscription_group = self.__broker.get('sharedSubscriptionGroup')
+        ingest_clients_count = self.__broker.get('ingestClients', 1)
+        if ingest_clients_count > 1 and not self.__shared_subscription_group:
+            self.__shared_subscription_group = client_id + '_group'
+
+        self.__ingest_clients = []
+        for client_number in range(1, ingest_clients_count):
+            ingest_client_id = f'{client_id}_ingest_{client_number}'
+            ingest_client = self.__create_client(ingest_client_id)
+            ingest_client.user_data_set(ingest_client_id)
+            ingest_client.on_connect = self._on_ingest_client_connect
+            ingest_client.on_message = self._on_message
+            ingest_client.on_disconnect = self._on_ingest_client_disconnect
+            self.__ingest_clients.append(ingest_client)
+
         # Set up lifecycle flags ---------------------------------------------------------------------------------------
         self._connected = False
         self.__stopped = False
@@ -259,6 +279,43 @@ class MqttConnector(Connector, Thread):
         self._on_message_thread = Thread(name='On Message', target=self._process_on_message, daemon=True)
         self._on_message_thread.start()
 
+    def __create_client(self, client_id):
+        if self._mqtt_version != 5:
+            client = Client(client_id, clean_session=self._cleanSession, protocol=MQTT_VERSIONS[self._mqtt_version])
+        else:
+            client = Client(client_id, protocol=MQTT_VERSIONS[self._mqtt_version])
+
+        if "username" in self.__broker["security"]:
+            client.username_pw_set(self.__broker["security"]["username"],
+                                   self.__broker["security"]["password"])
+
+        if "caCert" in self.__broker["security"] \
+                or self.__broker["security"].get("type", "none").lower() == "tls":
+            ca_cert = self.__broker["security"].get("caCert")
+            private_key = self.__broker["security"].get("privateKey")
+            cert = self.__broker["security"].get("cert")
+
+            if ca_cert is None:
+                client.tls_set_context(ssl.SSLContext(ssl.PROTOCOL_TLSv1_2))
+            else:
+                try:
+                    client.tls_set(ca_certs=ca_cert,
+                                   certfile=cert,
+                                   keyfile=private_key,
+                                   cert_reqs=ssl.CERT_REQUIRED,
+                                   tls_version=ssl.PROTOCOL_TLSv1_2,
+                                   ciphers=None)
+                except Exception as e:
+                    self.__log.error("Cannot setup connection to broker %s using SSL. "
+                                     "Please check your configuration.\nError: %s",
+                                     self.get_name(), e)
+                if self.__broker["security"].get("insecure", False):
+                    client.tls_insecure_set(True)
+                else:
+                    client.tls_insecure_set(False)
+
+        return client
+
     def is_filtering_enable(self, device_name):
         return self.__send_data_only_on_change
 
@@ -331,6 +388,7 @@ class MqttConnector(Connector, Thread):
 
     def run(self):
         try:
+            self.__connect_ingest_clients()
             self.__connect()
         except Exception as e:
             self.__log.exception(e)
@@ -367,13 +425,26 @@ class MqttConnector(Connector, Thread):
                 self.__log.error(e)
                 sleep(10)
 
+    def __connect_ingest_clients(self):
+        # Ingest clients are connected asynchronously, their network loops reconnect them automatically
+        for client in self.__ingest_clients:
+            if self._mqtt_version != 5:
+                client.connect_async(self.__broker['host'], self.__broker.get('port', 1883))
+            else:
+                properties = Properties(PacketTypes.CONNECT)
+                properties.SessionExpiryInterval = self._sessionExpiryInterval
+                client.connect_async(self.__broker['host'], self.__broker.get('port', 1883),
+                                     clean_start=self._cleanStart, properties=properties)
+            client.loop_start()
+
     def close(self):
         self.__stopped = True
-        try:
-            self._client.disconnect()
-        except Exception as e:
-            self.__log.exception(e)
-        self._client.loop_stop()
+        for client in [self._client, *self.__ingest_clients]:
+            try:
+                client.disconnect()
+            except Exception as e:
+                self.__log.exception(e)
+            client.loop_stop()
         for worker in self.__workers_thread_pool:
             worker.stop()
         self.__log.info('%s has been stopped.', self.get_name())
@@ -406,7 +477,16 @@ class MqttConnector(Connector, Thread):
                              str(flags),
                              extra_params)
 
-            self.__mapping_sub_topics = {}
+            self.__mapping_sub_topics.clear()
+            self.__connect_requests_sub_topics.clear()
+            self.__disconnect_requests_sub_topics.clear()
+            self.__attribute_requests_sub_topics.clear()
+            self.__rpc_response_sub_topics.clear()
+            self.__shared_topics_content.clear()
+
+            # Topic aliases are valid only for the connection, the broker sets their maximum number in CONNACK
+            connack_properties = extra_params[0] if self._mqtt_version == 5 and extra_params else None
+            self.__topic_aliases.reset(getattr(connack_properties, 'TopicAliasMaximum', 0))
 
             # Setup data upload requests handling ----------------------------------------------------------------------
             for mapping in self.__mapping:
@@ -455,27 +535,16 @@ class MqttConnector(Connector, Thread):
                         self.__log.debug('Converter %s for topic %s - found in cache!', converter_class_name,
                                          mapping["topicFilter"])
 
-                    # Setup regexp topic acceptance list ---------------------------------------------------------------
-                    # Check if topic is shared subscription type
-                    # (an exception is aws topics that do not support shared subscription)
-                    regex_topic = mapping["topicFilter"]
-                    if not regex_topic.startswith('$aws') and regex_topic.startswith('$'):
-                        regex_topic = '/'.join(regex_topic.split('/')[2:])
-                    else:
-                        regex_topic = TBUtility.topic_to_regex(regex_topic)
-
-                    # There may be more than one converter per topic, so I'm using vectors
-                    if not self.__mapping_sub_topics.get(regex_topic):
-                        self.__mapping_sub_topics[regex_topic] = []
-
-                    self.__mapping_sub_topics[regex_topic].append(converter)
+                    # Setup topic acceptance trie (there may be more than one converter per topic) --------------------
+                    self.__mapping_sub_topics.add(mapping["topicFilter"], converter)
 
                     # Subscribe to appropriate topic -------------------------------------------------------------------
-                    self.__subscribe(mapping["topicFilter"], mapping.get("subscriptionQos", 1))
+                    self.__subscribe(self.__get_mapping_subscription_topic(mapping["topicFilter"]),
+                                     mapping.get("subscriptionQos", 1))
 
                     self.__log.info('Connector "%s" subscribe to %s',
                                     self.get_name(),
-                                    TBUtility.regex_to_topic(regex_topic))
+                                    mapping["topicFilter"])
 
                 except Exception as e:
                     self.__log.exception(e)
@@ -484,22 +553,31 @@ class MqttConnector(Connector, Thread):
             for request in [entry for entry in self.__connect_requests if entry is not None]:
                 # requests are guaranteed to have topicFilter field. See __init__
                 self.__subscribe(request["topicFilter"], request.get("subscriptionQos", 1))
-                topic_filter = TBUtility.topic_to_regex(request.get("topicFilter"))
-                self.__connect_requests_sub_topics[topic_filter] = request
+                self.__connect_requests_sub_topics.add(request["topicFilter"], request)
 
             # Setup disconnection requests handling --------------------------------------------------------------------
             for request in [entry for entry in self.__disconnect_requests if entry is not None]:
                 # requests are guaranteed to have topicFilter field. See __init__
                 self.__subscribe(request["topicFilter"], request.get("subscriptionQos", 1))
-                topic_filter = TBUtility.topic_to_regex(request.get("topicFilter"))
-                self.__disconnect_requests_sub_topics[topic_filter] = request
+                self.__disconnect_requests_sub_topics.add(request["topicFilter"], request)
 
             # Setup attributes requests handling -----------------------------------------------------------------------
             for request in [entry for entry in self.__attribute_requests if entry is not None]:
                 # requests are guaranteed to have topicFilter field. See __init__
                 self.__subscribe(request["topicFilter"], request.get("subscriptionQos", 1))
-                topic_filter = TBUtility.topic_to_regex(request.get("topicFilter"))
-                self.__attribute_requests_sub_topics[topic_filter] = request
+                self.__attribute_requests_sub_topics.add(request["topicFilter"], request)
+
+            # Setup RPC responses subscriptions ------------------------------------------------------------------------
+            # Response topics are subscribed in advance, so RPC requests do not wait for subscribe/unsubscribe
+            for rpc_config in self.__server_side_rpc:
+                response_topic_filter = self.__get_rpc_response_topic_filter(rpc_config)
+                if response_topic_filter is not None and not self.__rpc_response_sub_topics.match(
+                        response_topic_filter):
+                    self.__subscribe(response_topic_filter, rpc_config.get("responseTopicQoS", 1))
+                    self.__rpc_response_sub_topics.add(response_topic_filter, rpc_config)
+
+            if self.__rpc_response_topic is not None and self.__server_side_rpc:
+                self.__subscribe(self.__rpc_response_topic, 1)
         else:
             result_codes = RESULT_CODES_V5 if self._mqtt_version == 5 else RESULT_CODES_V3
             rc = result_code.value if self._mqtt_version == 5 else result_code
@@ -514,6 +592,45 @@ class MqttConnector(Connector, Thread):
         self._connected = False
         self.__log.debug('"%s" was disconnected. %s', self.get_name(), str(args))
 
+    @staticmethod
+    def __get_rpc_response_topic_filter(rpc_config):
+        """
+        Returns topic filter, that matches all response topics of the RPC handler (every level with ${} tag
+        is replaced with "+"), or None if response topics can not be subscribed in advance.
+        """
+        response_topic_expression = rpc_config.get("responseTopicExpression")
+        if not response_topic_expression or not rpc_config.get("responseTimeout"):
+            return None
+
+        levels = ['+' if '${' in level else level for level in response_topic_expression.split('/')]
+        # Filters, starting with a wildcard, would receive unrelated messages of the broker
+        if levels[0] == '+' or '#' in levels:
+            return None
+        return '/'.join(levels)
+
+    def __get_mapping_subscription_topic(self, topic_filter):
+        if self.__shared_subscription_group and not topic_filter.startswith('$'):
+            return f'$share/{self.__shared_subscription_group}/{topic_filter}'
+        return topic_filter
+
+    def _on_ingest_client_connect(self, client, userdata, flags, result_code, *extra_params):
+        if result_code == 0:
+            self.__log.info('%s ingest client %s connected to %s:%s - successfully.',
+                            self.get_name(),
+                            userdata,
+                            self.__broker["host"],
+                            self.__broker.get("port", "1883"))
+
+            # Ingest clients receive mapping topics only, other messages are handled by the main client
+            for mapping in self.__mapping:
+                client.subscribe(self.__get_mapping_subscription_topic(mapping["topicFilter"]),
+                                 mapping.get("subscriptionQos", 1))
+        else:
+            self.__log.error("%s ingest client connection FAIL with error %s!", self.get_name(), result_code)
+
+    def _on_ingest_client_disconnect(self, client, userdata, *args):
+        self.__log.debug('"%s" ingest client %s was disconnected. %s', self.get_name(), userdata, str(args))
+
     def _on_log(self, *args):
         self.__log.debug(args)
 
@@ -535,12 +652,101 @@ class MqttConnector(Connector, Thread):
         if self.__subscribes_sent.get(mid) is not None:
             del self.__subscribes_sent[mid]
 
-    def put_data_to_convert(self, converter, message, content) -> bool:
+    def __get_converters_for_content(self, converters, message):
+        """Returns converters, that have to convert the message, according to sendDataOnlyOnChange option."""
+        # Only topics with sendDataOnlyOnChange converters are kept in the cache
+        if not any(converter.config.get(SEND_ON_CHANGE_PARAMETER, False) for converter in converters):
+            return converters
+
+        if self.__topic_content.update(message.topic, message.payload):
+            return converters
+
+        return [converter for converter in converters if not converter.config.get(SEND_ON_CHANGE_PARAMETER, False)]
+
+    def put_data_to_convert(self, converters, message) -> bool:
         if not self.__msg_queue.full():
-            self.__msg_queue.put((converter.convert, message.topic, content), True, 100)
+            self.__msg_queue.put((converters, message), True, 100)
             return True
         return False
 
+    def _convert_messages(self, messages):
+        # Messages are grouped by converter, so every converter processes its part of the batch at once
+        converter_batches = {}
+        for (converters, message) in messages:
+            try:
+                content = None
+                for converter in converters:
+                    if getattr(converter, 'RAW_PAYLOAD', False):
+                        data = message.payload
+                    else:
+                        # Payload is parsed only once for all converters of the topic
+                        if content is None:
+                            content = TBUtility.decode(message)
+                        data = content
+
+                    converter_batches.setdefault(converter, []).append((message.topic, data))
+            except Exception as e:
+                self.__log.exception(e)
+
+        # Data of the same device is merged and sent to the storage once per batch
+        devices_data = {}
+        for (converter, batch) in converter_batches.items():
+            for (topic, converted_data) in self.__convert_batch(converter, batch):
+                if not isinstance(converted_data, dict):
+                    if converted_data:
+                        self._save_converted_msg(topic, converted_data)
+                    continue
+
+                if not (converted_data.get(ATTRIBUTES_PARAMETER) or converted_data.get(TELEMETRY_PARAMETER)):
+                    continue
+
+                device_key = (converted_data.get(DEVICE_NAME_PARAMETER), converted_data.get(DEVICE_TYPE_PARAMETER),
+                              converted_data.get(SEND_ON_CHANGE_PARAMETER))
+                device_data = devices_data.get(device_key)
+                if device_data is None:
+                    devices_data[device_key] = (topic, converted_data)
+                elif not self.__merge_device_data(device_data[1], converted_data):
+                    self._save_converted_msg(topic, converted_data)
+
+        for (topic, device_data) in devices_data.values():
+            self._save_converted_msg(topic, device_data)
+
+        self.statistics.update(self.__topic_content.get_statistics())
+
+    @staticmethod
+    def __merge_device_data(device_data, converted_data):
+        for section in (ATTRIBUTES_PARAMETER, TELEMETRY_PARAMETER):
+            if not isinstance(device_data.get(section, []), list) \
+                    or not isinstance(converted_data.get(section, []), list):
+                return False
+
+        for section in (ATTRIBUTES_PARAMETER, TELEMETRY_PARAMETER):
+            device_data.setdefault(section, []).extend(converted_data.get(section, []))
+        return True
+
+    def __convert_batch(self, converter, batch):
+        """Returns list of (topic, converted data) pairs."""
+        if len(batch) > 1 and hasattr(converter, 'convert_batch'):
+            try:
+                converted_data = converter.convert_batch(batch)
+                # The topic is used only for logging, so the topic of the first message is used for the whole batch
+                return [(batch[0][0], item) for item in converted_data]
+            except Exception as e:
+                self.__log.warning("Cannot convert batch of %i messages, converting them one by one: %s",
+                                   len(batch), e)
+
+        result = []
+        for (topic, data) in batch:
+            try:
+                converted_data = converter.convert(topic, data)
+                if isinstance(converted_data, list):
+                    result.extend((topic, item) for item in converted_data)
+                else:
+                    result.append((topic, converted_data))
+            except Exception as e:
+                self.__log.exception(e)
+        return result
+
     def _save_converted_msg(self, topic, data):
         if self.__gateway.send_to_storage(self.name, self.get_id(), data) == Status.SUCCESS:
             StatisticsService.count_connector_message(self.name, stat_parameter_name='storageMsgPushed')
@@ -549,7 +755,8 @@ class MqttConnector(Connector, Thread):
 
     def __threads_manager(self):
         if len(self.__workers_thread_pool) == 0:
-            worker = MqttConnector.ConverterWorker("Main Worker", self.__msg_queue, self._save_converted_msg)
+            worker = MqttConnector.ConverterWorker("Main Worker", self.__msg_queue, self._convert_messages,
+                                                   self.__max_msg_number_for_worker)
             self.__workers_thread_pool.append(worker)
             worker.start()
 
@@ -558,7 +765,7 @@ class MqttConnector(Connector, Thread):
         if number_of_needed_threads > threads_count < self.__max_number_of_workers:
             thread = MqttConnector.ConverterWorker(
                 "Worker " + ''.join(random.choice(string.ascii_lowercase) for _ in range(5)), self.__msg_queue,
-                self._save_converted_msg)
+                self._convert_messages, self.__max_msg_number_for_worker)
             self.__workers_thread_pool.append(thread)
             thread.start()
         elif number_of_needed_threads < threads_count and threads_count > 1:
@@ -602,182 +809,180 @@ class MqttConnector(Connector, Thread):
 
     def _process_on_message(self):
         while not self.__stopped:
-            if not self._on_message_queue.empty():
-                client, userdata, message = self._on_message_queue.get()
-
-                self.statistics['MessagesReceived'] += 1
-                content = TBUtility.decode(message)
+            try:
+                client, userdata, message = self._on_message_queue.get(timeout=QUEUE_GET_TIMEOUT)
+            except Empty:
+                continue
 
-                # Check if message topic exists in mappings "i.e., I'm posting telemetry/attributes" -------------------
-                topic_handlers = [regex for regex in self.__mapping_sub_topics if fullmatch(regex, message.topic)]
+            self.statistics['MessagesReceived'] += 1
 
-                if topic_handlers:
-                    # Note: every topic may be associated to one or more converter.
-                    # This means that a single MQTT message
-                    # may produce more than one message towards ThingsBoard. This also means that I cannot return after
-                    # the first successful conversion: I got to use all the available ones.
-                    # I will use a flag to understand whether at least one converter succeeded
-                    request_handled = False
+            # RPC responses to the fixed response topic are matched by the correlation data of the request ---------
+            if message.topic == self.__rpc_response_topic:
+                self.__process_correlated_rpc_response(message)
+                continue
 
-                    for topic in topic_handlers:
-                        available_converters = self.__mapping_sub_topics[topic]
-                        for converter in available_converters:
-                            try:
-                                # check if data is equal
-                                if converter.config.get('sendDataOnlyOnChange', False) and self.__topic_content.get(
-                                        message.topic) == content:
-                                    request_handled = True
-                                    continue
-
-                                self.__topic_content[message.topic] = content
-
-                                request_handled = self.put_data_to_convert(converter, message, content)
-                            except Exception as e:
-                                self.__log.exception(e)
-
-                    if not request_handled:
-                        self.__log.error('Cannot find converter for the topic:"%s"! Client: %s, User data: %s',
-                                         message.topic,
-                                         str(client),
-                                         str(userdata))
-
-                    # Note: if I'm in this branch, this was for sure a telemetry/attribute push message
-                    # => Execution must end here both in case of failure and success
+            # Check if message topic exists in mappings "i.e., I'm posting telemetry/attributes" -----------------------
+            available_converters = self.__mapping_sub_topics.match(message.topic)
+
+            if available_converters:
+                # Note: every topic may be associated to one or more converter.
+                # This means that a single MQTT message
+                # may produce more than one message towards ThingsBoard.
+                # Payload is decoded and converted by converter workers, so the message is only routed here.
+                # Workers convert messages in parallel, so changes of the content are checked here,
+                # in the order of receiving
+                available_converters = self.__get_converters_for_content(available_converters, message)
+                if not available_converters:
                     continue
 
-                # Check if message topic exists in connection handlers "i.e., I'm connecting a device" -----------------
-                topic_handlers = [regex for regex in self.__connect_requests_sub_topics if
-                                  fullmatch(regex, message.topic)]
+                request_handled = self.put_data_to_convert(available_converters, message)
 
-                if topic_handlers:
-                    for topic in topic_handlers:
-                        handler = self.__connect_requests_sub_topics[topic]
+                if not request_handled:
+                    self.__log.error('Cannot find converter for the topic:"%s"! Client: %s, User data: %s',
+                                     message.topic,
+                                     str(client),
+                                     str(userdata))
 
-                        # Get device name, either from topic or from content
-                        device_info = handler.get("deviceInfo", {})
+                # Note: if I'm in this branch, this was for sure a telemetry/attribute push message
+                # => Execution must end here both in case of failure and success
+                continue
 
-                        found_device_name, found_device_type = MqttConnector._parse_device_info(device_info,
-                                                                                                message.topic, content)
+            # Check if message topic exists in connection handlers "i.e., I'm connecting a device" ---------------------
+            topic_handlers = self.__connect_requests_sub_topics.match(message.topic)
 
-                        if found_device_name is None:
-                            self.__log.error("Device name missing from connection request")
-                            continue
+            if topic_handlers:
+                content = TBUtility.decode(message)
+                for handler in topic_handlers:
+                    # Get device name, either from topic or from content
+                    device_info = handler.get("deviceInfo", {})
 
-                        # Note: device must be added even if it is already known locally: else ThingsBoard
-                        # will not send RPCs and attribute updates
-                        self.__log.info("Connecting device %s of type %s", found_device_name, found_device_type)
-                        self.__gateway.add_device(found_device_name, {"connector": self}, device_type=found_device_type)
+                    found_device_name, found_device_type = MqttConnector._parse_device_info(device_info,
+                                                                                            message.topic, content)
 
-                    # Note: if I'm in this branch, this was for sure a connection message
-                    # => Execution must end here both in case of failure and success
-                    continue
+                    if found_device_name is None:
+                        self.__log.error("Device name missing from connection request")
+                        continue
+
+                    # Note: device must be added even if it is already known locally: else ThingsBoard
+                    # will not send RPCs and attribute updates
+                    self.__log.info("Connecting device %s of type %s", found_device_name, found_device_type)
+                    self.__gateway.add_device(found_device_name, {"connector": self}, device_type=found_device_type)
+
+                # Note: if I'm in this branch, this was for sure a connection message
+                # => Execution must end here both in case of failure and success
+                continue
+
+            # Check if message topic exists in disconnection handlers "i.e., I'm disconnecting a device" ---------------
+            topic_handlers = self.__disconnect_requests_sub_topics.match(message.topic)
+            if topic_handlers:
+                content = TBUtility.decode(message)
+                for handler in topic_handlers:
+                    # Get device name, either from topic or from content
+                    device_info = handler.get("deviceInfo", {})
+                    found_device_name, found_device_type = MqttConnector._parse_device_info(device_info,
+                                                                                            message.topic, content)
+
+                    if found_device_name is None:
+                        self.__log.error("Device name missing from disconnection request")
+                        continue
+
+                    if found_device_name in self.__gateway.get_devices():
+                        self.__log.info("Disconnecting device %s of type %s", found_device_name, found_device_type)
+                        self.__gateway.del_device(found_device_name)
+                    else:
+                        self.__log.info("Device %s was not connected", found_device_name)
 
-                # Check if message topic exists in disconnection handlers "i.e., I'm disconnecting a device" -----------
-                topic_handlers = [regex for regex in self.__disconnect_requests_sub_topics if
-                                  fullmatch(regex, message.topic)]
-                if topic_handlers:
-                    for topic in topic_handlers:
-                        handler = self.__disconnect_requests_sub_topics[topic]
+                    break
+
+                # Note: if I'm in this branch, this was for sure a disconnection message
+                # => Execution must end here both in case of failure and success
+                continue
+
+            # Check if message topic exists in attribute request handlers "i.e., I'm asking for a shared attribute"
+            topic_handlers = self.__attribute_requests_sub_topics.match(message.topic)
+            if topic_handlers:
+                content = TBUtility.decode(message)
+                try:
+                    for handler in topic_handlers:
+                        found_attribute_names = None
 
                         # Get device name, either from topic or from content
                         device_info = handler.get("deviceInfo", {})
-                        found_device_name, found_device_type = MqttConnector._parse_device_info(device_info,
-                                                                                                message.topic, content)
+                        found_device_name, _ = MqttConnector._parse_device_info(device_info, message.topic, content)
+
+                        # Get attribute name, either from topic or from content
+                        if handler.get("attributeNameExpressionSource") == "topic":
+                            attribute_name_match = search(handler["attributeNameExpression"], message.topic)
+                            if attribute_name_match is not None:
+                                found_attribute_names = attribute_name_match.group(0)
+                        elif handler.get("attributeNameExpressionSource") == "message" or handler.get(
+                                "attributeNameExpressionSource") == "constant":
+                            found_attribute_names = list(filter(lambda x: x is not None,
+                                                                TBUtility.get_values(
+                                                                    handler["attributeNameExpression"],
+                                                                    content)))
 
                         if found_device_name is None:
-                            self.__log.error("Device name missing from disconnection request")
+                            self.__log.error("Device name missing from attribute request")
                             continue
 
-                        if found_device_name in self.__gateway.get_devices():
-                            self.__log.info("Disconnecting device %s of type %s", found_device_name, found_device_type)
-                            self.__gateway.del_device(found_device_name)
-                        else:
-                            self.__log.info("Device %s was not connected", found_device_name)
+                        if found_attribute_names is None:
+                            self.__log.error("Attribute name missing from attribute request")
+                            continue
+
+                        self.__log.info("Will retrieve attribute %s of %s", found_attribute_names,
+                                        found_device_name)
+                        scope = 'shared'
+                        if handler.get('scope') is not None:
+                            scope = handler.get('scope')
+                        if content and TBUtility.get_value(f'${scope}', content, get_tag=True) is not None:
+                            scope = TBUtility.get_value(f'${scope}', content, get_tag=True)
+
+                        request_arguments = (
+                                found_device_name,
+                                found_attribute_names,
+                                lambda data, *args: self.notify_attribute(
+                                    data,
+                                    found_attribute_names,
+                                    handler.get("topicExpression"),
+                                    handler.get("valueExpression"),
+                                    handler.get('retain', False)))
 
+                        if scope == 'client':
+                            self.__gateway.tb_client.client.gw_request_client_attributes(*request_arguments)
+                        else:
+                            self.__gateway.tb_client.client.gw_request_shared_attributes(*request_arguments)
                         break
 
-                    # Note: if I'm in this branch, this was for sure a disconnection message
-                    # => Execution must end here both in case of failure and success
-                    continue
+                except Exception as e:
+                    self.__log.exception(e)
 
-                # Check if message topic exists in attribute request handlers "i.e., I'm asking for a shared attribute"
-                topic_handlers = [regex for regex in self.__attribute_requests_sub_topics if
-                                  fullmatch(regex, message.topic)]
-                if topic_handlers:
-                    try:
-                        for topic in topic_handlers:
-                            handler = self.__attribute_requests_sub_topics[topic]
-
-                            found_attribute_names = None
-
-                            # Get device name, either from topic or from content
-                            device_info = handler.get("deviceInfo", {})
-                            found_device_name, _ = MqttConnector._parse_device_info(device_info, message.topic, content)
-
-                            # Get attribute name, either from topic or from content
-                            if handler.get("attributeNameExpressionSource") == "topic":
-                                attribute_name_match = search(handler["attributeNameExpression"], message.topic)
-                                if attribute_name_match is not None:
-                                    found_attribute_names = attribute_name_match.group(0)
-                            elif handler.get("attributeNameExpressionSource") == "message" or handler.get(
-                                    "attributeNameExpressionSource") == "constant":
-                                found_attribute_names = list(filter(lambda x: x is not None,
-                                                                    TBUtility.get_values(
-                                                                        handler["attributeNameExpression"],
-                                                                        content)))
-
-                            if found_device_name is None:
-                                self.__log.error("Device name missing from attribute request")
-                                continue
-
-                            if found_attribute_names is None:
-                                self.__log.error("Attribute name missing from attribute request")
-                                continue
-
-                            self.__log.info("Will retrieve attribute %s of %s", found_attribute_names,
-                                            found_device_name)
-                            scope = 'shared'
-                            if handler.get('scope') is not None:
-                                scope = handler.get('scope')
-                            if content and TBUtility.get_value(f'${scope}', content, get_tag=True) is not None:
-                                scope = TBUtility.get_value(f'${scope}', content, get_tag=True)
-
-                            request_arguments = (
-                                    found_device_name,
-                                    found_attribute_names,
-                                    lambda data, *args: self.notify_attribute(
-                                        data,
-                                        found_attribute_names,
-                                        handler.get("topicExpression"),
-                                        handler.get("valueExpression"),
-                                        handler.get('retain', False)))
-
-                            if scope == 'client':
-                                self.__gateway.tb_client.client.gw_request_client_attributes(*request_arguments)
-                            else:
-                                self.__gateway.tb_client.client.gw_request_shared_attributes(*request_arguments)
-                            break
+                # Note: if I'm in this branch, this was for sure an attribute request message
+                # => Execution must end here both in case of failure and success
+                continue
 
-                    except Exception as e:
-                        self.__log.exception(e)
+            # Check if message topic exists in RPC handlers ------------------------------------------------------------
+            # The gateway is expecting for this message => no wildcards here, the topic must be evaluated as is
 
-                    # Note: if I'm in this branch, this was for sure an attribute request message
-                    # => Execution must end here both in case of failure and success
-                    continue
+            if self.__gateway.is_rpc_in_progress(message.topic):
+                self.__log.info("RPC response arrived. Forwarding it to thingsboard.")
+                self.__gateway.rpc_with_reply_processing(message.topic, TBUtility.decode(message))
+                continue
 
-                # Check if message topic exists in RPC handlers --------------------------------------------------------
-                # The gateway is expecting for this message => no wildcards here, the topic must be evaluated as is
+            self.__log.debug("Received message to topic \"%s\" with unknown interpreter data: \n\n\"%s\"",
+                             message.topic,
+                             message.payload)
 
-                if self.__gateway.is_rpc_in_progress(message.topic):
-                    self.__log.info("RPC response arrived. Forwarding it to thingsboard.")
-                    self.__gateway.rpc_with_reply_processing(message.topic, content)
-                    continue
+    def __process_correlated_rpc_response(self, message):
+        correlation_data = getattr(getattr(message, 'properties', None), 'CorrelationData', None)
+        expected_response_topic = self.__rpc_correlations.pop(correlation_data, None)
 
-                self.__log.debug("Received message to topic \"%s\" with unknown interpreter data: \n\n\"%s\"",
-                                 message.topic,
-                                 content)
+        if expected_response_topic is None or not self.__gateway.is_rpc_in_progress(expected_response_topic):
+            self.__log.warning("Received RPC response with unknown correlation data %r", correlation_data)
+            return
 
-            sleep(.2)
+        self.__log.info("RPC response arrived. Forwarding it to thingsboard.")
+        self.__gateway.rpc_with_reply_processing(expected_response_topic, TBUtility.decode(message))
 
     def notify_attribute(self, incoming_data, attribute_name, topic_expression, value_expression, retain):
         if incoming_data.get("device") is None or incoming_data.get("value", incoming_data.get('values')) is None:
@@ -796,7 +1001,16 @@ class MqttConnector(Connector, Thread):
         else:
             data = simplejson.dumps(attribute_values)
 
-        self._client.publish(topic, data, retain=retain).wait_for_publish()
+        self.__publish_attribute_data(topic_expression, topic, data, retain)
+
+    def __publish_attribute_data(self, topic_expression, topic, data, retain):
+        """Publishes attribute data to devices, returns False if the same data was already published to the topic."""
+        if (self.__shared_topics_coalescing_window and '${deviceName}' not in topic_expression
+                and not self.__shared_topics_content.update(topic, (data, retain))):
+            return False
+
+        self._publish(topic, data, retain)
+        return True
 
     @CollectAllReceivedBytesStatistics(start_stat_type='allReceivedBytesFromTB')
     def on_attributes_update(self, content):
@@ -832,9 +1046,13 @@ class MqttConnector(Connector, Thread):
                                 self.__log.exception("Cannot form topic, key %s - not found", e)
                                 raise e
 
-                            self._publish(topic, data, attribute_update.get('retain', False))
-                            self.__log.debug("Attribute Update data: %s for device %s to topic: %s", data,
-                                             content["device"], topic)
+                            if self.__publish_attribute_data(attribute_update["topicExpression"], topic, data,
+                                                             attribute_update.get('retain', False)):
+                                self.__log.debug("Attribute Update data: %s for device %s to topic: %s", data,
+                                                 content["device"], topic)
+                            else:
+                                self.__log.debug("Attribute Update data: %s for device %s is already published "
+                                                 "to shared topic: %s", data, content["device"], topic)
                         else:
                             self.__log.error("Cannot find attributeName by filter in message with data: %s", content)
                 else:
@@ -862,18 +1080,19 @@ class MqttConnector(Connector, Thread):
 
             timeout = time() * 1000 + rpc_config.get("responseTimeout")
 
-            # Start listening on the response topic
-            self.__log.info("Subscribing to: %s", expected_response_topic)
-            self.__subscribe(expected_response_topic, rpc_config.get("responseTopicQoS", 1))
+            # Start listening on the response topic, if it is not subscribed in advance
+            if not self.__rpc_response_sub_topics.match(expected_response_topic):
+                self.__log.info("Subscribing to: %s", expected_response_topic)
+                self.__subscribe(expected_response_topic, rpc_config.get("responseTopicQoS", 1))
 
-            # Wait for subscription to be carried out
-            sub_response_timeout = 10
+                # Wait for subscription to be carried out
+                sub_response_timeout = 10
 
-            while expected_response_topic in self.__subscribes_sent.values():
-                sub_response_timeout -= 1
-                sleep(0.1)
-                if sub_response_timeout == 0:
-                    break
+                while expected_response_topic in self.__subscribes_sent.values():
+                    sub_response_timeout -= 1
+                    sleep(0.1)
+                    if sub_response_timeout == 0:
+                        break
 
             # Ask the gateway to enqueue this as an RPC response
             self.__gateway.register_rpc_request_timeout(content,
@@ -909,10 +1128,25 @@ class MqttConnector(Connector, Thread):
         for (tag, value) in zip(data_to_send_tags, data_to_send_values):
             data_to_send = data_to_send.replace('${' + tag + '}', simplejson.dumps(value))
 
+        # MQTT 5 request/response: devices can reply to the fixed response topic with the request correlation data,
+        # the response is forwarded as if it was received on the expected response topic
+        properties = None
+        if self.__rpc_response_topic is not None and expects_response and defines_timeout:
+            correlation_data = f'{content.get("device", "")}/{content["data"]["id"]}'.encode('utf-8')
+            self.__rpc_correlations[correlation_data] = expected_response_topic
+            properties = Properties(PacketTypes.PUBLISH)
+            properties.ResponseTopic = self.__rpc_response_topic
+            properties.CorrelationData = correlation_data
+
         try:
             self.__log.info("Publishing to: %s with data %s", request_topic, data_to_send)
             try:
-                self._publish(request_topic, data_to_send, rpc_config.get('retain', False))
+                message_info = self._publish(request_topic, data_to_send, rpc_config.get('retain', False),
+                                             properties=properties)
+                # Attribute updates are not waited for, but RPC is acknowledged only when the request is sent
+                message_info.wait_for_publish(RPC_PUBLISH_TIMEOUT)
+                if not message_info.is_published():
+                    raise TimeoutError(f"Request is not published in {RPC_PUBLISH_TIMEOUT} seconds")
             except Exception as e:
                 self.__log.exception("Error during publishing to target broker: %r", e)
                 self.__gateway.send_rpc_reply(device=content["device"],
@@ -974,15 +1208,34 @@ class MqttConnector(Connector, Thread):
             return self.__process_rpc_request(content, content['data']['params'])
 
     @CustomCollectStatistics(start_stat_type='allBytesSentToDevices')
-    def _publish(self, request_topic, data_to_send, retain):
-        self._client.publish(request_topic, data_to_send, retain).wait_for_publish()
+    def _publish(self, request_topic, data_to_send, retain, properties=None):
+        # Publishing does not wait for every message to be sent, so fan-out of many messages is not serialized
+        # on the network loop; messages are sent in the order of publishing. Callers, that have to know
+        # that the message is sent, wait for the returned MQTTMessageInfo
+        message_info = self.__topic_aliases.publish(self._client, request_topic, data_to_send, retain=retain,
+                                                    properties=properties)
+        if message_info.rc != MQTT_ERR_SUCCESS:
+            raise ConnectionError(f"Cannot publish to {request_topic}: {error_string(message_info.rc)}")
+        return message_info
 
     def rpc_cancel_processing(self, topic):
+        for (correlation_data, expected_response_topic) in list(self.__rpc_correlations.items()):
+            if expected_response_topic == topic:
+                self.__rpc_correlations.pop(correlation_data, None)
+
+        if self.__rpc_response_sub_topics.match(topic):
+            self.__log.info("RPC canceled or terminated for %s", topic)
+            return
+
         self.__log.info("RPC canceled or terminated. Unsubscribing from %s", topic)
         self._client.unsubscribe(topic)
 
     def get_converters(self):
-        return [item[0] for _, item in self.__mapping_sub_topics.items()]
+        converters = []
+        for converter in self.__mapping_sub_topics.handlers():
+            if converter not in converters:
+                converters.append(converter)
+        return converters
 
     def update_converter_config(self, converter_name, config):
         self.__log.debug('Received remote converter configuration update for %s with configuration %s', converter_name,
@@ -1023,27 +1276,38 @@ class MqttConnector(Connector, Thread):
         self.__gateway.send_attributes({name: config})
 
     class ConverterWorker(Thread):
-        def __init__(self, name, incoming_queue, send_result):
+        """
+        Waits for messages in the queue and wakes up as soon as a message arrives.
+        All messages, that are already in the queue (up to batch size), are taken at once and passed to
+        convert_messages as one batch.
+        """
+
+        def __init__(self, name, incoming_queue, convert_messages, batch_size):
             super().__init__()
             self.stopped = False
             self.name = name
             self.daemon = True
             self.__msg_queue = incoming_queue
             self.in_progress = False
-            self.__send_result = send_result
+            self.__convert_messages = convert_messages
+            self.__batch_size = max(batch_size, 1)
 
         def run(self):
             while not self.stopped:
-                if not self.__msg_queue.empty():
-                    self.in_progress = True
-                    convert_function, config, incoming_data = self.__msg_queue.get(True, 100)
-                    converted_data = convert_function(config, incoming_data)
-                    if converted_data and (converted_data.get(ATTRIBUTES_PARAMETER) or
-                                           converted_data.get(TELEMETRY_PARAMETER)):
-                        self.__send_result(config, converted_data)
-                    self.in_progress = False
-                else:
-                    sleep(.2)
+                try:
+                    messages = [self.__msg_queue.get(timeout=QUEUE_GET_TIMEOUT)]
+                except Empty:
+                    continue
+
+                self.in_progress = True
+                try:
+                    while len(messages) < self.__batch_size:
+                        messages.append(self.__msg_queue.get_nowait())
+                except Empty:
+                    pass
+
+                self.__convert_messages(messages)
+                self.in_progress = False
 
         def stop(self):
             self.stopped = True
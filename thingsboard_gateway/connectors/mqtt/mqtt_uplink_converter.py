@@ -16,7 +16,23 @@ from thingsboard_gateway.connectors.converter import Converter, abstractmethod
 
 
 class MqttUplinkConverter(Converter):
+    # Converters with raw payload receive the payload bytes as is, without JSON parsing
+    RAW_PAYLOAD = False
 
     @abstractmethod
     def convert(self, config, data):
         pass
+
+    def convert_batch(self, messages):
+        """
+        Converts the list of (topic, data) messages and returns the list of converted data.
+        Converters can override it to process the whole batch at once.
+        """
+        converted_data = []
+        for (topic, data) in messages:
+            result = self.convert(topic, data)
+            if isinstance(result, list):
+                converted_data.extend(result)
+            elif result:
+                converted_data.append(result)
+        return converted_data
@@ -0,0 +1,94 @@
+#     Copyright 2024. ThingsBoard
+#
+#     Licensed under the Apache License, Version 2.0 (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+
+from collections import OrderedDict
+from threading import Lock
+
+from paho.mqtt.packettypes import PacketTypes
+from paho.mqtt.properties import Properties
+
+DEFAULT_TOPIC_ALIAS_MAXIMUM = 100
+DEFAULT_SEEN_TOPICS_CACHE_SIZE = 10000
+
+
+class TopicAliases:
+    """
+    Client side MQTT 5 topic aliases for publishing.
+    An alias saves the topic length minus 3 bytes (the alias property) on every message after the first one,
+    so it pays off only for topics, that are published repeatedly during the connection. An alias is assigned
+    to a topic on its second publication, the full topic and the alias are sent with it, next messages
+    to the topic are sent with empty topic and the alias.
+    The number of aliases is limited by the broker (Topic Alias Maximum of CONNACK). Assigned aliases are not
+    reassigned: with fan-out to more distinct topics, than the broker allows, reassigning would send the full topic
+    with an alias every time, so topics without an alias are published with the full topic only.
+    Aliases are valid only for the current connection, so they have to be reset on every connect.
+    """
+
+    def __init__(self, limit=DEFAULT_TOPIC_ALIAS_MAXIMUM, seen_topics_cache_size=DEFAULT_SEEN_TOPICS_CACHE_SIZE):
+        self.__limit = limit
+        self.__maximum = 0
+        self.__aliases = {}
+        self.__seen_topics = OrderedDict()
+        self.__seen_topics_cache_size = seen_topics_cache_size
+        self.__lock = Lock()
+
+    def reset(self, broker_maximum=0):
+        with self.__lock:
+            self.__maximum = min(broker_maximum or 0, self.__limit)
+            self.__aliases.clear()
+            self.__seen_topics.clear()
+
+    @property
+    def maximum(self):
+        return self.__maximum
+
+    def get_alias(self, topic):
+        """
+        Returns the topic to publish (empty if the alias is already known by the broker) and the alias
+        (None if the topic is published without alias).
+        """
+        alias = self.__aliases.get(topic)
+        if alias is not None:
+            return '', alias
+
+        if len(self.__aliases) >= self.__maximum:
+            return topic, None
+
+        if topic not in self.__seen_topics:
+            self.__seen_topics[topic] = True
+            if len(self.__seen_topics) > self.__seen_topics_cache_size:
+                self.__seen_topics.popitem(last=False)
+            return topic, None
+
+        del self.__seen_topics[topic]
+        alias = len(self.__aliases) + 1
+        self.__aliases[topic] = alias
+        return topic, alias
+
+    def publish(self, client, topic, payload=None, qos=0, retain=False, properties=None):
+        # Messages with QoS > 0 can be resent after reconnect, when the alias is not valid anymore
+        if not self.__maximum or qos:
+            return client.publish(topic, payload, qos, retain, properties)
+
+        # Alias assignment and publishing are done under the lock, so the broker always receives
+        # the message with the full topic before the messages with the alias only
+        with self.__lock:
+            topic_to_publish, alias = self.get_alias(topic)
+            if alias is None:
+                return client.publish(topic, payload, qos, retain, properties)
+
+            if properties is None:
+                properties = Properties(PacketTypes.PUBLISH)
+            properties.TopicAlias = alias
+            return client.publish(topic_to_publish, payload, qos, retain, properties)
@@ -0,0 +1,74 @@
+#     Copyright 2024. ThingsBoard
+#
+#     Licensed under the Apache License, Version 2.0 (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+
+DEFAULT_TOPIC_CONTENT_CACHE_SIZE = 100000
+
+
+class TopicContentCache:
+    """
+    Keeps 64-bit hashes of the latest payloads of topics for sendDataOnlyOnChange option.
+    Number of topics is limited, the least recently seen topics are evicted, so memory stays flat
+    with any number of distinct topics. If ttl (in milliseconds) is set, the same payload is treated
+    as changed once the ttl is passed since it was sent last time.
+    """
+
+    def __init__(self, max_size=DEFAULT_TOPIC_CONTENT_CACHE_SIZE, ttl=0):
+        self.__max_size = max_size
+        self.__ttl = ttl / 1000 if ttl else 0
+        self.__content = OrderedDict()
+        self.__lock = Lock()
+        self.__unchanged_count = 0
+        self.__evicted_count = 0
+        self.__expired_count = 0
+
+    def update(self, topic, payload) -> bool:
+        """Saves the hash of the payload for the topic and returns True if the payload was changed."""
+        content_hash = hash(payload)
+        now = monotonic()
+
+        with self.__lock:
+            latest = self.__content.get(topic)
+            if latest is not None:
+                self.__content.move_to_end(topic)
+                if latest[0] == content_hash:
+                    if not self.__ttl or now - latest[1] < self.__ttl:
+                        self.__unchanged_count += 1
+                        return False
+                    self.__expired_count += 1
+
+            self.__content[topic] = (content_hash, now)
+            if len(self.__content) > self.__max_size:
+                self.__content.popitem(last=False)
+                self.__evicted_count += 1
+            return True
+
+    def clear(self):
+        with self.__lock:
+            self.__content.clear()
+
+    def __len__(self):
+        return len(self.__content)
+
+    def get_statistics(self):
+        with self.__lock:
+            return {
+                'topicContentCacheSize': len(self.__content),
+                'topicContentCacheEvictions': self.__evicted_count,
+                'topicContentCacheExpirations': self.__expired_count,
+                'topicContentUnchanged': self.__unchanged_count
+            }
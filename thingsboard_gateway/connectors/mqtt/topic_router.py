@@ -0,0 +1,138 @@
+#     Copyright 2024. ThingsBoard
+#
+#     Licensed under the Apache License, Version 2.0 (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+
+from collections import OrderedDict
+from threading import Lock
+
+SINGLE_LEVEL_WILDCARD = '+'
+MULTI_LEVEL_WILDCARD = '#'
+DEFAULT_TOPICS_CACHE_SIZE = 10000
+
+
+class _TopicTrieNode:
+    __slots__ = ('children', 'handlers')
+
+    def __init__(self):
+        self.children = {}
+        self.handlers = []
+
+
+class TopicRouter:
+    """
+    Routes topics of incoming messages to handlers, subscribed with MQTT topic filters.
+    Filters are kept in a trie with one node per topic level, so matching a topic costs O(topic depth)
+    instead of checking every filter. Results for recently seen topics are kept in the LRU cache.
+    """
+
+    def __init__(self, cache_size=DEFAULT_TOPICS_CACHE_SIZE):
+        self.__root = _TopicTrieNode()
+        self.__handlers_count = 0
+        self.__cache_size = cache_size
+        self.__cache = OrderedDict()
+        self.__lock = Lock()
+
+    @staticmethod
+    def get_routing_filter(topic_filter: str):
+        """
+        Returns topic filter that is used to match topics of messages.
+        Shared subscription prefix ($share/group/) is removed, because messages are published to the original topic
+        (an exception is aws topics that do not support shared subscription).
+        """
+        if topic_filter.startswith('$') and not topic_filter.startswith('$aws'):
+            return '/'.join(topic_filter.split('/')[2:])
+        return topic_filter
+
+    def add(self, topic_filter: str, handler):
+        with self.__lock:
+            node = self.__root
+            for level in self.get_routing_filter(topic_filter).split('/'):
+                child = node.children.get(level)
+                if child is None:
+                    child = node.children[level] = _TopicTrieNode()
+                node = child
+
+            node.handlers.append((self.__handlers_count, handler))
+            self.__handlers_count += 1
+            self.__cache.clear()
+
+    def clear(self):
+        with self.__lock:
+            self.__root = _TopicTrieNode()
+            self.__handlers_count = 0
+            self.__cache.clear()
+
+    def __len__(self):
+        return self.__handlers_count
+
+    def handlers(self):
+        """Returns all handlers in the order they were added."""
+        found = []
+        nodes = [self.__root]
+        while nodes:
+            node = nodes.pop()
+            found.extend(node.handlers)
+            nodes.extend(node.children.values())
+        return [handler for (_, handler) in sorted(found, key=lambda item: item[0])]
+
+    def match(self, topic: str):
+        """Returns tuple of handlers with filters matching the topic, in the order they were added."""
+        with self.__lock:
+            handlers = self.__cache.get(topic)
+            if handlers is not None:
+                self.__cache.move_to_end(topic)
+                return handlers
+
+            handlers = self.__match(topic)
+            self.__cache[topic] = handlers
+            if len(self.__cache) > self.__cache_size:
+                self.__cache.popitem(last=False)
+            return handlers
+
+    def __match(self, topic):
+        found = []
+        nodes = [self.__root]
+        # Wildcards on the first level do not match topics starting with "$", e.g. "$SYS/..."
+        system_topic = topic.startswith('$')
+
+        for (index, level) in enumerate(topic.split('/')):
+            wildcards_allowed = index > 0 or not system_topic
+            next_nodes = []
+            for node in nodes:
+                if wildcards_allowed:
+                    multi_level = node.children.get(MULTI_LEVEL_WILDCARD)
+                    if multi_level is not None:
+                        found.extend(multi_level.handlers)
+
+                    single_level = node.children.get(SINGLE_LEVEL_WILDCARD)
+                    if single_level is not None:
+                        next_nodes.append(single_level)
+
+                child = node.children.get(level)
+                if child is not None:
+                    next_nodes.append(child)
+
+            nodes = next_nodes
+            if not nodes:
+                break
+        else:
+            for node in nodes:
+                found.extend(node.handlers)
+                # "sport/#" matches "sport" as well
+                multi_level = node.children.get(MULTI_LEVEL_WILDCARD)
+                if multi_level is not None:
+                    found.extend(multi_level.handlers)
+
+        if len(found) > 1:
+            found.sort(key=lambda item: item[0])
+        return tuple(handler for (_, handler) in found)
@@ -12,7 +12,6 @@
 #     See the License for the specific language governing permissions and
 #     limitations under the License.
 
-import asyncio
 import base64
 import re
 import ssl
@@ -25,6 +24,7 @@ from time import sleep
 from simplejson import dumps
 
 from thingsboard_gateway.connectors.connector import Connector
+from thingsboard_gateway.gateway.async_runtime import AsyncRuntime
 from thingsboard_gateway.gateway.statistics.decorators import CollectAllReceivedBytesStatistics
 from thingsboard_gateway.gateway.statistics.statistics_service import StatisticsService
 from thingsboard_gateway.tb_utility.tb_utility import TBUtility
@@ -52,7 +52,7 @@ class NotAuthorized(Exception):
     """Charge Point not authorized"""
 
 
-class OcppConnector(Connector, Thread):
+class OcppConnector(Connector):
     DATA_TO_CONVERT = Queue(-1)
     DATA_TO_SEND = Queue(-1)
 
@@ -90,27 +90,23 @@ class OcppConnector(Connector, Thread):
         self._data_convert_thread = Thread(name='Convert Data Thread', daemon=True, target=self._process_data)
         self._data_send_thread = Thread(name='Send Data Thread', daemon=True, target=self._send_data)
 
-        self.__loop = asyncio.new_event_loop()
+        # The central system runs in the event loop, shared by all asynchronous connectors
+        self.__runtime = AsyncRuntime.get_instance()
+        self.__main_task = None
 
         self.__connected = False
         self.__stopped = False
-        self.daemon = True
 
     def open(self):
         self.__stopped = False
-        self.start()
+        self._data_convert_thread.start()
+        self._data_send_thread.start()
+        self.__main_task = self.__runtime.submit(self.start_server())
         self._log.info("Starting OCPP Connector")
 
     def get_type(self):
         return self._connector_type
 
-    def run(self):
-        self._data_convert_thread.start()
-        self._data_send_thread.start()
-
-        self.__loop.create_task(self.start_server())
-        self.__loop.run_forever()
-
     async def start_server(self):
         host = self._central_system_config.get('host', '0.0.0.0')
         port = self._central_system_config.get('port', 9000)
@@ -121,6 +117,10 @@ class OcppConnector(Connector, Thread):
 
         await self._server.wait_closed()
 
+    async def __stop_server(self):
+        self._server.close()
+        await self._server.wait_closed()
+
     def _auth(self, websocket):
         for sec in self._central_system_config['security']:
             if sec['type'].lower() == 'token' and websocket.request_headers['authorization'] in sec['tokens']:
@@ -211,14 +211,14 @@ class OcppConnector(Connector, Thread):
         self.__stopped = True
         self.__connected = False
 
-        tasks = asyncio.all_tasks(self.__loop)
-        for task in tasks:
-            task.cancel()
-
-        for socket in self._server.server.sockets:
-            socket._sock.close()
-
-        self.__loop.stop()
+        # Connections of charge points are closed with the server, other connectors use the same event loop
+        if self._server is not None:
+            try:
+                self.__runtime.run(self.__stop_server(), timeout=10)
+            except Exception as e:
+                self._log.warning('Central System was not stopped: %s', e)
+        if self.__main_task is not None:
+            self.__main_task.cancel()
 
         self._log.info('%s has been stopped.', self.get_name())
         self._log.stop()
@@ -289,11 +289,8 @@ class OcppConnector(Connector, Thread):
                             .replace("${attributeValue}", str(attr_value))
                         request = call.DataTransferPayload('1', data=data)
 
-                        task = self.__loop.create_task(self._send_request(charge_point, request))
-                        while not task.done():
-                            sleep(.2)
-
-                        self._log.debug(task.result())
+                        result = self.__runtime.run(self._send_request(charge_point, request))
+                        self._log.debug(result)
         except Exception as e:
             self._log.exception(e)
 
@@ -323,12 +320,10 @@ class OcppConnector(Connector, Thread):
 
                     request = call.DataTransferPayload('1', data=data_to_send)
 
-                    task = self.__loop.create_task(self._send_request(charge_point, request))
-                    while not task.done():
-                        sleep(.2)
+                    result = self.__runtime.run(self._send_request(charge_point, request))
 
                     if rpc.get('withResponse', True):
-                        self._gateway.send_rpc_reply(content["device"], content["data"]["id"], str(task.result()))
+                        self._gateway.send_rpc_reply(content["device"], content["data"]["id"], str(result))
 
                         return
         except Exception as e:
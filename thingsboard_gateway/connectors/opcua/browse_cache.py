@@ -0,0 +1,205 @@
+#     Copyright 2024. ThingsBoard
+#
+#     Licensed under the Apache License, Version 2.0 (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+
+from hashlib import sha1
+from pathlib import Path
+
+from simplejson import dumps, loads
+
+PATH_SEPARATOR = '\\.'
+
+
+class BrowseCache:
+    """
+    Persistent cache of browse results: nodes, found by browse patterns, qualified browse paths and NodeIds of
+    resolved browse paths.
+    The cache file is selected by server URI and namespace array of the server, so the cache is not used if the
+    server is replaced or its namespaces are changed.
+    """
+
+    def __init__(self, directory, logger, enabled=True):
+        self._log = logger
+        self.__directory = directory
+        self.__enabled = enabled
+        self.__file_name = None
+        self.__changed = False
+        self.__patterns = {}
+        self.__qualified_paths = {}
+        self.__node_ids = {}
+        # NodeId -> browse path, used to find browse paths of nodes, reported by model change events
+        self.__paths_by_node_id = {}
+
+    @staticmethod
+    def get_file_name(server_uri, namespace_array):
+        return sha1(dumps([server_uri, namespace_array]).encode('utf-8')).hexdigest() + '.json'
+
+    @staticmethod
+    def path_to_key(path):
+        return path if isinstance(path, str) else PATH_SEPARATOR.join(path)
+
+    @staticmethod
+    def is_in_subtree(key, root_key):
+        return key == root_key or key.startswith(root_key + PATH_SEPARATOR)
+
+    @staticmethod
+    def get_resolved_part(key):
+        """Returns qualified part of the path, e.g. "0:Objects\\.2:Device\\.Temperature" -> "0:Objects\\.2:Device"."""
+        path = key.split(PATH_SEPARATOR)
+        while path and len(path[-1].split(':')) < 2:
+            path.pop()
+        return PATH_SEPARATOR.join(path)
+
+    def load(self, server_uri, namespace_array):
+        self.__patterns = {}
+        self.__qualified_paths = {}
+        self.__node_ids = {}
+        self.__paths_by_node_id = {}
+        self.__changed = False
+        self.__file_name = self.get_file_name(server_uri, namespace_array)
+
+        if not self.__enabled:
+            return
+
+        cache_file = Path(self.__directory, self.__file_name)
+        if not cache_file.exists():
+            self._log.debug('Browse cache file %s not found', self.__file_name)
+            return
+
+        try:
+            content = loads(cache_file.read_text(encoding='utf-8'))
+            self.__patterns = content.get('patterns', {})
+            self.__qualified_paths = content.get('qualifiedPaths', {})
+            self.__node_ids = content.get('nodeIds', {})
+            self.__paths_by_node_id = {node_id: key for key, node_id in self.__node_ids.items()}
+            self._log.info('Loaded %i cached browse paths from %s', len(self.__node_ids), self.__file_name)
+        except Exception as e:
+            self._log.error('Failed to load browse cache from %s: %s', self.__file_name, e)
+
+    def save(self):
+        changes = self.get_changes()
+        if changes is not None:
+            self.write(*changes)
+
+    def get_changes(self):
+        """
+        Returns file name and serialized content of the cache, if it was changed after the last save, else None.
+        The content is serialized in the thread, that changes the cache, so the file can be written by another one.
+        """
+        if not self.__enabled or not self.__changed or self.__file_name is None:
+            return None
+
+        self.__changed = False
+        return self.__file_name, dumps({
+            'patterns': self.__patterns,
+            'qualifiedPaths': self.__qualified_paths,
+            'nodeIds': self.__node_ids
+        })
+
+    def write(self, file_name, content):
+        try:
+            Path(self.__directory).mkdir(exist_ok=True)
+            Path(self.__directory, file_name).write_text(content, encoding='utf-8')
+            self._log.debug('Saved browse cache to %s', file_name)
+        except Exception as e:
+            # Changes will be saved again next time
+            self.__changed = True
+            self._log.error('Failed to save browse cache to %s: %s', file_name, e)
+
+    def get_nodes(self, pattern):
+        return self.__patterns.get(pattern)
+
+    def set_nodes(self, pattern, nodes):
+        self.__set(self.__patterns, pattern, nodes)
+
+    def get_qualified_path(self, path):
+        return self.__qualified_paths.get(self.path_to_key(path))
+
+    def set_qualified_path(self, path, qualified_path):
+        self.__set(self.__qualified_paths, self.path_to_key(path), qualified_path)
+
+    def get_node_id(self, path):
+        return self.__node_ids.get(self.path_to_key(path))
+
+    def set_node_id(self, path, node_id):
+        key = self.path_to_key(path)
+        previous_node_id = self.__node_ids.get(key)
+        if previous_node_id is not None and self.__paths_by_node_id.get(previous_node_id) == key:
+            del self.__paths_by_node_id[previous_node_id]
+        if node_id is not None:
+            self.__paths_by_node_id[node_id] = key
+        self.__set(self.__node_ids, key, node_id)
+
+    def get_node_ids(self):
+        return dict(self.__node_ids)
+
+    def get_path(self, node_id):
+        return self.__paths_by_node_id.get(node_id)
+
+    def invalidate_patterns(self):
+        if self.__patterns:
+            self.__patterns = {}
+            self.__changed = True
+
+    def invalidate(self, path, children_only=False, child_name=None):
+        """
+        Removes cached browse results, which depend on the node with the given path.
+        If the node was deleted, the whole subtree of the node is removed. If only children of the node were changed
+        (children_only), cached NodeIds stay valid and only results, found by browsing children of the node, are
+        removed; if the name of the new child is known, only results with the same name on the next level are removed.
+        """
+        root_key = self.path_to_key(path)
+        root_path = root_key.split(PATH_SEPARATOR) if root_key else []
+
+        if not children_only:
+            for key in [key for key in self.__node_ids if self.is_in_subtree(key, root_key)]:
+                self.set_node_id(key, None)
+
+        for key, qualified_paths in list(self.__qualified_paths.items()):
+            if children_only:
+                changed = self.__is_browsed_through(key.split(PATH_SEPARATOR), root_path, child_name)
+            else:
+                changed = (self.is_in_subtree(key, root_key)
+                           or any(self.is_in_subtree(self.path_to_key(qualified_path), root_key)
+                                  for qualified_path in qualified_paths))
+            if changed:
+                self.__set(self.__qualified_paths, key, None)
+
+        for pattern, nodes in list(self.__patterns.items()):
+            if children_only:
+                pattern_path = pattern.split(PATH_SEPARATOR)
+                if pattern_path and pattern_path[0].lower() == 'root':
+                    pattern_path = pattern_path[1:]
+                changed = self.__is_browsed_through(pattern_path, root_path, child_name)
+            else:
+                changed = any(self.is_in_subtree(self.path_to_key(node), root_key) for node in nodes)
+            if changed:
+                self.__set(self.__patterns, pattern, None)
+
+    @staticmethod
+    def __is_browsed_through(path, node_path, child_name):
+        """Checks, that children of the node were browsed to find the path and the new child can be found by it."""
+        if len(node_path) >= len(path):
+            return False
+        if any(element.split(':')[-1] != node_element.split(':', 1)[-1]
+               for element, node_element in zip(path, node_path)):
+            return False
+        return child_name is None or path[len(node_path)].split(':')[-1] == child_name
+
+    def __set(self, cache, key, value):
+        if value is None:
+            if cache.pop(key, None) is not None:
+                self.__changed = True
+        elif cache.get(key) != value:
+            cache[key] = value
+            self.__changed = True
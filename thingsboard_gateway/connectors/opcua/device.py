@@ -14,6 +14,10 @@
 
 import re
 
+# Parameters of monitored items, that can be set for a node, a device (mapping entry) or the server
+MONITORING_PARAMETERS = ('publishingIntervalInMillis', 'samplingIntervalInMillis', 'queueSize', 'deadbandType',
+                         'deadbandValue')
+
 
 class Device:
     def __init__(self, path, name, config, converter, converter_for_sub, logger):
@@ -29,7 +33,8 @@ class Device:
             'attributes': []
         }
         self.nodes = []
-        self.subscription = None
+        # Node configurations, compiled by the converter, or the nodes for custom converters
+        self.conversion_plan = []
         self.nodes_data_change_subscriptions = {}
 
         self.load_values()
@@ -42,13 +47,17 @@ class Device:
         for section in ('attributes', 'timeseries'):
             for node_config in self.config.get(section, []):
                 try:
+                    monitoring_parameters = {name: node_config[name] for name in MONITORING_PARAMETERS
+                                             if name in node_config}
                     if re.search(r"(ns=\d+;[isgb]=[^}]+)", node_config['value']):
                         child = re.search(r"(ns=\d+;[isgb]=[^}]+)", node_config['value'])
-                        self.values[section].append({'path': child.groups()[0], 'key': node_config['key']})
+                        self.values[section].append({'path': child.groups()[0], 'key': node_config['key'],
+                                                     **monitoring_parameters})
                     elif re.search(r"\${([A-Za-z.:\\\d]+)}", node_config['value']):
                         child = re.search(r"\${([A-Za-z.:\\\d]+)", node_config['value'])
                         self.values[section].append(
-                            {'path': self.path + child.groups()[0].split('\\.'), 'key': node_config['key']})
+                            {'path': self.path + child.groups()[0].split('\\.'), 'key': node_config['key'],
+                             **monitoring_parameters})
 
                 except KeyError as e:
                     self._log.error('Invalid config for %s (key %s not found)', node_config, e)
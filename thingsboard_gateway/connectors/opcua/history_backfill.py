@@ -0,0 +1,124 @@
+#     Copyright 2024. ThingsBoard
+#
+#     Licensed under the Apache License, Version 2.0 (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+
+from datetime import timedelta
+
+from asyncua import ua
+
+
+class HistoryBackfill:
+    """
+    Last received source timestamps of nodes, used to read values, changed during connection gaps, from the history
+    of the server.
+    Timestamps are updated from the converting threads and read from the event loop, so the dictionary is only
+    copied or updated by single operations.
+    """
+
+    def __init__(self, logger, values_per_node=1000, max_period_in_millis=3600000):
+        self._log = logger
+        self.__values_per_node = values_per_node
+        self.__max_period = timedelta(milliseconds=max_period_in_millis)
+        self.__timestamps = {}
+
+    def update(self, node_id, data_value):
+        timestamp = data_value.SourceTimestamp
+        if timestamp is None:
+            return
+
+        last_timestamp = self.__timestamps.get(node_id)
+        if last_timestamp is None or timestamp > last_timestamp:
+            self.__timestamps[node_id] = timestamp
+
+    def get_start_times(self, node_ids, end_time):
+        """Returns the first not received timestamp of every node, but not earlier than the maximal backfill period."""
+        timestamps = dict(self.__timestamps)
+        earliest_time = end_time - self.__max_period
+        start_times = {}
+        for node_id in node_ids:
+            timestamp = timestamps.get(node_id)
+            if timestamp is not None and timestamp < end_time:
+                start_times[node_id] = max(timestamp + timedelta(microseconds=1), earliest_time)
+        return start_times
+
+    async def read(self, history_read, start_times, end_time, nodes_per_request):
+        """
+        Reads raw history of nodes from their start times to the end time and yields lists of (NodeId, data values)
+        for every response, so at most nodes_per_request * values_per_node values are kept in memory.
+        Nodes with close start times are read with the same requests, values, which were already received, are skipped.
+        """
+        node_ids = sorted(start_times, key=start_times.get)
+        for index in range(0, len(node_ids), nodes_per_request):
+            chunk = node_ids[index:index + nodes_per_request]
+            details = ua.ReadRawModifiedDetails()
+            details.IsReadModified = False
+            details.StartTime = start_times[chunk[0]]
+            details.EndTime = end_time
+            details.NumValuesPerNode = self.__values_per_node
+            details.ReturnBounds = False
+
+            # NodeId -> continuation point, nodes without continuation points are read from the start time
+            continuation_points = dict.fromkeys(chunk)
+            try:
+                while continuation_points:
+                    requested_node_ids = list(continuation_points)
+                    results = await history_read(self.__create_parameters(details, continuation_points))
+
+                    history = []
+                    next_continuation_points = {}
+                    for node_id, result in zip(requested_node_ids, results):
+                        if not result.StatusCode.is_good():
+                            self._log.debug('History of %s was not read: %s', node_id.to_string(),
+                                            result.StatusCode.name)
+                            continue
+
+                        data_values = [data_value for data_value in (result.HistoryData.DataValues or [])
+                                       if data_value.SourceTimestamp is None
+                                       or data_value.SourceTimestamp >= start_times[node_id]]
+                        if data_values:
+                            history.append((node_id, data_values))
+                            for data_value in data_values:
+                                self.update(node_id, data_value)
+
+                        # The server returns the same continuation point, if it is not making progress
+                        if result.ContinuationPoint and result.ContinuationPoint != continuation_points[node_id]:
+                            next_continuation_points[node_id] = result.ContinuationPoint
+
+                    continuation_points = next_continuation_points
+                    if history:
+                        yield history
+            finally:
+                continuation_points = {node_id: continuation_point
+                                       for node_id, continuation_point in continuation_points.items()
+                                       if continuation_point is not None}
+                if continuation_points:
+                    await self.__release_continuation_points(history_read, details, continuation_points)
+
+    async def __release_continuation_points(self, history_read, details, continuation_points):
+        try:
+            await history_read(self.__create_parameters(details, continuation_points, release=True))
+        except Exception as e:
+            self._log.debug('Failed to release history continuation points: %s', e)
+
+    @staticmethod
+    def __create_parameters(details, continuation_points, release=False):
+        params = ua.HistoryReadParameters()
+        params.HistoryReadDetails = details
+        params.TimestampsToReturn = ua.TimestampsToReturn.Both
+        params.ReleaseContinuationPoints = release
+        for node_id, continuation_point in continuation_points.items():
+            value_id = ua.HistoryReadValueId()
+            value_id.NodeId = node_id
+            value_id.ContinuationPoint = continuation_point
+            params.NodesToRead.append(value_id)
+        return params
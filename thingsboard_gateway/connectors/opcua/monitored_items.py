@@ -0,0 +1,50 @@
+#     Copyright 2024. ThingsBoard
+#
+#     Licensed under the Apache License, Version 2.0 (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+
+from asyncua import ua
+
+
+def create_monitored_item_request(node_id, client_handle, data_change_filter, queue_size, sampling_interval):
+    """Returns request of a data change monitored item, client handles are generated by the connector."""
+    item_to_monitor = ua.ReadValueId()
+    item_to_monitor.NodeId = node_id
+    item_to_monitor.AttributeId = ua.AttributeIds.Value
+
+    parameters = ua.MonitoringParameters()
+    parameters.ClientHandle = client_handle
+    parameters.SamplingInterval = sampling_interval
+    parameters.QueueSize = queue_size
+    parameters.DiscardOldest = True
+    if data_change_filter is not None:
+        parameters.Filter = data_change_filter
+
+    request = ua.MonitoredItemCreateRequest()
+    request.ItemToMonitor = item_to_monitor
+    request.MonitoringMode = ua.MonitoringMode.Reporting
+    request.RequestedParameters = parameters
+    return request
+
+
+def get_restored_server_handles(subscription):
+    """
+    Returns server handles of monitored items by client handles, after the subscription was recreated by the client
+    on a new session. Client handles are kept by asyncua, but new server handles are stored only in the private state
+    of the subscription (asyncua 2.1), so None is returned, if the state is not available.
+    """
+    monitored_items = getattr(subscription, '_monitored_items', None)
+    if not isinstance(monitored_items, dict):
+        return None
+
+    return {client_handle: item.server_handle for client_handle, item in monitored_items.items()
+            if getattr(item, 'server_handle', None) is not None}
@@ -15,6 +15,9 @@
 import asyncio
 import re
 from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from itertools import count
+from os import path as os_path
 from queue import Queue, Empty
 from random import choice
 from string import ascii_lowercase
@@ -23,11 +26,18 @@ from time import sleep, monotonic, time
 from typing import List
 
 from asyncua.ua import DataValue
+from packaging import version
 
 from thingsboard_gateway.connectors.connector import Connector
 from thingsboard_gateway.connectors.opcua.backward_compatibility_adapter import BackwardCompatibilityAdapter
-from thingsboard_gateway.connectors.opcua.device import Device
-from thingsboard_gateway.connectors.opcua.opcua_uplink_converter import OpcUaUplinkConverter
+from thingsboard_gateway.connectors.opcua.browse_cache import BrowseCache
+from thingsboard_gateway.connectors.opcua.device import Device, MONITORING_PARAMETERS
+from thingsboard_gateway.connectors.opcua.history_backfill import HistoryBackfill
+from thingsboard_gateway.connectors.opcua.monitored_items import create_monitored_item_request, \
+    get_restored_server_handles
+from thingsboard_gateway.connectors.opcua.opcua_uplink_converter import OpcUaUplinkConverter, ConversionPlan
+from thingsboard_gateway.connectors.opcua.subscription_nodes_index import SubscriptionNodesIndex
+from thingsboard_gateway.gateway.async_runtime import AsyncRuntime
 from thingsboard_gateway.gateway.constants import CONNECTOR_PARAMETER, RECEIVED_TS_PARAMETER, CONVERTED_TS_PARAMETER, \
     DATA_RETRIEVING_STARTED
 from thingsboard_gateway.gateway.entities.converted_data import ConvertedData
@@ -37,13 +47,21 @@ from thingsboard_gateway.tb_utility.tb_loader import TBModuleLoader
 from thingsboard_gateway.tb_utility.tb_logger import init_logger
 from thingsboard_gateway.tb_utility.tb_utility import TBUtility
 
-try:
-    import asyncua
-except (ImportError, ModuleNotFoundError):
-    print("OPC-UA library not found")
-    TBUtility.install_package("asyncua")
-    import asyncua
-
+# Restoring of sessions and subscriptions by the client (auto_reconnect options, client state, subscription
+# observers) requires asyncua 2.1.0
+required_version = '2.1.0'
+asyncua_package = TBUtility.get_package_version('asyncua')
+if asyncua_package is None:
+    print("OPC-UA library not found - installing...")
+    TBUtility.install_package("asyncua", ">=" + required_version)
+elif version.parse(asyncua_package.version) < version.parse(required_version):
+    print("OPC-UA library is outdated - installing...")
+    TBUtility.install_package("asyncua", required_version, force_install=True)
+
+import asyncua
+
+from asyncua.client.ua_client import UaClientState
+from asyncua.observer import Observer, SubscriptionEvent
 from asyncua.crypto.security_policies import SecurityPolicyBasic256Sha256, SecurityPolicyBasic256, \
     SecurityPolicyBasic128Rsa15
 from asyncua.ua.uaerrors import UaStatusCodeError, BadNodeIdUnknown, BadConnectionClosed, \
@@ -52,6 +70,33 @@ from asyncua.ua.uaerrors import UaStatusCodeError, BadNodeIdUnknown, BadConnecti
 
 DEFAULT_UPLINK_CONVERTER = 'OpcUaUplinkConverter'
 
+# Model change events of the same publishing interval are handled with one rescan
+MODEL_CHANGE_PUBLISHING_INTERVAL = 1000
+
+# Used when the server does not report the limit of nodes per service call
+DEFAULT_MAX_NODES_PER_REQUEST = 1000
+
+OPERATION_LIMITS = {
+    'browse': asyncua.ua.ObjectIds.Server_ServerCapabilities_OperationLimits_MaxNodesPerBrowse,
+    'translate': asyncua.ua.ObjectIds.Server_ServerCapabilities_OperationLimits_MaxNodesPerTranslateBrowsePathsToNodeIds,
+    'read': asyncua.ua.ObjectIds.Server_ServerCapabilities_OperationLimits_MaxNodesPerRead,
+    'monitor': asyncua.ua.ObjectIds.Server_ServerCapabilities_OperationLimits_MaxMonitoredItemsPerCall,
+    'history': asyncua.ua.ObjectIds.Server_ServerCapabilities_OperationLimits_MaxNodesPerHistoryReadData
+}
+
+# History of nodes is read in small requests and the next request is sent only after converting of the previous
+# responses, so history of the whole gap is not kept in memory
+HISTORY_BACKFILL_NODES_PER_REQUEST = 100
+HISTORY_BACKFILL_MAX_QUEUED_RESPONSES = 4
+
+# Used when the sampling interval of monitored items is not configured
+DEFAULT_SAMPLING_INTERVAL_IN_MILLIS = 50
+
+DEADBAND_TYPES = {
+    'absolute': asyncua.ua.DeadbandType.Absolute,
+    'percent': asyncua.ua.DeadbandType.Percent
+}
+
 SECURITY_POLICIES = {
     "Basic128Rsa15": SecurityPolicyBasic128Rsa15,
     "Basic256": SecurityPolicyBasic256,
@@ -65,7 +110,7 @@ MESSAGE_SECURITY_MODES = {
 }
 
 
-class OpcUaConnector(Connector, Thread):
+class OpcUaConnector(Connector):
     def __init__(self, gateway, config, connector_type):
         self.statistics = {'MessagesReceived': 0,
                            'MessagesSent': 0}
@@ -104,18 +149,31 @@ class OpcUaConnector(Connector, Thread):
         self.__sub_data_to_convert = Queue(-1)
         self.__data_to_convert = Queue(-1)
 
-        try:
-            self.__loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(self.__loop)
-        except RuntimeError:
-            self.__loop = asyncio.get_event_loop()
+        # The client runs in the event loop, shared by all asynchronous connectors
+        self.__runtime = AsyncRuntime.get_instance()
+        self.__loop = self.__runtime.loop
+        self.__main_task = None
 
         self.__client: asyncua.Client = None
-        self.__subscription = None
+        # Lost sessions are restored by the client: the session is activated again on a new secure channel or
+        # subscriptions are transferred to a new session, so devices are not subscribed from scratch
+        self.__auto_reconnect = self.__server_conf.get('autoReconnect', True)
+        self.__reconnect_max_delay = self.__server_conf.get('reconnectMaxDelayInMillis', 30000) / 1000
+        self.__session_restore_timeout = self.__server_conf.get('sessionRestoreTimeoutInMillis', 60000) / 1000
+        self.__session_lost = False
+        # Authentication token of the lost session, used to check, that the session was kept by the server
+        self.__session_token = None
+        self.__session_observer = SessionObserver(self.__log)
+        # Server URI and namespace array of the server, data type definitions were loaded from
+        self.__server_info = None
+        self.__data_types_server_info = None
+        # Data change subscriptions, shared by all devices, by publishing interval
+        self.__subscriptions = {}
+        # Client handles of monitored items, unique for all subscriptions of the connector
+        self.__client_handles = count(1)
 
         self.__connected = False
         self.__stopped = False
-        self.daemon = True
 
         self.__thread_pool_executor = ThreadPoolExecutor(max_workers=8)
         self.__thread_pool_executor_processor_thread = Thread(name='Thread Pool Executor Processor',
@@ -123,13 +181,44 @@ class OpcUaConnector(Connector, Thread):
                                                               daemon=True)
         self.__thread_pool_executor_processor_thread.start()
 
+        self.__operation_limits = {}
+        # Read requests of polling, that can be sent to the server at the same time, the semaphore is created in the
+        # event loop
+        self.__max_concurrent_reads = max(self.__server_conf.get('maxConcurrentReads', 4), 1)
+        self.__reads_semaphore = None
+
+        # Resolved browse paths are stored on disk, so reconnects and restarts do not browse the server again
+        self.__browse_cache = BrowseCache(self.__gateway.get_config_path() + "opcua" + os_path.sep, self.__log,
+                                          enabled=self.__server_conf.get('enableBrowseCache', True))
+        # Changes of the server address space, reported by model change events: NodeId -> verbs of changes
+        self.__model_changes = {}
+        self.__model_change_subscription = None
+        # NodeId -> children of the nodes, browsed after connect, used to find changed subtrees on scans
+        self.__browsed_children = {}
+
         self.__device_nodes: List[Device] = []
-        self.__next_poll = 0
+        # NodeId -> devices and keys of the subscribed nodes, used to dispatch data change notifications
+        self.__subscribed_nodes = SubscriptionNodesIndex()
+        # Devices are polled in groups by poll period, poll period in seconds -> next poll time and polling task
+        self.__next_polls = {}
+        self.__poll_tasks = {}
         self.__next_scan = 0
 
+        # Values of telemetry nodes, changed during connection gaps, are read from history of the server
+        self.__history_backfill = HistoryBackfill(
+            self.__log, values_per_node=self.__server_conf.get('historyBackfillValuesPerNode', 1000),
+            max_period_in_millis=self.__server_conf.get('historyBackfillMaxPeriodInMillis', 3600000)) \
+            if self.__server_conf.get('enableHistoryBackfill', False) else None
+        self.__history_backfill_task = None
+
     def open(self):
         self.__stopped = False
-        self.start()
+        if self.__enable_subscriptions:
+            sub_data_convert_thread = Thread(name='Sub Data Convert Thread', target=self.__convert_sub_data,
+                                             daemon=True)
+            sub_data_convert_thread.start()
+
+        self.__main_task = self.__runtime.submit(self.__run())
         self.__log.info("Starting OPC-UA Connector (Async IO)")
 
     def get_type(self):
@@ -140,24 +229,27 @@ class OpcUaConnector(Connector, Thread):
         self.__connected = False
         self.__log.info("Stopping OPC-UA Connector")
 
-        asyncio.run_coroutine_threadsafe(self.__disconnect(), self.__loop)
-        asyncio.run_coroutine_threadsafe(self.__cancel_all_tasks(), self.__loop)
-
-        start_time = monotonic()
-
-        while self.is_alive():
-            if monotonic() - start_time > 10:
-                self.__log.error("Failed to stop connector %s", self.get_name())
-                break
-            sleep(.1)
+        if self.__main_task is not None:
+            self.__runtime.submit(self.__disconnect())
+            try:
+                self.__main_task.result(timeout=5)
+            except Exception:
+                # Only tasks of the connector are cancelled, other connectors use the same event loop
+                self.__runtime.call_soon(self.__cancel_tasks)
+                try:
+                    self.__main_task.result(timeout=5)
+                except Exception:
+                    if not self.__main_task.done():
+                        self.__log.error("Failed to stop connector %s", self.get_name())
 
         self.__log.info('%s has been stopped.', self.get_name())
         self.__log.stop()
 
-    async def __cancel_all_tasks(self):
-        await asyncio.sleep(5)
-        for task in asyncio.all_tasks(self.__loop):
-            task.cancel()
+    def __cancel_tasks(self):
+        self.__stop_polling()
+        if self.__history_backfill_task is not None:
+            self.__history_backfill_task.cancel()
+        self.__main_task.cancel()
 
     async def __disconnect(self):
         try:
@@ -168,30 +260,41 @@ class OpcUaConnector(Connector, Thread):
         except Exception as e:
             self.__log.warning('%s could not be disconnected from OPC-UA Server: %s', self.name, e)
 
-    async def __unsubscribe_from_node(self, device: Device, node):
+    async def __unsubscribe_from_node(self, device: Device, node, delete_monitored_item=True):
         node['valid'] = False
-        if node.get('node') is not None and self.__enable_subscriptions:
-            subscription_id = device.nodes_data_change_subscriptions.get(node['node'].nodeid, {}).get('subscription')
-            if subscription_id is not None:
-                try:
-                    await device.subscription.unsubscribe(subscription_id)
-                except Exception as e:
-                    self.__log.exception('Error unsubscribing from on data change: %s', e)
-                device.nodes_data_change_subscriptions[node['node'].nodeid]['subscription'] = None
+        node_id = node.pop('id', None)
+        if node_id is None:
+            return
+
+        self.__subscribed_nodes.remove(node_id, device, node['key'])
+        # The monitored item is kept, while other keys of the device use the same node
+        if any(entry[0] is device for entry in self.__subscribed_nodes.get(node_id)):
+            return
+
+        node_subscription = device.nodes_data_change_subscriptions.pop(node_id, None)
+        if delete_monitored_item and node_subscription is not None and node_subscription['subscription'] is not None:
+            subscription = self.__subscriptions.get(node_subscription['parameters'][0])
+            try:
+                if subscription is not None:
+                    await subscription.unsubscribe(node_subscription['subscription'])
+            except Exception as e:
+                self.__log.exception('Error unsubscribing from on data change: %s', e)
 
     async def __unsubscribe_from_nodes(self, device_name=None):
         for device in self.__device_nodes:
             if device_name is None or device.name == device_name:
                 for section in ('attributes', 'timeseries'):
                     for node in device.values.get(section, []):
-                        await self.__unsubscribe_from_node(device, node)
+                        # Monitored items are deleted with the subscriptions, if all devices are unsubscribed
+                        await self.__unsubscribe_from_node(device, node, delete_monitored_item=device_name is not None)
 
-            if device_name is None and device.subscription is not None:
+        if device_name is None:
+            for subscription in self.__subscriptions.values():
                 try:
-                    await device.subscription.delete()
+                    await subscription.delete()
                 except Exception as e:
                     self.__log.exception('Error deleting subscription: %s', e)
-                device.subscription = None
+            self.__subscriptions.clear()
 
     def get_id(self):
         return self.__id
@@ -208,77 +311,93 @@ class OpcUaConnector(Connector, Thread):
     def get_config(self):
         return self.__config
 
-    def run(self):
-
-        if self.__enable_subscriptions:
-            sub_data_convert_thread = Thread(name='Sub Data Convert Thread', target=self.__convert_sub_data,
-                                             daemon=True)
-            sub_data_convert_thread.start()
-
+    async def __run(self):
         try:
-            self.__loop.run_until_complete(self.start_client())
+            await self.start_client()
         except asyncio.CancelledError:
             try:
-                self.__loop.run_until_complete(self.disconnect_if_connected())
+                await self.disconnect_if_connected()
             except Exception:
                 pass
         except Exception as e:
             self.__log.exception("Error in main loop: %s", e)
 
     async def start_client(self):
+        if self.__reads_semaphore is None:
+            self.__reads_semaphore = asyncio.Semaphore(self.__max_concurrent_reads)
         sleep_for_subscription_work_model = self.__sub_check_period_in_millis / 1000
+        scan_period = self.__server_conf.get('scanPeriodInMillis', 3600000) / 1000
         while not self.__stopped:
             try:
-                self.__client = asyncua.Client(url=self.__opcua_url,
-                                               timeout=self.__server_conf.get('timeoutInMillis', 4000) / 1000)
-                self.__client.session_timeout = self.__server_conf.get('sessionTimeoutInMillis', 120000)
-                if self.__server_conf["identity"].get("type") == "cert.PEM":
-                    await self.__set_auth_settings_by_cert()
-                if self.__server_conf["identity"].get("username"):
-                    self.__set_auth_settings_by_username()
-
-                if self.__stopped:
-                    break
-
-                await self.retry_with_backoff(self.__client.connect)
-
-                if not self.__client.uaclient.protocol:
-                    self.__log.error("Failed to connect to server, retrying...")
-                    await self.disconnect_if_connected()
-                    continue
-                self.__connected = True
-
-                try:
-                    await self.__client.load_data_type_definitions()
-                except Exception as e:
-                    self.__log.error("Error on loading type definitions:\n %s", e)
-
-                poll_period = int(self.__server_conf.get('pollPeriodInMillis', 5000) / 1000)
-                scan_period = int(self.__server_conf.get('scanPeriodInMillis', 3600000) / 1000)
+                if not await self.__wait_for_session_restore():
+                    self.__client = asyncua.Client(url=self.__opcua_url,
+                                                   timeout=self.__server_conf.get('timeoutInMillis', 4000) / 1000,
+                                                   auto_reconnect=self.__auto_reconnect,
+                                                   reconnect_max_delay=self.__reconnect_max_delay,
+                                                   reconnect_request_timeout=self.__session_restore_timeout)
+                    self.__client.session_timeout = self.__server_conf.get('sessionTimeoutInMillis', 120000)
+                    self.__client.connection_lost_callback = self.__on_connection_lost
+                    self.__client.uaclient.observer = self.__session_observer
+                    if self.__server_conf["identity"].get("type") == "cert.PEM":
+                        await self.__set_auth_settings_by_cert()
+                    if self.__server_conf["identity"].get("username"):
+                        self.__set_auth_settings_by_username()
+
+                    if self.__stopped:
+                        break
+
+                    await self.retry_with_backoff(self.__client.connect)
+
+                    if not self.__client.uaclient.protocol:
+                        self.__log.error("Failed to connect to server, retrying...")
+                        await self.disconnect_if_connected()
+                        continue
+                    self.__connected = True
+                    self.__session_lost = False
+                    self.__session_observer.subscriptions_recreated = False
+
+                    await self.__load_server_info()
+                    await self.__load_data_type_definitions()
+                    self.__subscriptions.clear()
+                    await self.__subscribe_to_model_changes()
+                    self.__stop_polling()
+
+                    if self.__enable_subscriptions:
+                        await self.__scan_device_nodes()
+                        self.__next_scan = monotonic() + scan_period
+                        # await self.__poll_nodes()
 
-                if self.__enable_subscriptions:
-                    await self.__scan_device_nodes()
-                    self.__next_scan = monotonic() + scan_period
-                    # await self.__poll_nodes()
+                    self.__start_history_backfill()
 
                 while not self.__stopped:
+                    if not self.__auto_reconnect and self.__client.uaclient.state is not UaClientState.CONNECTED:
+                        raise ConnectionError('Client is disconnected')
+                    if (self.__session_lost or self.__session_observer.subscriptions_recreated) \
+                            and self.__client.uaclient.state is UaClientState.CONNECTED:
+                        await self.__on_session_restored()
+
                     if monotonic() >= self.__next_scan:
                         self.__next_scan = monotonic() + scan_period
+                        self.__model_changes.clear()
                         await self.__scan_device_nodes()
+                    elif self.__model_changes:
+                        await self.__rescan_changed_nodes()
 
-                    if not self.__enable_subscriptions and monotonic() >= self.__next_poll:
-                        self.__next_poll = monotonic() + poll_period
-                        await self.__poll_nodes()
+                    if not self.__enable_subscriptions:
+                        self.__start_polling()
 
                     current_time = monotonic()
-                    time_to_sleep = min(self.__next_poll - current_time, self.__next_scan - current_time) \
+                    time_to_sleep = min(min(self.__next_polls.values(), default=self.__next_scan) - current_time,
+                                        self.__next_scan - current_time) \
                         if not self.__enable_subscriptions else sleep_for_subscription_work_model
                     if time_to_sleep > 0:
                         await asyncio.sleep(time_to_sleep)
 
             except (ConnectionError, BadSessionClosed, BadSessionIdInvalid):
                 self.__log.warning('Connection lost for %s', self.get_name())
-                await self.disconnect_if_connected()
+                # The session is restored by the client in the background, if automatic reconnect is enabled
+                if not self.__auto_reconnect:
+                    await self.disconnect_if_connected()
             except asyncio.exceptions.TimeoutError:
                 self.__log.warning('Failed to connect %s', self.get_name())
                 await self.disconnect_if_connected()
@@ -295,6 +414,9 @@ class OpcUaConnector(Connector, Thread):
                 self.__log.exception("Error in main loop: %s", e)
             finally:
                 if self.__stopped:
+                    self.__stop_polling()
+                    if self.__history_backfill_task is not None:
+                        self.__history_backfill_task.cancel()
                     try:
                         await self.disconnect_if_connected()
                     except Exception:
@@ -310,6 +432,96 @@ class OpcUaConnector(Connector, Thread):
             except Exception:
                 pass  # ignore
 
+    async def __on_connection_lost(self, e):
+        self.__session_lost = True
+        self.__session_token = self.__client.uaclient.session.authentication_token
+        self.__log.warning('Connection lost for %s: %r', self.get_name(), e)
+
+    async def __wait_for_session_restore(self):
+        """
+        Waits for the client to restore the lost session in the background. Returns False, if there is no session to
+        restore and a new client should be connected.
+        """
+        if not self.__auto_reconnect or not self.__connected or self.__client is None \
+                or self.__client.uaclient.is_disconnect_requested:
+            return False
+
+        try:
+            async with self.__client.uaclient.subscribe_state() as state:
+                await state.wait_for_state(UaClientState.CONNECTED, timeout=self.__session_restore_timeout)
+            return True
+        except asyncio.TimeoutError:
+            self.__log.warning('Session of %s was not restored, reconnecting...', self.get_name())
+            # The client is disconnected first, so requests of the subscriptions do not wait for the session
+            try:
+                await self.__client.disconnect()
+            except Exception:
+                pass
+            await self.__unsubscribe_from_nodes()
+            return False
+
+    async def __on_session_restored(self):
+        self.__session_lost = False
+        if self.__session_observer.subscriptions_recreated \
+                or self.__client.uaclient.session.authentication_token != self.__session_token:
+            # The server did not keep the session and subscriptions (e.g. it was restarted), so model change events
+            # could be lost and the address space is verified with a full scan
+            self.__session_observer.subscriptions_recreated = False
+            await self.__load_server_info()
+            await self.__load_data_type_definitions()
+            self.__next_scan = 0
+            self.__log.info('Subscriptions of %s were recreated, devices will be rescanned', self.get_name())
+        else:
+            self.__log.info('Session of %s was restored with subscriptions', self.get_name())
+
+        if self.__enable_subscriptions:
+            await self.__update_monitored_items()
+            await self.__subscribe_to_nodes()
+
+        self.__start_history_backfill()
+
+    async def __update_monitored_items(self):
+        """
+        Subscriptions, which were not transferred, are recreated by the client with new monitored items, so server
+        handles of the items are updated and nodes, which were not subscribed again, are marked as not subscribed.
+        """
+        for publishing_interval, subscription in list(self.__subscriptions.items()):
+            if subscription.is_deleted or subscription.subscription_id is None:
+                del self.__subscriptions[publishing_interval]
+
+        # Publishing interval -> server handles by client handles
+        server_handles = {}
+        for publishing_interval, subscription in list(self.__subscriptions.items()):
+            subscription_server_handles = get_restored_server_handles(subscription)
+            if subscription_server_handles is None:
+                # Restored items are not known, so the subscription is created again with all items
+                self.__log.warning('Monitored items of subscription %s are not known, it will be created again',
+                                   subscription.subscription_id)
+                del self.__subscriptions[publishing_interval]
+                try:
+                    await subscription.delete()
+                except Exception as e:
+                    self.__log.debug('Failed to delete subscription: %s', e)
+                continue
+            server_handles[publishing_interval] = subscription_server_handles
+
+        lost_items = 0
+        for device in self.__device_nodes:
+            for node_subscription in device.nodes_data_change_subscriptions.values():
+                if node_subscription['subscription'] is None:
+                    continue
+
+                server_handle = server_handles.get(node_subscription['parameters'][0], {}).get(
+                    node_subscription['clientHandle'])
+                if server_handle is None:
+                    node_subscription['subscription'] = None
+                    lost_items += 1
+                else:
+                    node_subscription['subscription'] = server_handle
+
+        if lost_items:
+            self.__log.warning('%i monitored items were not restored and will be created again', lost_items)
+
     async def retry_with_backoff(self, func, *args, max_retries=8, initial_delay=1, backoff_factor=2):
         delay = initial_delay
         for attempt in range(max_retries):
@@ -364,78 +576,285 @@ class OpcUaConnector(Connector, Thread):
     def is_regex_pattern(pattern):
         return not re.fullmatch(pattern, pattern)
 
-    async def __find_nodes(self, node_list, current_parent_node, nodes):
-        assert len(node_list) > 0
-        final = []
+    async def __load_server_info(self):
+        """Reads server URI, namespace array and operation limits of the server and loads the browse cache."""
+        limit_names = list(OPERATION_LIMITS)
+        values = await self.__read_values([asyncua.ua.NodeId(asyncua.ua.ObjectIds.Server_ServerArray),
+                                           asyncua.ua.NodeId(asyncua.ua.ObjectIds.Server_NamespaceArray),
+                                           *(asyncua.ua.NodeId(OPERATION_LIMITS[name]) for name in limit_names)])
+
+        server_array, namespace_array = (value.Value.Value if value.StatusCode.is_good() else None
+                                         for value in values[:2])
+        self.__operation_limits = {name: value.Value.Value for name, value in zip(limit_names, values[2:])
+                                   if value.StatusCode.is_good() and value.Value.Value}
+        self.__log.debug('Server operation limits: %s', self.__operation_limits)
+
+        server_uri = server_array[0] if server_array else self.__opcua_url
+        self.__server_info = (server_uri, tuple(namespace_array or ()))
+        self.__browse_cache.load(server_uri, namespace_array or [])
+
+    async def __load_data_type_definitions(self):
+        """Data types are registered by asyncua globally, so they are loaded again only for another server."""
+        if self.__data_types_server_info == self.__server_info:
+            self.__log.debug('Data type definitions of the server are already loaded')
+            return
 
-        children = await current_parent_node.get_children()
-        for node in children:
-            child_node = await node.read_browse_name()
+        try:
+            await self.__client.load_data_type_definitions()
+            self.__data_types_server_info = self.__server_info
+        except Exception as e:
+            self.__log.error("Error on loading type definitions:\n %s", e)
+
+    def __split_by_limit(self, items, operation):
+        limit = self.__operation_limits.get(operation) or DEFAULT_MAX_NODES_PER_REQUEST
+        for index in range(0, len(items), limit):
+            yield items[index:index + limit]
+
+    async def __read_values(self, node_ids, attribute_id=asyncua.ua.AttributeIds.Value):
+        """
+        Reads values of the nodes with Read requests, split by the server limit.
+        Requests are sent concurrently, number of requests in flight is limited by maxConcurrentReads.
+        """
+        chunks_values = await asyncio.gather(*(self.__read_chunk(chunk, attribute_id)
+                                               for chunk in self.__split_by_limit(node_ids, 'read')))
+        return [value for chunk_values in chunks_values for value in chunk_values]
+
+    async def __read_chunk(self, node_ids, attribute_id):
+        params = asyncua.ua.ReadParameters()
+        for node_id in node_ids:
+            read_value_id = asyncua.ua.ReadValueId()
+            read_value_id.NodeId = node_id
+            read_value_id.AttributeId = attribute_id
+            params.NodesToRead.append(read_value_id)
+
+        async with self.__reads_semaphore:
+            return await self.__client.uaclient.read(params)
+
+    async def __browse_children(self, node_ids, inverse=False):
+        """
+        Returns references to children (with browse names) of every node, browsed with batched Browse requests.
+        References to parents are returned, if inverse is set.
+        """
+        references = []
+        for chunk in self.__split_by_limit(node_ids, 'browse'):
+            params = asyncua.ua.BrowseParameters()
+            params.View.Timestamp = asyncua.ua.get_win_epoch()
+            params.RequestedMaxReferencesPerNode = 0
+            for node_id in chunk:
+                description = asyncua.ua.BrowseDescription()
+                description.NodeId = node_id
+                description.BrowseDirection = asyncua.ua.BrowseDirection.Inverse if inverse \
+                    else asyncua.ua.BrowseDirection.Forward
+                description.ReferenceTypeId = asyncua.ua.NodeId(asyncua.ua.ObjectIds.HierarchicalReferences)
+                description.IncludeSubtypes = True
+                description.NodeClassMask = asyncua.ua.NodeClass.Unspecified
+                description.ResultMask = asyncua.ua.BrowseResultMask.BrowseName
+                params.NodesToBrowse.append(description)
+
+            results = await self.__client.uaclient.browse(params)
+            chunk_references = [list(result.References) if result.StatusCode.is_good() else [] for result in results]
+
+            continuation_points = {index: result.ContinuationPoint for index, result in enumerate(results)
+                                   if result.ContinuationPoint}
+            while continuation_points:
+                next_params = asyncua.ua.BrowseNextParameters()
+                next_params.ReleaseContinuationPoints = False
+                next_params.ContinuationPoints = list(continuation_points.values())
+                next_results = await self.__client.uaclient.browse_next(next_params)
+
+                indexes = list(continuation_points)
+                continuation_points = {}
+                for index, result in zip(indexes, next_results):
+                    chunk_references[index].extend(result.References)
+                    if result.ContinuationPoint:
+                        continuation_points[index] = result.ContinuationPoint
+
+            references.extend(chunk_references)
+        return references
+
+    async def __translate_browse_paths(self, paths):
+        """Returns NodeIds of browse paths (relative to Root), None for not found paths."""
+        node_ids = []
+        root_node_id = self.__client.nodes.root.nodeid
+        for chunk in self.__split_by_limit(paths, 'translate'):
+            browse_paths = []
+            for path in chunk:
+                relative_path = asyncua.ua.RelativePath()
+                for browse_name in path:
+                    element = asyncua.ua.RelativePathElement()
+                    element.ReferenceTypeId = asyncua.ua.NodeId(asyncua.ua.ObjectIds.HierarchicalReferences)
+                    element.IsInverse = False
+                    element.IncludeSubtypes = True
+                    element.TargetName = asyncua.ua.QualifiedName.from_string(browse_name)
+                    relative_path.Elements.append(element)
+
+                browse_path = asyncua.ua.BrowsePath()
+                browse_path.StartingNode = root_node_id
+                browse_path.RelativePath = relative_path
+                browse_paths.append(browse_path)
+
+            results = await self.__client.uaclient.translate_browsepaths_to_nodeids(browse_paths)
+            node_ids.extend(result.Targets[0].TargetId if result.StatusCode.is_good() and result.Targets else None
+                            for result in results)
+        return node_ids
+
+    async def __get_node_ids(self, paths):
+        """Returns NodeIds of qualified browse paths from the cache or translated with batched requests."""
+        node_ids = {}
+        paths_to_translate = {}
+        for path in paths:
+            key = BrowseCache.path_to_key(path)
+            if key in node_ids or key in paths_to_translate:
+                continue
 
-            if re.fullmatch(re.escape(node_list[0]), child_node.Name) or node_list[0].split(':')[-1] == child_node.Name:
-                new_nodes = [*nodes, f'{child_node.NamespaceIndex}:{child_node.Name}']
-                if len(node_list) == 1:
-                    final.append(new_nodes)
-                else:
-                    final.extend(await self.__find_nodes(node_list[1:], current_parent_node=node, nodes=new_nodes))
+            cached_node_id = self.__browse_cache.get_node_id(key)
+            if not path:
+                node_ids[key] = self.__client.nodes.root.nodeid
+            elif cached_node_id is not None:
+                node_ids[key] = asyncua.ua.NodeId.from_string(cached_node_id)
+            else:
+                paths_to_translate[key] = path
+
+        if paths_to_translate:
+            translated_node_ids = await self.__translate_browse_paths(list(paths_to_translate.values()))
+            for key, node_id in zip(paths_to_translate, translated_node_ids):
+                node_ids[key] = node_id
+                self.__browse_cache.set_node_id(key, node_id.to_string() if node_id is not None else None)
+
+        return node_ids
+
+    async def __find_nodes(self, requests):
+        """
+        Finds nodes for several browse patterns at once. Every request is a tuple of parent NodeId, list of browse names
+        to match and qualified path of the parent. Children of all nodes on the same level are browsed with batched
+        Browse requests. Returns list of qualified paths of the found nodes for every request.
+        """
+        found_paths = [[] for _ in requests]
+        level = [(index, node_id, node_list, path) for index, (node_id, node_list, path) in enumerate(requests)
+                 if node_list]
+
+        while level:
+            references = await self.__browse_children([node_id for (_, node_id, _, _) in level])
+
+            next_level = []
+            for (index, node_id, node_list, path), children in zip(level, references):
+                self.__browsed_children[node_id] = self.__get_children_names(children)
+                for child in children:
+                    child_node = child.BrowseName
+                    if re.fullmatch(re.escape(node_list[0]), child_node.Name) \
+                            or node_list[0].split(':')[-1] == child_node.Name:
+                        new_nodes = [*path, f'{child_node.NamespaceIndex}:{child_node.Name}']
+                        self.__browse_cache.set_node_id(new_nodes, child.NodeId.to_string())
+                        if len(node_list) == 1:
+                            found_paths[index].append(new_nodes)
+                        else:
+                            next_level.append((index, child.NodeId, node_list[1:], new_nodes))
+            level = next_level
 
-        return final
+        return found_paths
+
+    @staticmethod
+    def __get_children_names(children):
+        return frozenset((child.NodeId, child.BrowseName.Name) for child in children)
 
     async def find_nodes(self, node_pattern, current_parent_node=None, nodes=[]):
         node_list = node_pattern.split('\\.')
 
         if current_parent_node is None:
-            current_parent_node = self.__client.nodes.root
+            if self.__browse_cache.get_nodes(node_pattern) is not None:
+                return self.__browse_cache.get_nodes(node_pattern)
 
             if len(node_list) > 0 and node_list[0].lower() == 'root':
                 node_list = node_list[1:]
 
-        return await self.__find_nodes(node_list, current_parent_node, nodes)
+            found_nodes = (await self.__find_nodes([(self.__client.nodes.root.nodeid, node_list, nodes)]))[0]
+            self.__browse_cache.set_nodes(node_pattern, found_nodes or None)
+            return found_nodes
+
+        return (await self.__find_nodes([(current_parent_node.nodeid, node_list, nodes)]))[0]
 
     async def find_node_name_space_index(self, path):
-        if isinstance(path, str):
-            path = path.split('\\.')
+        return (await self.__find_qualified_paths([path]))[0]
+
+    async def __find_qualified_paths(self, paths):
+        """
+        Resolves namespace indexes of not qualified browse names at the end of the paths, e.g.
+        ['0:Objects', '2:Device', 'Temperature'] -> [['0:Objects', '2:Device', '2:Temperature']].
+        """
+        paths = [path.split('\\.') if isinstance(path, str) else path for path in paths]
+        qualified_paths = [None] * len(paths)
+
+        resolved_paths = []
+        for index, path in enumerate(paths):
+            cached_qualified_path = self.__browse_cache.get_qualified_path(path)
+            if cached_qualified_path is not None:
+                qualified_paths[index] = cached_qualified_path
+                continue
+
+            # find unresolved nodes
+            u_node_count = len(tuple(filter(lambda u_node: len(u_node.split(':')) < 2, path)))
+            resolved_paths.append((index, path[:len(path) - u_node_count], path[len(path) - u_node_count:]))
 
-        # find unresolved nodes
-        u_node_count = len(tuple(filter(lambda u_node: len(u_node.split(':')) < 2, path)))
+        parent_node_ids = await self.__get_node_ids([resolved for (_, resolved, _) in resolved_paths])
 
-        resolved = path[:-u_node_count]
-        resolved_level = len(path) - u_node_count
-        parent_node = await self.__client.nodes.root.get_child(resolved)
+        requests = []
+        for index, resolved, unresolved in resolved_paths:
+            parent_node_id = parent_node_ids[BrowseCache.path_to_key(resolved)]
+            if parent_node_id is None:
+                qualified_paths[index] = []
+            else:
+                requests.append((index, (parent_node_id, unresolved, resolved)))
 
-        unresolved = path[resolved_level:]
-        return await self.__find_nodes(unresolved, current_parent_node=parent_node, nodes=resolved)
+        found_paths = await self.__find_nodes([request for (_, request) in requests])
+        for (index, _), found in zip(requests, found_paths):
+            qualified_paths[index] = found
+            self.__browse_cache.set_qualified_path(paths[index], found or None)
 
-    async def _get_device_info_by_pattern(self, pattern, get_first=False):
-        result = []
+        return qualified_paths
 
-        search_result = re.search(r"\${([A-Za-z.:\\\d]+)}", pattern)
-        if search_result:
-            try:
-                group = search_result.group(0)
-                node_path = search_result.group(1)
-            except IndexError:
-                self.__log.error('Invalid pattern: %s', pattern)
-                return result
+    async def _get_device_info_by_pattern(self, pattern, get_first=False):
+        result = (await self.__get_devices_info_by_patterns([pattern]))[0]
+        return result[0] if len(result) > 0 and get_first else result
 
-            nodes = await self.find_nodes(node_path)
-            self.__log.debug('Found device name nodes: %s', nodes)
+    async def __get_devices_info_by_patterns(self, patterns):
+        """Returns list of values for every pattern, values of found nodes of all patterns are read at once."""
+        results = [[] for _ in patterns]
 
-            for node in nodes:
+        patterns_nodes = []
+        for index, pattern in enumerate(patterns):
+            search_result = re.search(r"\${([A-Za-z.:\\\d]+)}", pattern)
+            if search_result:
                 try:
-                    var = await self.__client.nodes.root.get_child(node)
-                    value = await var.read_value()
-                    result.append(pattern.replace(group, str(value)))
-                except Exception as e:
-                    self.__log.exception(e)
+                    group = search_result.group(0)
+                    node_path = search_result.group(1)
+                except IndexError:
+                    self.__log.error('Invalid pattern: %s', pattern)
                     continue
-        else:
-            result.append(pattern)
 
-        return result[0] if len(result) > 0 and get_first else result
+                nodes = await self.find_nodes(node_path)
+                self.__log.debug('Found device name nodes: %s', nodes)
+                patterns_nodes.extend((index, group, node) for node in nodes)
+            else:
+                results[index].append(pattern)
+
+        node_ids = await self.__get_node_ids([node for (_, _, node) in patterns_nodes])
+        nodes_to_read = [(index, group, node_ids[BrowseCache.path_to_key(node)])
+                         for (index, group, node) in patterns_nodes
+                         if node_ids[BrowseCache.path_to_key(node)] is not None]
+        values = await self.__read_values([node_id for (_, _, node_id) in nodes_to_read]) if nodes_to_read else []
+        for (index, group, _), value in zip(nodes_to_read, values):
+            try:
+                value.StatusCode.check()
+                results[index].append(patterns[index].replace(group, str(value.Value.Value)))
+            except Exception as e:
+                self.__log.exception(e)
+                continue
+
+        return results
 
     def __convert_sub_data(self):
-        device_converted_data_map = {}
+        # Device -> converter, node configurations, values and receiving time of the first value of the device
+        devices_values = {}
 
         while not self.__stopped:
             batch = []
@@ -451,51 +870,192 @@ class OpcUaConnector(Connector, Thread):
                 sleep(max(self.__sub_check_period_in_millis / 1000, .02))
                 continue
 
+            # Notifications are dispatched to devices by NodeId and grouped per device in one pass over the batch,
+            # values of every device are converted with one call
             for sub_node, data, received_ts in batch:
-                for device in self.__device_nodes:
-                    for section in ('attributes', 'timeseries'):
-                        for node in device.values.get(section, []):
-                            if node.get('id') == sub_node.__str__():
-                                if device not in device_converted_data_map:
-                                    device_converted_data_map[device] = ConvertedData(device_name=device.name)
-
-                                converted_data = device.converter_for_sub.convert(
-                                    {'section': section, 'key': node['key']},
-                                    data.monitored_item.Value
-                                )
-
-                                if converted_data:
-                                    converted_data.add_to_metadata({
-                                        CONNECTOR_PARAMETER: self.get_name(),
-                                        RECEIVED_TS_PARAMETER: received_ts,
-                                        CONVERTED_TS_PARAMETER: int(time() * 1000)
-                                    })
-
-                                    if section == 'attributes':
-                                        device_converted_data_map[device].add_to_attributes(converted_data.attributes)
-                                    else:
-                                        device_converted_data_map[device].add_to_telemetry(converted_data.telemetry)
-
-            for device, converted_data in device_converted_data_map.items():
+                if self.__history_backfill is not None:
+                    self.__history_backfill.update(sub_node.nodeid, data.monitored_item.Value)
+
+                for device, node_config, converter in self.__subscribed_nodes.get(sub_node.nodeid):
+                    device_values = devices_values.get(device)
+                    if device_values is None:
+                        configs = ConversionPlan() if node_config.get('plan') is not None else []
+                        device_values = devices_values[device] = (converter, configs, [], received_ts)
+
+                    device_values[1].append(node_config.get('plan') or node_config)
+                    device_values[2].append(data.monitored_item.Value)
+
+            for device, (converter, configs, values, received_ts) in devices_values.items():
+                converted_data = converter.convert(configs, values)
+                if not converted_data:
+                    continue
+
+                converted_data.add_to_metadata({
+                    CONNECTOR_PARAMETER: self.get_name(),
+                    RECEIVED_TS_PARAMETER: received_ts,
+                    CONVERTED_TS_PARAMETER: int(time() * 1000)
+                })
                 self.__gateway.send_to_storage(self.get_name(), self.get_id(), converted_data)
 
-            device_converted_data_map.clear()
+            devices_values.clear()
+
+    async def __scan_device_nodes(self, verify=True):
+        """
+        Scans devices and their nodes, browse paths are resolved from the browse cache, so only new and changed paths
+        are browsed. Full scans verify the cache first, rescans after model change events use the invalidated cache.
+        """
+        if verify:
+            await self.__verify_browse_cache()
 
-    async def __scan_device_nodes(self):
         await self._create_new_devices()
         await self._load_devices_nodes()
 
+        # The file is written in an executor, the event loop is shared with other connectors
+        changes = self.__browse_cache.get_changes()
+        if changes is not None:
+            await self.__loop.run_in_executor(None, self.__browse_cache.write, *changes)
+
+    async def __verify_browse_cache(self):
+        """
+        Finds changes of the address space since the previous scan without browsing the whole tree: children of the
+        browsed nodes are compared with one batched Browse request and cached NodeIds are checked with one batched
+        read of browse names. Only cached results, found in changed subtrees, are removed from the cache.
+        """
+        if not self.__browsed_children:
+            # The first scan after connect, device node patterns are browsed again to find new devices
+            self.__browse_cache.invalidate_patterns()
+        else:
+            parents = list(self.__browsed_children)
+            changed_parents = 0
+            for node_id, children in zip(parents, await self.__browse_children(parents)):
+                children_names = self.__get_children_names(children)
+                changed_children = children_names ^ self.__browsed_children[node_id]
+                if not changed_children:
+                    continue
+
+                changed_parents += 1
+                self.__browsed_children[node_id] = children_names
+                path = [] if node_id == self.__client.nodes.root.nodeid \
+                    else self.__browse_cache.get_path(node_id.to_string())
+                if path is None:
+                    self.__browse_cache.invalidate_patterns()
+                    continue
+
+                # Results, found by names of added or removed children, are browsed again
+                for child_name in {child_name for (_, child_name) in changed_children}:
+                    self.__browse_cache.invalidate(path, children_only=True, child_name=child_name)
+
+            if changed_parents:
+                self.__log.info('Children of %i browsed nodes were changed', changed_parents)
+
+        cached_node_ids = self.__browse_cache.get_node_ids()
+        if not cached_node_ids:
+            return
+
+        paths = list(cached_node_ids)
+        browse_names = await self.__read_values(
+            [asyncua.ua.NodeId.from_string(cached_node_ids[path]) for path in paths],
+            asyncua.ua.AttributeIds.BrowseName)
+        changed_paths = [path for path, browse_name in zip(paths, browse_names)
+                         if not browse_name.StatusCode.is_good()
+                         or browse_name.Value.Value.to_string() != path.split('\\.')[-1]]
+        for path in changed_paths:
+            self.__browse_cache.invalidate(path)
+
+        if changed_paths:
+            self.__log.info('%i cached browse paths are not valid anymore', len(changed_paths))
+
+    async def __subscribe_to_model_changes(self):
+        self.__model_changes.clear()
+        self.__browsed_children.clear()
+        self.__model_change_subscription = None
+        if not self.__server_conf.get('enableModelChangeEvents', True):
+            return
+
+        try:
+            self.__model_change_subscription = await self.__client.create_subscription(
+                MODEL_CHANGE_PUBLISHING_INTERVAL, ModelChangeHandler(self.__model_changes, self.__log))
+            await self.__model_change_subscription.subscribe_events(
+                self.__client.nodes.server, [asyncua.ua.ObjectIds.GeneralModelChangeEventType,
+                                             asyncua.ua.ObjectIds.SemanticChangeEventType])
+            self.__log.info('Subscribed to model change events, devices will be rescanned on address space changes')
+        except Exception as e:
+            self.__log.info('Model change events are not supported by the server, only periodic scans are used: %s',
+                            e)
+            if self.__model_change_subscription is not None:
+                try:
+                    await self.__model_change_subscription.delete()
+                except Exception:
+                    pass
+            self.__model_change_subscription = None
+
+    async def __get_changed_paths(self, model_changes):
+        """
+        Returns browse paths of the changed nodes with flag, that only children of the node were changed, and name of
+        the new child. Paths of new nodes are not known, so their parents are browsed and known parents are returned
+        with names of the new nodes.
+        """
+        changed_paths = []
+        new_node_ids = []
+        for node_id, verb in model_changes.items():
+            path = self.__browse_cache.get_path(node_id.to_string())
+            if path is not None:
+                changed_paths.append((path, not verb & asyncua.ua.ModelChangeStructureVerbMask.NodeDeleted, None))
+            elif not verb & asyncua.ua.ModelChangeStructureVerbMask.NodeDeleted:
+                new_node_ids.append(node_id)
+
+        if new_node_ids:
+            parents = await self.__browse_children(new_node_ids, inverse=True)
+            browse_names = await self.__read_values(new_node_ids, asyncua.ua.AttributeIds.BrowseName)
+
+            new_nodes_parents = set()
+            for node_parents, browse_name in zip(parents, browse_names):
+                child_name = browse_name.Value.Value.Name if browse_name.StatusCode.is_good() else None
+                for parent in node_parents:
+                    path = self.__browse_cache.get_path(parent.NodeId.to_string())
+                    if path is not None:
+                        changed_paths.append((path, True, child_name))
+                        new_nodes_parents.add(path)
+
+            # Added references of the parents are already handled by names of the new nodes
+            changed_paths = [(path, children_only, child_name) for path, children_only, child_name in changed_paths
+                             if not (children_only and child_name is None and path in new_nodes_parents)]
+
+        return changed_paths
+
+    async def __rescan_changed_nodes(self):
+        model_changes = self.__model_changes.copy()
+        self.__model_changes.clear()
+
+        if None in model_changes:
+            # Changed nodes were not reported by the server
+            self.__log.info('Address space of the server was changed, rescanning devices')
+            await self.__scan_device_nodes()
+            return
+
+        changed_paths = await self.__get_changed_paths(model_changes)
+        self.__log.debug('Model change events for %i nodes, changed browse paths: %s', len(model_changes),
+                         changed_paths)
+        if not changed_paths:
+            return
+
+        for path, children_only, child_name in changed_paths:
+            self.__browse_cache.invalidate(path, children_only=children_only, child_name=child_name)
+
+        self.__log.info('Address space of the server was changed, rescanning %i changed nodes', len(changed_paths))
+        await self.__scan_device_nodes(verify=False)
+
     async def _create_new_devices(self):
         existing_devices = list(map(lambda dev: dev.name, self.__device_nodes))
 
         scanned_devices = []
-        for device in self.__config.get('mapping', []):
+        mapping = self.__config.get('mapping', [])
+        devices_names = await self.__get_devices_info_by_patterns(
+            [device.get('deviceInfo', {}).get('deviceNameExpression') for device in mapping])
+        for device, device_names in zip(mapping, devices_names):
             nodes = await self.find_nodes(device['deviceNodePattern'])
             self.__log.debug('Found devices: %s', nodes)
 
-            device_names = await self._get_device_info_by_pattern(
-                device.get('deviceInfo', {}).get('deviceNameExpression'))
-
             for device_name in device_names:
                 scanned_devices.append(device_name)
                 if device_name not in existing_devices:
@@ -520,9 +1080,43 @@ class OpcUaConnector(Connector, Thread):
 
         self.__log.debug('Device nodes: %s', self.__device_nodes)
 
+    async def __resolve_devices_nodes(self):
+        """
+        Resolves browse paths of all devices nodes at once: namespace indexes of not qualified paths are found with
+        batched Browse requests and NodeIds - with batched TranslateBrowsePathsToNodeIds requests.
+        Returns found qualified paths by id of node configuration and NodeIds by browse path.
+        """
+        not_qualified_nodes = []
+        for device in self.__device_nodes:
+            for section in ('attributes', 'timeseries'):
+                for node in device.values.get(section, []):
+                    path = node.get('qualified_path', node['path'])
+                    if not isinstance(path, str) and len(path[-1].split(':')) != 2:
+                        not_qualified_nodes.append(node)
+
+        qualified_paths = {}
+        if not_qualified_nodes:
+            found_paths = await self.__find_qualified_paths([node['path'] for node in not_qualified_nodes])
+            qualified_paths = {id(node): found for node, found in zip(not_qualified_nodes, found_paths)}
+
+        paths = []
+        for device in self.__device_nodes:
+            for section in ('attributes', 'timeseries'):
+                for node in device.values.get(section, []):
+                    path = node.get('qualified_path', node['path'])
+                    if id(node) in qualified_paths:
+                        paths.extend(qualified_paths[id(node)][:1])
+                    elif not isinstance(path, str):
+                        paths.append(path)
+
+        return qualified_paths, await self.__get_node_ids(paths)
+
     async def _load_devices_nodes(self):
+        qualified_paths, node_ids = await self.__resolve_devices_nodes()
+
         for device in self.__device_nodes:
-            device.nodes = []
+            # Nodes and conversion plan of the device are replaced after loading, so polling uses consistent ones
+            device_nodes = []
             for section in ('attributes', 'timeseries'):
                 for node in device.values.get(section, []):
                     try:
@@ -531,7 +1125,7 @@ class OpcUaConnector(Connector, Thread):
                             found_node = self.__client.get_node(path)
                         else:
                             if len(path[-1].split(':')) != 2:
-                                qualified_path = await self.find_node_name_space_index(path)
+                                qualified_path = qualified_paths.get(id(node), [])
                                 if len(qualified_path) == 0:
                                     if node.get('valid', True):
                                         self.__log.warning('Node not found; device: %s, key: %s, path: %s',
@@ -548,32 +1142,41 @@ class OpcUaConnector(Connector, Thread):
                                 node['qualified_path'] = qualified_path[0]
                                 path = qualified_path[0]
 
-                            found_node = await self.__client.nodes.root.get_child(path)
+                            node_id = node_ids.get(BrowseCache.path_to_key(path))
+                            if node_id is None:
+                                raise BadNoMatch()
+                            found_node = self.__client.get_node(node_id)
 
-                        device.nodes.append({'node': found_node,
+                        device_nodes.append({'node': found_node,
                                              'key': node['key'],
                                              'section': section,
                                              'timestampLocation': node.get('timestampLocation', 'gateway')})
 
-                        subscription_exists = (device.subscription is not None
-                                               and found_node.nodeid in device.nodes_data_change_subscriptions
+                        subscription_exists = (found_node.nodeid in device.nodes_data_change_subscriptions
                                                and device.nodes_data_change_subscriptions[found_node.nodeid][
                                                    'subscription'] is not None)
 
-                        if node.get('valid') is None or (node.get('valid') and not self.__enable_subscriptions):
-                            if self.__enable_subscriptions and not subscription_exists and not self.__stopped:
-                                if device.subscription is None:
-                                    device.subscription = await self.__client.create_subscription(
-                                        self.__sub_check_period_in_millis, SubHandler(
-                                            self.__sub_data_to_convert, self.__log))
-                                if found_node.nodeid not in device.nodes_data_change_subscriptions:
-                                    device.nodes_data_change_subscriptions[found_node.nodeid] = {"node": found_node,
-                                                                                                 "subscription": None,
-                                                                                                 "key": node['key'],
-                                                                                                 "section": section}
-                                node['id'] = found_node.nodeid.to_string()
-
-                            node['valid'] = True
+                        # Nodes are subscribed again, if they were found after being lost or replaced with new NodeIds
+                        if self.__enable_subscriptions and not self.__stopped \
+                                and (not subscription_exists or node.get('id') != found_node.nodeid):
+                            if node.get('id') is not None and node['id'] != found_node.nodeid:
+                                await self.__unsubscribe_from_node(device, node)
+                            if found_node.nodeid not in device.nodes_data_change_subscriptions:
+                                device.nodes_data_change_subscriptions[found_node.nodeid] = {
+                                    "node": found_node,
+                                    "subscription": None,
+                                    "clientHandle": None,
+                                    "key": node['key'],
+                                    "section": section,
+                                    "parameters": self.__get_monitoring_parameters(device, node)
+                                }
+                            node['id'] = found_node.nodeid
+                            self.__subscribed_nodes.add(found_node.nodeid, device, section, node['key'],
+                                                        device.converter_for_sub,
+                                                        self.__compile_node(device.converter_for_sub,
+                                                                            device_nodes[-1]))
+
+                        node['valid'] = True
                     except ConnectionError as e:
                         raise e
                     except (BadNodeIdUnknown, BadConnectionClosed, BadInvalidState, BadAttributeIdInvalid,
@@ -592,71 +1195,274 @@ class OpcUaConnector(Connector, Thread):
                         if node.get('valid', True):
                             self.__log.exception(e)
                             await self.__unsubscribe_from_node(device, node)
-            try:
-                if self.__enable_subscriptions and device.subscription is not None:
-                    to_subscribe = zip(*list(map(lambda n: (n[1]['node'], n),
-                                                 filter(lambda n: n[1]['subscription'] is None,
-                                                        device.nodes_data_change_subscriptions.items()))))
-                    nodes_to_subscribe = []
-                    conf = []
-                    if to_subscribe:
-                        try:
-                            nodes_to_subscribe, conf = to_subscribe
-                        except ValueError:
-                            pass
-
-                    if nodes_to_subscribe:
-                        nodes_data_change_subscriptions = await device.subscription.subscribe_data_change(
-                            nodes_to_subscribe)
-                        for node, conf, subscription_id in zip(nodes_to_subscribe, conf,
-                                                               nodes_data_change_subscriptions):
-                            device.nodes_data_change_subscriptions[node.nodeid]['subscription'] = subscription_id
-                            self.__log.info('Subscribed on data change; device: %s, path: %s',
-                                            device.name, node.nodeid.to_string())
 
+            device.nodes = device_nodes
+            device.conversion_plan = self.__compile_conversion_plan(device.converter, device_nodes)
+
+        if self.__enable_subscriptions and not self.__stopped:
+            await self.__subscribe_to_nodes()
+
+    @staticmethod
+    def __compile_conversion_plan(converter, nodes):
+        """Node configurations are compiled for the default converter, custom converters get them as is."""
+        return converter.compile(nodes) if isinstance(converter, OpcUaUplinkConverter) else nodes
+
+    @staticmethod
+    def __compile_node(converter, node):
+        return converter.compile_node(node) if isinstance(converter, OpcUaUplinkConverter) else None
+
+    def __get_monitoring_parameters(self, device, node):
+        """
+        Returns parameters of the monitored item: publishing interval of the subscription, sampling interval,
+        queue size, deadband type and value. Parameters of the node override parameters of the device and the server.
+        """
+        parameters = {name: node.get(name, device.config.get(name, self.__server_conf.get(name)))
+                      for name in MONITORING_PARAMETERS}
+        return (parameters['publishingIntervalInMillis'] or self.__sub_check_period_in_millis,
+                parameters['samplingIntervalInMillis'] if parameters['samplingIntervalInMillis'] is not None
+                else DEFAULT_SAMPLING_INTERVAL_IN_MILLIS,
+                parameters['queueSize'] or 0,
+                (parameters['deadbandType'] or '').lower() or None,
+                float(parameters['deadbandValue'] or 0))
+
+    async def __get_subscription(self, publishing_interval):
+        subscription = self.__subscriptions.get(publishing_interval)
+        if subscription is None:
+            subscription = await self.__client.create_subscription(publishing_interval,
+                                                                   SubHandler(self.__sub_data_to_convert, self.__log))
+            self.__subscriptions[publishing_interval] = subscription
+        return subscription
+
+    def __create_data_change_filter(self, deadband_type, deadband_value):
+        if deadband_type is None:
+            return None
+
+        if deadband_type not in DEADBAND_TYPES:
+            self.__log.warning('Unknown deadband type "%s", supported types: %s', deadband_type,
+                               ', '.join(DEADBAND_TYPES))
+            return None
+
+        data_change_filter = asyncua.ua.DataChangeFilter()
+        data_change_filter.Trigger = asyncua.ua.DataChangeTrigger.StatusValue
+        data_change_filter.DeadbandType = DEADBAND_TYPES[deadband_type]
+        data_change_filter.DeadbandValue = deadband_value
+        return data_change_filter
+
+    async def __subscribe_to_nodes(self):
+        """
+        Creates monitored items for not subscribed nodes of all devices. Nodes with the same monitoring parameters
+        are subscribed with the same requests, split by the server limit, in subscriptions shared by publishing
+        interval.
+        """
+        nodes_by_parameters = {}
+        for device in self.__device_nodes:
+            for node_subscription in device.nodes_data_change_subscriptions.values():
+                if node_subscription['subscription'] is None:
+                    nodes_by_parameters.setdefault(node_subscription['parameters'], []).append(
+                        (device, node_subscription))
+
+        for parameters, nodes in nodes_by_parameters.items():
+            publishing_interval, sampling_interval, queue_size, deadband_type, deadband_value = parameters
+            try:
+                subscription = await self.__get_subscription(publishing_interval)
+                data_change_filter = self.__create_data_change_filter(deadband_type, deadband_value)
+                for chunk in self.__split_by_limit(nodes, 'monitor'):
+                    results = await self.__create_monitored_items(subscription, chunk, data_change_filter,
+                                                                  queue_size, sampling_interval)
+
+                    not_filtered_nodes = []
+                    for (device, node_subscription), (client_handle, result) in zip(chunk, results):
+                        if isinstance(result, asyncua.ua.StatusCode):
+                            self.__log.warning('Failed to subscribe on data change; device: %s, key: %s, path: %s: %s',
+                                               device.name, node_subscription['key'],
+                                               node_subscription['node'].nodeid.to_string(), result)
+                            if data_change_filter is not None:
+                                not_filtered_nodes.append((device, node_subscription))
+                            continue
+
+                        node_subscription['subscription'] = result
+                        node_subscription['clientHandle'] = client_handle
+                        self.__log.info('Subscribed on data change; device: %s, path: %s',
+                                        device.name, node_subscription['node'].nodeid.to_string())
+
+                    # Deadband is not supported for some nodes (e.g. percent deadband without EURange)
+                    if not_filtered_nodes:
+                        results = await self.__create_monitored_items(subscription, not_filtered_nodes, None,
+                                                                      queue_size, sampling_interval)
+                        for (device, node_subscription), (client_handle, result) in zip(not_filtered_nodes, results):
+                            if not isinstance(result, asyncua.ua.StatusCode):
+                                node_subscription['subscription'] = result
+                                node_subscription['clientHandle'] = client_handle
+                                self.__log.info('Subscribed on data change without deadband; device: %s, path: %s',
+                                                device.name, node_subscription['node'].nodeid.to_string())
             except Exception as e:
                 self.__log.exception(e)
 
-    async def __poll_nodes(self):
+    async def __create_monitored_items(self, subscription, nodes, data_change_filter, queue_size, sampling_interval):
+        """
+        Returns client handles of the monitored items with server handles or status codes of failed items. Client
+        handles are kept by the client, if the subscription is recreated on a new session, server handles are not.
+        """
+        requests = [create_monitored_item_request(node_subscription['node'].nodeid, next(self.__client_handles),
+                                                  data_change_filter, queue_size, sampling_interval)
+                    for (_, node_subscription) in nodes]
+        results = await subscription.create_monitored_items(requests)
+        return [(request.RequestedParameters.ClientHandle, result) for request, result in zip(requests, results)]
+
+    def __get_poll_period(self, device):
+        poll_period = device.config.get('pollPeriodInMillis', self.__server_conf.get('pollPeriodInMillis', 5000))
+        return max(poll_period, 1) / 1000
+
+    def __stop_polling(self):
+        for poll_task in self.__poll_tasks.values():
+            poll_task.cancel()
+        self.__poll_tasks.clear()
+        self.__next_polls.clear()
+
+    def __start_polling(self):
+        """Starts polling of device groups, which poll period has come, if the previous poll of the group is done."""
+        for poll_period, poll_task in list(self.__poll_tasks.items()):
+            if poll_task.done():
+                del self.__poll_tasks[poll_period]
+                # Errors of polling (e.g. lost connection) are processed by the main loop
+                poll_task.result()
+
+        groups = {}
+        for device in self.__device_nodes:
+            groups.setdefault(self.__get_poll_period(device), []).append(device)
+
+        for poll_period in list(self.__next_polls):
+            if poll_period not in groups:
+                del self.__next_polls[poll_period]
+
+        current_time = monotonic()
+        for poll_period, devices in groups.items():
+            if current_time < self.__next_polls.get(poll_period, 0):
+                continue
+
+            if poll_period in self.__poll_tasks:
+                self.__log.warning('Previous poll of devices with poll period %s ms is not finished yet, '
+                                   'skipping poll', int(poll_period * 1000))
+            else:
+                self.__poll_tasks[poll_period] = self.__loop.create_task(self.__poll_nodes(devices))
+
+            self.__next_polls[poll_period] = current_time + poll_period
+
+    async def __poll_nodes(self, devices):
         data_retrieving_started = int(time() * 1000)
-        all_nodes = [node_config['node'] for device in self.__device_nodes for node_config in device.nodes]
+        devices_nodes = [(device, device.nodes, device.conversion_plan) for device in devices]
+        all_nodes = [node_config['node'].nodeid for (_, nodes, _) in devices_nodes for node_config in nodes]
 
         if len(all_nodes) > 0:
-            values = await self.__client.read_attributes(all_nodes)
+            values = await self.__read_values(all_nodes)
             received_ts = int(time() * 1000)
 
-            self.__data_to_convert.put((values, received_ts, data_retrieving_started))
+            if self.__history_backfill is not None:
+                for node_id, value in zip(all_nodes, values):
+                    self.__history_backfill.update(node_id, value)
+
+            devices_values = []
+            read_values_count = 0
+            for device, nodes, conversion_plan in devices_nodes:
+                devices_values.append((device, conversion_plan,
+                                       values[read_values_count:read_values_count + len(nodes)]))
+                read_values_count += len(nodes)
+
+            self.__data_to_convert.put((devices_values, received_ts, data_retrieving_started))
 
         else:
             self.__log.info('No nodes to poll')
 
+    def __start_history_backfill(self):
+        if self.__history_backfill is None:
+            return
+
+        # The previous backfill is started again with the new end time, read values are not read again
+        if self.__history_backfill_task is not None and not self.__history_backfill_task.done():
+            self.__history_backfill_task.cancel()
+        self.__history_backfill_task = self.__loop.create_task(self.__backfill_history(datetime.now(timezone.utc)))
+
+    async def __backfill_history(self, end_time):
+        """
+        Reads values of telemetry nodes, changed since the last received values, from history of the server and
+        converts them with source timestamps in the converting threads, response by response.
+        """
+        # NodeId -> devices with configurations of the node for their converters
+        nodes = {}
+        for device in self.__device_nodes:
+            for node in device.nodes:
+                if node['section'] == 'timeseries':
+                    config = {**node, 'timestampLocation': 'SourceTimestamp'}
+                    plan = self.__compile_node(device.converter, config)
+                    nodes.setdefault(node['node'].nodeid, []).append((device, config if plan is None else plan))
+
+        start_times = self.__history_backfill.get_start_times(nodes, end_time)
+        if not start_times:
+            return
+
+        self.__log.info('Reading history of %i nodes since %s', len(start_times), min(start_times.values()))
+        started = monotonic()
+        values_count = 0
+        nodes_per_request = min(self.__operation_limits.get('history') or DEFAULT_MAX_NODES_PER_REQUEST,
+                                HISTORY_BACKFILL_NODES_PER_REQUEST)
+        history_reader = self.__history_backfill.read(self.__client.uaclient.history_read, start_times, end_time,
+                                                      nodes_per_request)
+        try:
+            async for history in history_reader:
+                data_retrieving_started = int(time() * 1000)
+                # Device -> node configurations and values of the device
+                devices_values = {}
+                for node_id, data_values in history:
+                    values_count += len(data_values)
+                    for device, config in nodes[node_id]:
+                        device_values = devices_values.get(device)
+                        if device_values is None:
+                            device_values = devices_values[device] = (
+                                ConversionPlan() if isinstance(config, tuple) else [], [])
+                        device_values[0].extend([config] * len(data_values))
+                        device_values[1].extend(data_values)
+
+                self.__data_to_convert.put(([(device, configs, values)
+                                             for device, (configs, values) in devices_values.items()],
+                                            int(time() * 1000), data_retrieving_started))
+                while self.__data_to_convert.qsize() > HISTORY_BACKFILL_MAX_QUEUED_RESPONSES and not self.__stopped:
+                    await asyncio.sleep(.1)
+
+            self.__log.info('Read %i values from history in %.2f sec', values_count, monotonic() - started)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.__log.warning('Failed to read history of nodes, %i values were read: %s', values_count, e)
+        finally:
+            # Continuation points of not finished requests are released, if reading was cancelled
+            await history_reader.aclose()
+
     def __thread_pool_executor_processor(self):
         pack = 10
         futures = []
         while not self.__stopped:
-            try:
-                for future in futures:
+            # Finished futures are removed, so the list does not grow with every poll
+            for future in [future for future in futures if future.done()]:
+                futures.remove(future)
+                try:
                     future.result()
-            except Exception as e:
-                self.__log.exception("Error in thread pool executor: %s", e)
+                except Exception as e:
+                    self.__log.exception("Error in thread pool executor: %s", e)
 
             try:
-                values, received_ts, data_retrieving_started = self.__data_to_convert.get_nowait()
-                futures.append(self.__thread_pool_executor.submit(self.__convert_retrieved_data, values, received_ts,
-                                                            data_retrieving_started))
+                devices_values, received_ts, data_retrieving_started = self.__data_to_convert.get_nowait()
+                futures.append(self.__thread_pool_executor.submit(self.__convert_retrieved_data, devices_values,
+                                                                  received_ts, data_retrieving_started))
                 if len(futures) >= pack:
                     continue
             except Empty:
                 sleep(.02)
 
-    def __convert_retrieved_data(self, values, received_ts, data_retrieving_started):
+    def __convert_retrieved_data(self, devices_values, received_ts, data_retrieving_started):
         try:
-            converted_nodes_count = 0
-            for device in self.__device_nodes:
-                nodes_count = len(device.nodes)
-                device_values = values[converted_nodes_count:converted_nodes_count + nodes_count]
-                converted_nodes_count += nodes_count
-                converted_data: ConvertedData = self.__convert_device_data(device.converter, device.nodes, device_values)
+            for device, conversion_plan, device_values in devices_values:
+                converted_data: ConvertedData = self.__convert_device_data(device.converter, conversion_plan,
+                                                                           device_values)
                 converted_data.add_to_metadata({
                     CONNECTOR_PARAMETER: self.get_name(),
                     RECEIVED_TS_PARAMETER: received_ts,
@@ -675,8 +1481,8 @@ class OpcUaConnector(Connector, Thread):
             self.__log.exception("Error converting data: %s", e)
 
     @staticmethod
-    def __convert_device_data(converter, device_nodes, values):
-        return converter.convert(device_nodes, values)
+    def __convert_device_data(converter, conversion_plan, values):
+        return converter.convert(conversion_plan, values)
 
     def __send_data_to_gateway_storage(self, data):
         data.metadata.update({'sendToStorageTs': int(time() * 1000)})
@@ -702,19 +1508,15 @@ class OpcUaConnector(Connector, Thread):
                 for attr_update in device.config['attributes_updates']:
                     if attr_update['key'] == key:
                         result = {}
-                        task = self.__loop.create_task(
-                            self.get_shared_attr_node_id(
-                                device.path + attr_update['value'].replace('\\', '').split('.'), result))
-
-                        while not task.done():
-                            sleep(.1)
+                        self.__runtime.run(self.get_shared_attr_node_id(
+                            device.path + attr_update['value'].replace('\\', '').split('.'), result))
 
                         if result.get('error'):
                             self.__log.error('Node not found! (%s)', result['error'])
                             return
 
                         node_id = result['result']
-                        self.__loop.create_task(self.__write_value(node_id, value))
+                        self.__runtime.submit(self.__write_value(node_id, value))
                         return
         except Exception as e:
             self.__log.exception(e)
@@ -762,16 +1564,10 @@ class OpcUaConnector(Connector, Thread):
 
                     result = {}
                     if rpc_method == 'get':
-                        task = self.__loop.create_task(self.__read_value(full_path, result))
-
-                        while not task.done():
-                            sleep(.2)
+                        self.__runtime.run(self.__read_value(full_path, result))
                     elif rpc_method == 'set':
                         value = args_list[2].split('=')[-1]
-                        task = self.__loop.create_task(self.__write_value(full_path, value, result))
-
-                        while not task.done():
-                            sleep(.2)
+                        self.__runtime.run(self.__write_value(full_path, value, result))
 
                     self.__gateway.send_rpc_reply(device=device,
                                                   req_id=content['data'].get('id'),
@@ -788,11 +1584,7 @@ class OpcUaConnector(Connector, Thread):
 
                             try:
                                 result = {}
-                                task = self.__loop.create_task(
-                                    self.__call_method(device.path, method_name, arguments, result))
-
-                                while not task.done():
-                                    sleep(.2)
+                                self.__runtime.run(self.__call_method(device.path, method_name, arguments, result))
 
                                 self.__gateway.send_rpc_reply(content["device"],
                                                               content["data"]["id"],
@@ -816,11 +1608,7 @@ class OpcUaConnector(Connector, Thread):
 
                     try:
                         result = {}
-                        task = self.__loop.create_task(
-                            self.__call_method(device.path, rpc_method, arguments, result))
-
-                        while not task.done():
-                            sleep(.2)
+                        self.__runtime.run(self.__call_method(device.path, rpc_method, arguments, result))
 
                         results.append(result)
                         self.__log.debug("method %s result is: %s", rpc_method, result)
@@ -884,3 +1672,34 @@ class SubHandler:
     def datachange_notification(self, node, _, data):
         self.__log.debug("New data change event %s %s", node, data)
         self.__queue.put((node, data, int(time() * 1000)))
+
+
+class ModelChangeHandler:
+    def __init__(self, model_changes, logger):
+        self.__log = logger
+        self.__model_changes = model_changes
+
+    def event_notification(self, event):
+        self.__log.debug("New model change event %s", event)
+        changes = getattr(event, 'Changes', None)
+        if not changes:
+            self.__model_changes[None] = 0
+            return
+
+        for change in changes if isinstance(changes, list) else [changes]:
+            # Semantic changes have no verb, they do not change browse paths
+            verb = getattr(change, 'Verb', 0) or 0
+            self.__model_changes[change.Affected] = self.__model_changes.get(change.Affected, 0) | verb
+
+
+class SessionObserver(Observer):
+    """Marks, that subscriptions were recreated by the client, because the server did not keep them."""
+
+    def __init__(self, logger):
+        self.__log = logger
+        self.subscriptions_recreated = False
+
+    def on_subscription_event(self, subscription_id, event):
+        if event == SubscriptionEvent.RECREATED:
+            self.__log.debug("Subscription %s was recreated", subscription_id)
+            self.subscriptions_recreated = True
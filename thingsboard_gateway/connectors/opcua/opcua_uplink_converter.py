@@ -45,68 +45,111 @@ VARIANT_TYPE_HANDLERS = {
 
 ERROR_MSG_TEMPLATE = "Bad status code: {} for node: {} with description {}"
 
+# Attributes of data values with timestamps for "timestampLocation" options, the gateway timestamp is used by default
+TIMESTAMP_ATTRIBUTES = {
+    'sourcetimestamp': 'SourceTimestamp',
+    'servertimestamp': 'ServerTimestamp'
+}
+
+
+def default_variant_type_handler(data):
+    return str(data) if not hasattr(data, 'to_string') else data.to_string()
+
+
+class ConversionPlan(list):
+    """
+    Node configurations, compiled for conversion: every node is described by tuple of (key, telemetry flag,
+    name of the data value attribute with timestamp or None for the gateway timestamp).
+    """
+
 
 class OpcUaUplinkConverter(OpcUaConverter):
     def __init__(self, config, logger):
         self._log = logger
         self.__config = config
 
+    @staticmethod
+    def compile_node(config):
+        return (config['key'], DATA_TYPES[config['section']] == TELEMETRY_PARAMETER,
+                TIMESTAMP_ATTRIBUTES.get(config.get('timestampLocation', 'gateway').lower()))
+
+    @staticmethod
+    def compile(configs):
+        if not isinstance(configs, list):
+            configs = [configs]
+        return ConversionPlan(OpcUaUplinkConverter.compile_node(config) for config in configs)
+
+    @staticmethod
+    def get_value(val):
+        data = val.Value.Value
+        if isinstance(data, list):
+            data = [str(item) for item in data]
+        else:
+            data = VARIANT_TYPE_HANDLERS.get(val.Value.VariantType, default_variant_type_handler)(data)
+
+        if data is None and val.StatusCode.is_bad():
+            return str.format(ERROR_MSG_TEMPLATE, val.StatusCode.name, val.data_type, val.StatusCode.doc), True
+        return data, None
+
     @staticmethod
     def process_datapoint(config, val, basic_timestamp):
         try:
-            error = None
-            data = val.Value.Value
-            if isinstance(data, list):
-                data = [str(item) for item in data]
-            else:
-                handler = VARIANT_TYPE_HANDLERS.get(val.Value.VariantType, lambda d: str(d) if not hasattr(d, 'to_string') else d.to_string())
-                data = handler(data)
-
-            if data is None and val.StatusCode.is_bad():
-                data = str.format(ERROR_MSG_TEMPLATE,val.StatusCode.name, val.data_type, val.StatusCode.doc)
-                error = True
-
-            timestamp_location = config.get('timestampLocation', 'gateway').lower()
-            timestamp = basic_timestamp  # Default timestamp
-            if timestamp_location == 'sourcetimestamp' and val.SourceTimestamp is not None:
-                timestamp = val.SourceTimestamp.timestamp() * 1000
-            elif timestamp_location == 'servertimestamp' and val.ServerTimestamp is not None:
-                timestamp = val.ServerTimestamp.timestamp() * 1000
-
-            section = DATA_TYPES[config['section']]
-            if section == TELEMETRY_PARAMETER:
-                return TelemetryEntry({config['key']: data}, ts=timestamp), error
-            elif section == ATTRIBUTES_PARAMETER:
-                return {config['key']: data}, error
+            data, error = OpcUaUplinkConverter.get_value(val)
+            key, is_telemetry, timestamp_attribute = OpcUaUplinkConverter.compile_node(config)
+
+            if is_telemetry:
+                timestamp = getattr(val, timestamp_attribute) if timestamp_attribute is not None else None
+                return TelemetryEntry({key: data}, ts=basic_timestamp if timestamp is None
+                                      else timestamp.timestamp() * 1000), error
+            return {key: data}, error
         except Exception as e:
             return None, str(e)
 
     def convert(self, configs, values) -> ConvertedData:
+        """
+        Converts values of nodes, configs are node configurations or conversion plan, compiled by compile().
+        Telemetry is grouped by timestamps while converting, so one telemetry entry is created per timestamp.
+        """
         StatisticsService.count_connector_message(self._log.name, 'convertersMsgProcessed')
         basic_timestamp = int(time() * 1000)
 
         try:
-            if not isinstance(configs, list):
-                configs = [configs]
+            plan = configs if isinstance(configs, ConversionPlan) else self.compile(configs)
             if not isinstance(values, list):
                 values = [values]
 
             converted_data = ConvertedData(device_name=self.__config['device_name'], device_type=self.__config['device_type'])
 
-            telemetry_batch = []
-            attributes_batch = []
-
-            for config, val in zip(configs, values):
-                result, error = self.process_datapoint(config, val, basic_timestamp)
-                if result is not None:
-                    if isinstance(result, TelemetryEntry):
-                        telemetry_batch.append(result)
-                    elif isinstance(result, dict):
-                        attributes_batch.append(result)
-
-            converted_data.add_to_telemetry(telemetry_batch)
-            for attr in attributes_batch:
-                converted_data.add_to_attributes(attr)
+            telemetry = {}
+            attributes = {}
+
+            for (key, is_telemetry, timestamp_attribute), val in zip(plan, values):
+                try:
+                    data, _ = self.get_value(val)
+                except Exception as e:
+                    self._log.debug('Failed to convert value of %s: %s', key, e)
+                    continue
+
+                if not is_telemetry:
+                    attributes[key] = data
+                    continue
+
+                timestamp = basic_timestamp
+                if timestamp_attribute is not None:
+                    value_timestamp = getattr(val, timestamp_attribute)
+                    if value_timestamp is not None:
+                        timestamp = value_timestamp.timestamp() * 1000
+
+                timestamp_values = telemetry.get(timestamp)
+                if timestamp_values is None:
+                    timestamp_values = telemetry[timestamp] = {}
+                # Values are ordered by receiving, so the newest value of the key wins for the same timestamp
+                timestamp_values[key] = data
+
+            converted_data.add_to_telemetry([TelemetryEntry(timestamp_values, ts=timestamp)
+                                             for timestamp, timestamp_values in telemetry.items()])
+            if attributes:
+                converted_data.add_to_attributes(attributes)
 
             StatisticsService.count_connector_message(self._log.name, 'convertersAttrProduced', count=converted_data.attributes_datapoints_count)
             StatisticsService.count_connector_message(self._log.name, 'convertersTsProduced', count=converted_data.telemetry_datapoints_count)
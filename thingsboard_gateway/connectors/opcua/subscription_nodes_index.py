@@ -0,0 +1,57 @@
+#     Copyright 2024. ThingsBoard
+#
+#     Licensed under the Apache License, Version 2.0 (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+
+
+class SubscriptionNodesIndex:
+    """
+    Index of subscribed nodes, used to find devices and configurations of data change notifications without
+    iterating over all devices and their nodes.
+    Every NodeId is mapped to tuple of (device, node configuration for converter, converter) entries,
+    because one node can be used by several keys or devices. Node configuration contains node conversion plan,
+    if it was compiled by the converter.
+    The index is updated from the event loop and read from the converting thread, so entries are never changed
+    in place, tuples are replaced instead.
+    """
+
+    def __init__(self):
+        self.__entries = {}
+
+    def add(self, node_id, device, section, key, converter, plan=None):
+        entries = self.__entries.get(node_id, ())
+        if any(entry[0] is device and entry[1]['key'] == key and entry[1]['section'] == section
+               for entry in entries):
+            return
+
+        node_config = {'section': section, 'key': key}
+        if plan is not None:
+            node_config['plan'] = plan
+        self.__entries[node_id] = (*entries, (device, node_config, converter))
+
+    def remove(self, node_id, device, key=None):
+        entries = self.__entries.get(node_id)
+        if entries is None:
+            return
+
+        entries = tuple(entry for entry in entries
+                        if not (entry[0] is device and (key is None or entry[1]['key'] == key)))
+        if entries:
+            self.__entries[node_id] = entries
+        else:
+            self.__entries.pop(node_id, None)
+
+    def get(self, node_id):
+        return self.__entries.get(node_id, ())
+
+    def __len__(self):
+        return len(self.__entries)
@@ -18,7 +18,7 @@ from simplejson import dumps, loads
 
 from thingsboard_gateway.connectors.request.request_converter import RequestConverter
 from thingsboard_gateway.gateway.statistics.decorators import CollectStatistics
-from thingsboard_gateway.tb_utility.tb_utility import TBUtility
+from thingsboard_gateway.tb_utility.tb_expression import TBExpression
 from thingsboard_gateway.gateway.statistics.statistics_service import StatisticsService
 
 
@@ -39,34 +39,14 @@ class JsonRequestUplinkConverter(RequestConverter):
 
         try:
             if self.__config['converter'].get("deviceNameJsonExpression") is not None:
-                device_name_tags = TBUtility.get_values(self.__config['converter'].get("deviceNameJsonExpression"),
-                                                        data, get_tag=True)
-                device_name_values = TBUtility.get_values(self.__config['converter'].get("deviceNameJsonExpression"),
-                                                          data, get_tag=False)
-                dict_result["deviceName"] = self.__config['converter'].get("deviceNameJsonExpression")
-                for (device_name_tag, device_name_value) in zip(device_name_tags, device_name_values):
-                    is_valid_key = "${" in self.__config['converter'].get("deviceNameJsonExpression") and "}" in \
-                                   self.__config['converter'].get("deviceNameJsonExpression")
-                    dict_result['deviceName'] = dict_result['deviceName'].replace('${' + str(device_name_tag) + '}',
-                                                                                  str(device_name_value)) \
-                        if is_valid_key else device_name_tag
+                dict_result["deviceName"] = TBExpression.compile(
+                    self.__config['converter'].get("deviceNameJsonExpression")).render(data)
             else:
                 self.__log.error("The expression for looking \"deviceName\" not found in config %s",
                                  dumps(self.__config['converter']))
             if self.__config['converter'].get("deviceTypeJsonExpression") is not None:
-                device_type_tags = TBUtility.get_values(self.__config['converter'].get("deviceTypeJsonExpression"),
-                                                        data,
-                                                        get_tag=True)
-                device_type_values = TBUtility.get_values(self.__config['converter'].get("deviceTypeJsonExpression"),
-                                                          data,
-                                                          expression_instead_none=True)
-                dict_result["deviceType"] = self.__config['converter'].get("deviceTypeJsonExpression")
-                for (device_type_tag, device_type_value) in zip(device_type_tags, device_type_values):
-                    is_valid_key = "${" in self.__config['converter'].get("deviceTypeJsonExpression") and "}" in \
-                                   self.__config['converter'].get("deviceTypeJsonExpression")
-                    dict_result["deviceType"] = dict_result["deviceType"].replace('${' + str(device_type_tag) + '}',
-                                                                                  str(device_type_value)) \
-                        if is_valid_key else device_type_tag
+                dict_result["deviceType"] = TBExpression.compile(
+                    self.__config['converter'].get("deviceTypeJsonExpression")).render(data, expression_instead_none=True)
             else:
                 self.__log.error("The expression for looking \"deviceType\" not found in config %s",
                                  dumps(self.__config['converter']))
@@ -78,30 +58,10 @@ class JsonRequestUplinkConverter(RequestConverter):
             for datatype in self.__datatypes:
                 dict_result[self.__datatypes[datatype]] = []
                 for datatype_object_config in self.__config["converter"].get(datatype, []):
-                    values = TBUtility.get_values(datatype_object_config["value"], data, datatype_object_config["type"],
-                                                  expression_instead_none=True)
-                    values_tags = TBUtility.get_values(datatype_object_config["value"], data,
-                                                       datatype_object_config["type"],
-                                                       get_tag=True)
-
-                    keys = TBUtility.get_values(datatype_object_config["key"], data, datatype_object_config["type"],
-                                                expression_instead_none=True)
-                    keys_tags = TBUtility.get_values(datatype_object_config["key"], data, get_tag=True)
-
-                    full_key = datatype_object_config["key"]
-                    for (key, key_tag) in zip(keys, keys_tags):
-                        is_valid_key = "${" in datatype_object_config["key"] and "}" in \
-                                       datatype_object_config["key"]
-                        full_key = full_key.replace('${' + str(key_tag) + '}',
-                                                    str(key)) if is_valid_key else key_tag
-
-                    full_value = datatype_object_config["value"]
-                    for (value, value_tag) in zip(values, values_tags):
-                        is_valid_value = "${" in datatype_object_config["value"] and "}" in \
-                                         datatype_object_config["value"]
-
-                        full_value = full_value.replace('${' + str(value_tag) + '}',
-                                                        str(value)) if is_valid_value else str(value)
+                    full_key = TBExpression.compile(datatype_object_config["key"]).render(
+                        data, expression_instead_none=True, value_type=datatype_object_config["type"])
+                    full_value = TBExpression.compile(datatype_object_config["value"]).render(
+                        data, expression_instead_none=True, value_type=datatype_object_config["type"])
 
                     if datatype == 'timeseries' and (
                             data.get("ts") is not None or data.get("timestamp") is not None):
@@ -18,7 +18,7 @@ from simplejson import dumps
 
 from thingsboard_gateway.connectors.rest.rest_converter import RESTConverter
 from thingsboard_gateway.gateway.statistics.decorators import CollectStatistics
-from thingsboard_gateway.tb_utility.tb_utility import TBUtility
+from thingsboard_gateway.tb_utility.tb_expression import TBExpression
 from thingsboard_gateway.gateway.statistics.statistics_service import StatisticsService
 
 
@@ -37,31 +37,15 @@ class JsonRESTUplinkConverter(RESTConverter):
 
         try:
             if self.__config.get("deviceNameExpression") is not None:
-                device_name_tags = TBUtility.get_values(self.__config.get("deviceNameExpression"), data, get_tag=True)
-                device_name_values = TBUtility.get_values(self.__config.get("deviceNameExpression"), data,
-                                                          expression_instead_none=True)
-                dict_result["deviceName"] = self.__config.get("deviceNameExpression")
-                for (device_name_tag, device_name_value) in zip(device_name_tags, device_name_values):
-                    is_valid_key = "${" in self.__config.get("deviceNameExpression") and "}" in \
-                                   self.__config.get("deviceNameExpression")
-                    dict_result['deviceName'] = dict_result['deviceName'].replace('${' + str(device_name_tag) + '}',
-                                                                                  str(device_name_value)) \
-                        if is_valid_key else device_name_tag
+                dict_result["deviceName"] = TBExpression.compile(self.__config.get("deviceNameExpression")) \
+                    .render(data, expression_instead_none=True)
             else:
                 self._log.error("The expression for looking \"deviceName\" not found in config %s",
                                 dumps(self.__config))
 
             if self.__config.get("deviceTypeExpression") is not None:
-                device_type_tags = TBUtility.get_values(self.__config.get("deviceTypeExpression"), data, get_tag=True)
-                device_type_values = TBUtility.get_values(self.__config.get("deviceTypeExpression"), data,
-                                                          expression_instead_none=True)
-                dict_result["deviceType"] = self.__config.get("deviceTypeExpression")
-                for (device_type_tag, device_type_value) in zip(device_type_tags, device_type_values):
-                    is_valid_key = "${" in self.__config.get("deviceTypeExpression") and "}" in \
-                                   self.__config.get("deviceTypeExpression")
-                    dict_result["deviceType"] = dict_result["deviceType"].replace('${' + str(device_type_tag) + '}',
-                                                                                  str(device_type_value)) \
-                        if is_valid_key else device_type_tag
+                dict_result["deviceType"] = TBExpression.compile(self.__config.get("deviceTypeExpression")) \
+                    .render(data, expression_instead_none=True)
             else:
                 self._log.error("The expression for looking \"deviceType\" not found in config %s",
                                 dumps(self.__config))
@@ -74,29 +58,8 @@ class JsonRESTUplinkConverter(RESTConverter):
             for datatype in datatypes:
                 dict_result[datatypes[datatype]] = []
                 for datatype_config in self.__config.get(datatype, []):
-                    values = TBUtility.get_values(datatype_config["value"], data, datatype_config["type"],
-                                                  expression_instead_none=False)
-                    values_tags = TBUtility.get_values(datatype_config["value"], data, datatype_config["type"],
-                                                       get_tag=True)
-
-                    keys = TBUtility.get_values(datatype_config["key"], data, datatype_config["type"],
-                                                expression_instead_none=False)
-                    keys_tags = TBUtility.get_values(datatype_config["key"], data, get_tag=True)
-
-                    full_key = datatype_config['key']
-                    for (key_tag, key) in zip(keys_tags, keys):
-                        is_valid_key = "${" in datatype_config["key"] and "}" in \
-                                       datatype_config["key"]
-                        full_key = full_key.replace('${' + str(key_tag) + '}',
-                                                    str(key)) if is_valid_key else key
-
-                    full_value = datatype_config['value']
-                    for (value_tag, value) in zip(values_tags, values):
-                        is_valid_value = "${" in datatype_config["value"] and "}" in \
-                                         datatype_config["value"]
-
-                        full_value = full_value.replace('${' + str(value_tag) + '}',
-                                                        str(value)) if is_valid_value else value
+                    full_key = TBExpression.compile(datatype_config["key"]).render(data)
+                    full_value = TBExpression.compile(datatype_config["value"]).render(data)
 
                     if full_key != 'None' and full_value != 'None':
                         if datatype == 'timeseries' and (
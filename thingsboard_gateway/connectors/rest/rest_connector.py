@@ -19,7 +19,7 @@ from random import choice
 from re import fullmatch
 from string import ascii_lowercase
 from threading import Thread
-from time import time, sleep
+from time import time
 import ssl
 import os
 
@@ -28,6 +28,7 @@ import requests
 from requests.auth import HTTPBasicAuth as HTTPBasicAuthRequest
 from requests.exceptions import RequestException
 
+from thingsboard_gateway.gateway.async_runtime import AsyncRuntime
 from thingsboard_gateway.gateway.statistics.statistics_service import StatisticsService
 from thingsboard_gateway.tb_utility.tb_loader import TBModuleLoader
 from thingsboard_gateway.tb_utility.tb_utility import TBUtility
@@ -51,7 +52,7 @@ except ImportError:
 requests.packages.urllib3.util.ssl_.DEFAULT_CIPHERS += ':ADH-AES128-SHA256'
 
 
-class RESTConnector(Connector, Thread):
+class RESTConnector(Connector):
     def __init__(self, gateway, config, connector_type):
         super().__init__()
         self._default_converters = {
@@ -76,12 +77,13 @@ class RESTConnector(Connector, Thread):
         self._default_uplink_converter = TBModuleLoader.import_module(self._connector_type,
                                                                       self._default_converters['uplink'])
         self.__USER_DATA = {}
-        self._loop = None
+        # The server runs in the event loop, shared by all asynchronous connectors
+        self.__runtime = AsyncRuntime.get_instance()
+        self._loop = self.__runtime.loop
         self._app = None
         self._runner = None
         self._connected = False
         self.__stopped = False
-        self.daemon = True
         self.__attribute_type = {}
         self.__rpc_requests = []
         self.__attribute_updates = []
@@ -137,7 +139,11 @@ class RESTConnector(Connector, Thread):
 
     def open(self):
         self.__stopped = False
-        self.start()
+        self._connected = True
+        try:
+            self.__runtime.run(self.__run_server())
+        except Exception as e:
+            self.__log.exception('REST connector was not started: %s', e)
 
     async def __run_server(self):
         self.endpoints = self.load_endpoints()
@@ -175,34 +181,20 @@ class RESTConnector(Connector, Thread):
         self.__log.info('REST connector started at %s',
                         self.__config['host'] + ':' + str(self.__config.get('port', 5000)))
 
-    def run(self):
-        self._connected = True
-
-        self._loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(self._loop)
-        self._loop.run_until_complete(self.__run_server())
-        try:
-            self._loop.run_forever()
-        finally:
-            self._loop.run_until_complete(self.stop_server())
-            self._loop.close()
-
     async def stop_server(self):
-        await self._runner.cleanup()
-
-        tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
-        for task in tasks:
-            task.cancel()
-        await asyncio.gather(*tasks, return_exceptions=True)
+        # Only the server of the connector is stopped, other connectors use the same event loop
+        if self._runner is not None:
+            await self._runner.cleanup()
 
     def close(self):
         self.__stopped = True
         self._connected = False
-        if not self._loop.is_closed():
-            self._loop.call_soon_threadsafe(self._loop.stop)
+        try:
+            self.__runtime.run(self.stop_server(), timeout=10)
+        except Exception as e:
+            self.__log.warning('REST server was not stopped: %s', e)
         self.__log.info('REST connector stopped.')
         self.__log.stop()
-        self.join()
 
     def get_id(self):
         return self.__id
@@ -483,7 +475,7 @@ class BaseDataHandler:
         if modify:
             data['attributes'].append({'responseExpected': True})
 
-    def get_response(self):
+    async def get_response(self):
         if self.response_expected:
             time_point = time()
             while not time() - time_point >= self.endpoint['config'].get('response', {}).get('timeout', 120):
@@ -491,14 +483,14 @@ class BaseDataHandler:
                     response = BaseDataHandler.responses_queue.get()
                     return web.Response(body=str(response), status=200)
 
-                sleep(.2)
+                await asyncio.sleep(.2)
 
             return web.Response(body=str(self.unsuccessful_response) if self.unsuccessful_response else None,
                                 status=408)
 
         return web.Response(body=str(self.success_response) if self.success_response else None, status=200)
 
-    def process_attribute_request(self, data):
+    async def process_attribute_request(self, data):
         if self.processed_attribute_request(data):
             time_point = time()
             while not time() - time_point >= self.endpoint['config']['timeout']:
@@ -506,7 +498,7 @@ class BaseDataHandler:
                     self.__provider('STATISTICS_MESSAGE_SEND')
                     return web.Response(body=BaseDataHandler.response_attribute_request.get())
 
-                sleep(.2)
+                await asyncio.sleep(.2)
 
             return web.Response(status=408)
 
@@ -564,7 +556,7 @@ class AnonymousDataHandler(BaseDataHandler):
         data = json_data
 
         # check if request is Attribute Request type
-        result = self.process_attribute_request(data)
+        result = await self.process_attribute_request(data)
         if isinstance(result, web.Response):
             return result
 
@@ -578,7 +570,7 @@ class AnonymousDataHandler(BaseDataHandler):
             self.send_to_storage(self.name, self.connector_id, converted_data)
             self.log.info("CONVERTED_DATA: %r", converted_data)
 
-            return self.get_response()
+            return await self.get_response()
         except Exception as e:
             self.log.exception("Error while post to anonymous handler: %s", e)
             return web.Response(body=str(self.success_response) if self.success_response else None, status=500)
@@ -613,7 +605,7 @@ class BasicDataHandler(BaseDataHandler):
             data = json_data
 
             # check if request is Attribute Request type
-            result = self.process_attribute_request(data)
+            result = await self.process_attribute_request(data)
             if isinstance(result, web.Response):
                 return result
 
@@ -630,7 +622,7 @@ class BasicDataHandler(BaseDataHandler):
                 self.send_to_storage(self.name, self.connector_id, converted_data)
                 self.log.info("CONVERTED_DATA: %r", converted_data)
 
-                return self.get_response()
+                return await self.get_response()
             except Exception as e:
                 self.log.exception("Error while post to basic handler: %s", e)
                 return web.Response(body=str(self.unsuccessful_response) if self.unsuccessful_response else None,
@@ -15,12 +15,12 @@
 import asyncio
 from random import choice
 from re import search
-from socket import gethostbyname
+from socket import AF_INET
 from string import ascii_lowercase
-from threading import Thread
-from time import sleep, time
+from time import time
 
 from thingsboard_gateway.connectors.connector import Connector
+from thingsboard_gateway.gateway.async_runtime import AsyncRuntime
 from thingsboard_gateway.gateway.statistics.statistics_service import StatisticsService
 from thingsboard_gateway.tb_utility.tb_loader import TBModuleLoader
 from thingsboard_gateway.tb_utility.tb_utility import TBUtility
@@ -45,10 +45,9 @@ from puresnmp import Client, credentials, PyWrapper
 from puresnmp.exc import Timeout as SNMPTimeoutException
 
 
-class SNMPConnector(Connector, Thread):
+class SNMPConnector(Connector):
     def __init__(self, gateway, config, connector_type):
         super().__init__()
-        self.daemon = True
         self.__gateway = gateway
         self._connected = False
         self.__stopped = False
@@ -69,17 +68,19 @@ class SNMPConnector(Connector, Thread):
                           "bulkget", "bulkwalk", "table", "bulktable"]
         self.__datatypes = ('attributes', 'telemetry')
 
-        self.__loop = asyncio.new_event_loop()
+        # Devices are polled in the event loop, shared by all asynchronous connectors
+        self.__runtime = AsyncRuntime.get_instance()
+        self.__main_task = None
 
     def open(self):
         self.__stopped = False
         self.__fill_converters()
-        self.start()
-
-    def run(self):
         self._connected = True
+        self.__main_task = self.__runtime.submit(self.__run())
+
+    async def __run(self):
         try:
-            self.__loop.run_until_complete(self._run())
+            await self._run()
         except Exception as e:
             self._log.exception(e)
 
@@ -96,11 +97,16 @@ class SNMPConnector(Connector, Thread):
             if self.__stopped:
                 break
             else:
-                sleep(.2)
+                await asyncio.sleep(.2)
 
     def close(self):
         self.__stopped = True
         self._connected = False
+        if self.__main_task is not None:
+            try:
+                self.__main_task.result(timeout=5)
+            except Exception:
+                self.__main_task.cancel()
 
     def get_id(self):
         return self.__id
@@ -126,7 +132,7 @@ class SNMPConnector(Connector, Thread):
         self.statistics["MessagesSent"] = self.statistics["MessagesSent"] + 1
 
     async def __process_data(self, device):
-        common_parameters = self.__get_common_parameters(device)
+        common_parameters = await self.__get_common_parameters(device)
         device_responses = {}
         for datatype in self.__datatypes:
             for datatype_config in device[datatype]:
@@ -159,6 +165,10 @@ class SNMPConnector(Connector, Thread):
             if isinstance(converted_data, dict) and (converted_data.get("attributes") or converted_data.get("telemetry")):
                 self.collect_statistic_and_send(self.get_name(), self.get_id(), converted_data)
 
+    async def __process_device_method(self, device, method, config):
+        common_parameters = await self.__get_common_parameters(device)
+        return await self.__process_methods(method, common_parameters, config)
+
     async def __process_methods(self, method, common_parameters, datatype_config):
         client = Client(ip=common_parameters['ip'],
                         port=common_parameters['port'],
@@ -240,8 +250,10 @@ class SNMPConnector(Connector, Thread):
             self._log.exception(e)
 
     @staticmethod
-    def __get_common_parameters(device):
-        return {"ip": gethostbyname(device["ip"]),
+    async def __get_common_parameters(device):
+        # Host name is resolved without blocking the event loop, it is shared by all asynchronous connectors
+        address_info = await asyncio.get_running_loop().getaddrinfo(device["ip"], None, family=AF_INET)
+        return {"ip": address_info[0][4][0],
                 "port": device.get("port", 161),
                 "timeout": device.get("timeout", 6),
                 "community": device["community"],
@@ -254,9 +266,9 @@ class SNMPConnector(Connector, Thread):
                     for attribute_request_config in device["attributeUpdateRequests"]:
                         for attribute, value in content["data"]:
                             if search(attribute, attribute_request_config["attributeFilter"]):
-                                common_parameters = self.__get_common_parameters(device)
-                                result = self.__process_methods(attribute_request_config["method"], common_parameters,
-                                                                {**attribute_request_config, "value": value})
+                                result = self.__runtime.run(self.__process_device_method(
+                                    device, attribute_request_config["method"],
+                                    {**attribute_request_config, "value": value}))
                                 self._log.debug(
                                     "Received attribute update request for device \"%s\" "
                                     "with attribute \"%s\" and value \"%s\"",
@@ -273,9 +285,9 @@ class SNMPConnector(Connector, Thread):
                 if content["device"] == device["deviceName"]:
                     for rpc_request_config in device["serverSideRpcRequests"]:
                         if search(content["data"]["method"], rpc_request_config["requestFilter"]):
-                            common_parameters = self.__get_common_parameters(device)
-                            result = self.__process_methods(rpc_request_config["method"], common_parameters,
-                                                            {**rpc_request_config, "value": content["data"]["params"]})
+                            result = self.__runtime.run(self.__process_device_method(
+                                device, rpc_request_config["method"],
+                                {**rpc_request_config, "value": content["data"]["params"]}))
                             self._log.debug("Received RPC request for device \"%s\" with command \"%s\" and value \"%s\"",
                                       content["device"],
                                       content["data"]["method"])
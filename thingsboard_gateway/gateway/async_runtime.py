@@ -0,0 +1,122 @@
+#     Copyright 2024. ThingsBoard
+#
+#     Licensed under the Apache License, Version 2.0 (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+
+import asyncio
+from logging import getLogger
+from threading import Event, Lock, Thread, current_thread
+
+log = getLogger("service")
+
+
+class AsyncRuntime:
+    """
+    Event loop, shared by all asynchronous connectors of the gateway.
+    The loop runs in a single thread, connectors submit their coroutines to it instead of running own event loops
+    in own threads. Coroutines must not block the loop, blocking calls are moved to executors.
+    """
+
+    THREAD_NAME = 'Async Runtime'
+
+    __instance = None
+    __instance_lock = Lock()
+    __use_uvloop = False
+
+    def __init__(self, use_uvloop=False):
+        self.__loop = self.__create_loop(use_uvloop)
+        self.__started = Event()
+        self.__thread = Thread(name=self.THREAD_NAME, target=self.__run, daemon=True)
+        self.__thread.start()
+        self.__started.wait()
+
+    @classmethod
+    def configure(cls, use_uvloop=False):
+        """Sets options of the runtime, they are applied, when the runtime is started by the first connector."""
+        cls.__use_uvloop = use_uvloop
+
+    @classmethod
+    def get_instance(cls) -> 'AsyncRuntime':
+        with cls.__instance_lock:
+            if cls.__instance is None or not cls.__instance.is_running():
+                cls.__instance = AsyncRuntime(use_uvloop=cls.__use_uvloop)
+            return cls.__instance
+
+    @classmethod
+    def stop_instance(cls, timeout=5):
+        with cls.__instance_lock:
+            if cls.__instance is not None:
+                cls.__instance.stop(timeout)
+                cls.__instance = None
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        return self.__loop
+
+    def is_running(self):
+        return self.__thread.is_alive() and not self.__loop.is_closed()
+
+    def in_runtime_thread(self):
+        return current_thread() is self.__thread
+
+    def submit(self, coroutine):
+        """Schedules the coroutine in the runtime from any thread, returns concurrent.futures.Future of its result."""
+        return asyncio.run_coroutine_threadsafe(coroutine, self.__loop)
+
+    def run(self, coroutine, timeout=None):
+        """Runs the coroutine in the runtime and waits for its result, it can not be called from the runtime thread."""
+        if self.in_runtime_thread():
+            coroutine.close()
+            raise RuntimeError('Coroutine can not be waited in the thread of the async runtime')
+        return self.submit(coroutine).result(timeout)
+
+    def call_soon(self, callback, *args):
+        return self.__loop.call_soon_threadsafe(callback, *args)
+
+    def stop(self, timeout=5):
+        if not self.__thread.is_alive():
+            return
+
+        try:
+            self.submit(self.__cancel_tasks()).result(timeout)
+        except Exception as e:
+            log.warning('Not all tasks of the async runtime were cancelled: %s', e)
+        self.__loop.call_soon_threadsafe(self.__loop.stop)
+        self.__thread.join(timeout)
+
+    def __run(self):
+        asyncio.set_event_loop(self.__loop)
+        self.__loop.call_soon(self.__started.set)
+        try:
+            self.__loop.run_forever()
+        finally:
+            try:
+                self.__loop.run_until_complete(self.__loop.shutdown_asyncgens())
+            finally:
+                self.__loop.close()
+
+    async def __cancel_tasks(self):
+        tasks = [task for task in asyncio.all_tasks(self.__loop) if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    @staticmethod
+    def __create_loop(use_uvloop):
+        if use_uvloop:
+            try:
+                import uvloop
+                log.info('uvloop event loop is used by the async runtime')
+                return uvloop.new_event_loop()
+            except ImportError:
+                log.warning('uvloop is not installed, default asyncio event loop is used by the async runtime')
+        return asyncio.new_event_loop()
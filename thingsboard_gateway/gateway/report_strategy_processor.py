@@ -0,0 +1,254 @@
+#      Copyright 2024. ThingsBoard
+#
+#      Licensed under the Apache License, Version 2.0 (the "License");
+#      you may not use this file except in compliance with the License.
+#      You may obtain a copy of the License at
+#
+#          http://www.apache.org/licenses/LICENSE-2.0
+#
+#      Unless required by applicable law or agreed to in writing, software
+#      distributed under the License is distributed on an "AS IS" BASIS,
+#      WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#      See the License for the specific language governing permissions and
+#      limitations under the License.
+
+from heapq import heappush, heappop
+from math import ceil
+from threading import Thread, Lock, Event
+from time import monotonic
+
+from thingsboard_gateway.gateway.constants import ReportStrategy, REPORT_STRATEGY_PARAMETER, REPORT_PERIOD_PARAMETER, \
+    SEND_ON_CHANGE_PARAMETER, DEVICE_NAME_PARAMETER, DEVICE_TYPE_PARAMETER, ATTRIBUTES_PARAMETER, \
+    TELEMETRY_PARAMETER, TELEMETRY_VALUES_PARAMETER, TELEMETRY_TIMESTAMP_PARAMETER
+
+PERIODIC_REPORT_STRATEGIES = (ReportStrategy.ON_REPORT_PERIOD, ReportStrategy.ON_CHANGE_OR_REPORT_PERIOD)
+DEFAULT_REPORT_PERIOD = 60
+DEFAULT_BUCKET_WIDTH = 0.1
+MAX_WAIT_TIME = 1.0
+
+
+def get_report_strategy_from_config(config: dict, default_report_strategy_config: dict, default_report_period,
+                                    logger=None):
+    """
+    Returns report strategy config {"type": ReportStrategy, "reportPeriod": seconds} from the configuration of
+    a device or a key, if the configuration doesn't contain report strategy, the default one is returned.
+    """
+    report_strategy_config = default_report_strategy_config
+    if not config:
+        return report_strategy_config
+    if config.get(SEND_ON_CHANGE_PARAMETER) is not None:
+        report_strategy_config = {
+            'type': ReportStrategy.ON_CHANGE if config.get(SEND_ON_CHANGE_PARAMETER) else ReportStrategy.ON_REPORT_PERIOD,
+            REPORT_PERIOD_PARAMETER: config.get(REPORT_PERIOD_PARAMETER,
+                                                report_strategy_config.get(REPORT_PERIOD_PARAMETER,
+                                                                           default_report_period))
+        }
+    if config.get(REPORT_STRATEGY_PARAMETER) is not None:
+        try:
+            report_strategy_config = {
+                'type': ReportStrategy[config[REPORT_STRATEGY_PARAMETER].get('type',
+                                                                             ReportStrategy.ON_REPORT_PERIOD.name).upper()],
+                REPORT_PERIOD_PARAMETER: config[REPORT_STRATEGY_PARAMETER].get(REPORT_PERIOD_PARAMETER,
+                                                                               DEFAULT_REPORT_PERIOD * 1000) / 1000
+            }
+        except Exception:
+            if logger is not None:
+                logger.error("Report strategy config is not valid. Using default report strategy for config: %r",
+                             config)
+            report_strategy_config = default_report_strategy_config
+    return report_strategy_config
+
+
+class KeyReportState:
+    __slots__ = ('device_name', 'section', 'key', 'strategy', 'report_period', 'value', 'bucket')
+
+    def __init__(self, device_name, section, key, report_strategy_config):
+        self.device_name = device_name
+        self.section = section
+        self.key = key
+        self.strategy = report_strategy_config.get('type', ReportStrategy.ON_REPORT_PERIOD)
+        self.report_period = report_strategy_config.get(REPORT_PERIOD_PARAMETER, DEFAULT_REPORT_PERIOD)
+        self.value = None
+        self.bucket = None
+
+
+class ReportStrategyProcessor(Thread):
+    """
+    Report strategy engine, that can be shared by all devices of a polling connector.
+    Converted data is passed through filter_data, which returns only the values that should be sent right now
+    according to the report strategy of every key. Values that should be reported periodically are kept in deadline
+    buckets and flushed by the processor thread with send_data_callback, one merged message per device per flush.
+    """
+
+    def __init__(self, name, send_data_callback, logger, bucket_width=DEFAULT_BUCKET_WIDTH):
+        super().__init__()
+        self.name = name
+        self.daemon = True
+        self._log = logger
+        self.__send_data = send_data_callback
+        self.__bucket_width = bucket_width
+
+        self.__lock = Lock()
+        self.__wakeup = Event()
+        self.__stopped = False
+
+        # device name -> {deviceType, default report strategy, {section: {key: KeyReportState}}}
+        self.__devices = {}
+        # bucket index -> states, that should be reported when the bucket is due
+        self.__buckets = {}
+        self.__bucket_heap = []
+
+    def register_device(self, device_name, device_type, default_report_strategy_config):
+        with self.__lock:
+            self.__devices[device_name] = {
+                DEVICE_TYPE_PARAMETER: device_type,
+                REPORT_STRATEGY_PARAMETER: default_report_strategy_config,
+                ATTRIBUTES_PARAMETER: {},
+                TELEMETRY_PARAMETER: {}
+            }
+
+    def register_key(self, device_name, section, key, report_strategy_config):
+        with self.__lock:
+            device = self.__devices[device_name]
+            device[section][key] = KeyReportState(device_name, section, key,
+                                                  report_strategy_config or device[REPORT_STRATEGY_PARAMETER])
+
+    def delete_device(self, device_name):
+        with self.__lock:
+            device = self.__devices.pop(device_name, None)
+            if device is not None:
+                for section in (ATTRIBUTES_PARAMETER, TELEMETRY_PARAMETER):
+                    for state in device[section].values():
+                        state.bucket = None
+
+    def filter_data(self, data: dict):
+        """
+        Updates cached values of the device keys and returns the data that should be sent according to
+        report strategies or None if there is nothing to send. Data of unregistered devices is returned as is.
+        """
+        device_name = data[DEVICE_NAME_PARAMETER]
+        current_monotonic = monotonic()
+        to_send = {DEVICE_NAME_PARAMETER: device_name,
+                   DEVICE_TYPE_PARAMETER: data.get(DEVICE_TYPE_PARAMETER),
+                   TELEMETRY_PARAMETER: [],
+                   ATTRIBUTES_PARAMETER: []}
+
+        with self.__lock:
+            device = self.__devices.get(device_name)
+            if device is None:
+                return data
+
+            for attribute in data.get(ATTRIBUTES_PARAMETER, []):
+                changed = self.__filter_values(device_name, device, ATTRIBUTES_PARAMETER, attribute, current_monotonic)
+                if changed:
+                    to_send[ATTRIBUTES_PARAMETER].append(changed)
+
+            for telemetry_entry in data.get(TELEMETRY_PARAMETER, []):
+                ts = telemetry_entry.get(TELEMETRY_TIMESTAMP_PARAMETER) \
+                    if TELEMETRY_VALUES_PARAMETER in telemetry_entry else None
+                values = telemetry_entry[TELEMETRY_VALUES_PARAMETER] if ts is not None else telemetry_entry
+                changed = self.__filter_values(device_name, device, TELEMETRY_PARAMETER, values, current_monotonic)
+                if changed:
+                    to_send[TELEMETRY_PARAMETER].append(
+                        {TELEMETRY_TIMESTAMP_PARAMETER: ts, TELEMETRY_VALUES_PARAMETER: changed} if ts is not None
+                        else changed)
+
+        if to_send[ATTRIBUTES_PARAMETER] or to_send[TELEMETRY_PARAMETER]:
+            return to_send
+
+    def __filter_values(self, device_name, device, section, values: dict, current_monotonic):
+        changed = {}
+        states = device[section]
+        for (key, value) in values.items():
+            state = states.get(key)
+            if state is None:
+                # Keys, that are not in the configuration (e.g. from custom converters), use device report strategy
+                state = states[key] = KeyReportState(device_name, section, key, device[REPORT_STRATEGY_PARAMETER])
+            if self.__update_value(state, value, current_monotonic):
+                changed[key] = value
+        return changed
+
+    def __update_value(self, state: KeyReportState, value, current_monotonic) -> bool:
+        if state.value is None:
+            state.value = value
+            if state.strategy in PERIODIC_REPORT_STRATEGIES:
+                self.__schedule(state, current_monotonic + state.report_period)
+            return True
+
+        if state.value != value:
+            state.value = value
+            if state.strategy == ReportStrategy.ON_CHANGE:
+                return True
+            elif state.strategy == ReportStrategy.ON_CHANGE_OR_REPORT_PERIOD:
+                self.__schedule(state, current_monotonic + state.report_period)
+                return True
+
+        return False
+
+    def __schedule(self, state: KeyReportState, deadline):
+        bucket = ceil(deadline / self.__bucket_width)
+        state.bucket = bucket
+
+        bucket_states = self.__buckets.get(bucket)
+        if bucket_states is None:
+            self.__buckets[bucket] = [state]
+            if not self.__bucket_heap or bucket < self.__bucket_heap[0]:
+                self.__wakeup.set()
+            heappush(self.__bucket_heap, bucket)
+        else:
+            bucket_states.append(state)
+
+    def run(self):
+        while not self.__stopped:
+            try:
+                self.__flush(monotonic())
+            except Exception as e:
+                self._log.exception("Error in report strategy processor: %s", e)
+
+            with self.__lock:
+                if self.__bucket_heap:
+                    wait_time = min(max(self.__bucket_heap[0] * self.__bucket_width - monotonic(), 0), MAX_WAIT_TIME)
+                else:
+                    wait_time = MAX_WAIT_TIME
+                self.__wakeup.clear()
+
+            self.__wakeup.wait(wait_time)
+
+    def __flush(self, current_monotonic):
+        messages = {}
+        current_bucket = current_monotonic / self.__bucket_width
+
+        with self.__lock:
+            while self.__bucket_heap and self.__bucket_heap[0] <= current_bucket:
+                bucket = heappop(self.__bucket_heap)
+                for state in self.__buckets.pop(bucket, ()):
+                    # State was rescheduled or its device was deleted
+                    if state.bucket != bucket:
+                        continue
+
+                    device = self.__devices.get(state.device_name)
+                    if device is None:
+                        continue
+
+                    message = messages.get(state.device_name)
+                    if message is None:
+                        message = messages[state.device_name] = {DEVICE_NAME_PARAMETER: state.device_name,
+                                                                 DEVICE_TYPE_PARAMETER: device[DEVICE_TYPE_PARAMETER],
+                                                                 TELEMETRY_PARAMETER: [{}],
+                                                                 ATTRIBUTES_PARAMETER: [{}]}
+                    message[state.section][0][state.key] = state.value
+                    self.__schedule(state, current_monotonic + state.report_period)
+
+        for message in messages.values():
+            if not message[TELEMETRY_PARAMETER][0]:
+                message[TELEMETRY_PARAMETER] = []
+            if not message[ATTRIBUTES_PARAMETER][0]:
+                message[ATTRIBUTES_PARAMETER] = []
+            self.__send_data(message)
+
+    def stop(self):
+        self.__stopped = True
+        self.__wakeup.set()
+
+    def is_stopped(self):
+        return self.__stopped
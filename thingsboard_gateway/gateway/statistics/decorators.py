@@ -42,6 +42,27 @@ class CollectStatistics:
         StatisticsService.add_bytes(stat_type, bytes_count)
 
 
+class CollectBatchStatistics(CollectStatistics):
+    def __call__(self, func):
+        def inner(*args, **kwargs):
+            result = func(*args, **kwargs)
+
+            # Bytes are counted only for converted batches, messages of failed batches are converted one by one
+            try:
+                _, messages = args
+                StatisticsService.add_bytes(self.start_stat_type,
+                                            sum(str(data).__sizeof__() for (_, data) in messages))
+            except ValueError:
+                pass
+
+            if result and self.end_stat_type:
+                StatisticsService.add_bytes(self.end_stat_type, sum(str(item).__sizeof__() for item in result))
+
+            return result
+
+        return inner
+
+
 class CollectAllReceivedBytesStatistics(CollectStatistics):
     def __call__(self, func):
         def inner(*args, **kwargs):
@@ -34,6 +34,7 @@ from simplejson import JSONDecodeError, dumps, load, loads
 from yaml import safe_load
 
 from thingsboard_gateway.connectors.connector import Connector
+from thingsboard_gateway.gateway.async_runtime import AsyncRuntime
 from thingsboard_gateway.gateway.constant_enums import DeviceActions, Status
 from thingsboard_gateway.gateway.constants import CONNECTED_DEVICES_FILENAME, CONNECTOR_PARAMETER, \
     PERSISTENT_GRPC_CONNECTORS_KEY_FILENAME, RENAMING_PARAMETER, CONNECTOR_NAME_PARAMETER, DEVICE_TYPE_PARAMETER, \
@@ -181,6 +182,8 @@ class TBGatewayService:
         self.name = ''.join(choice(ascii_lowercase) for _ in range(64))
 
         self.__latency_debug_mode = self.__config['thingsboard'].get('latencyDebugMode', False)
+        # Asynchronous connectors share one event loop, it can be replaced with uvloop, if it is installed
+        AsyncRuntime.configure(use_uvloop=self.__config['thingsboard'].get('useUvloop', False))
 
         self.__connectors_not_found = False
         self._load_connectors()
@@ -589,6 +592,7 @@ class TBGatewayService:
         if os.path.exists("/tmp/gateway"):
             os.remove("/tmp/gateway")
         self.__close_connectors()
+        AsyncRuntime.stop_instance()
         if hasattr(self, "_event_storage"):
             self._event_storage.stop()
         log.info("The gateway has been stopped.")
@@ -0,0 +1,158 @@
+#     Copyright 2024. ThingsBoard
+#
+#     Licensed under the Apache License, Version 2.0 (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+
+from functools import lru_cache
+from logging import getLogger
+from re import compile as compile_regex
+
+from jsonpath_rw import parse
+from orjson import loads
+
+log = getLogger("service")
+
+EXPRESSION_PATTERN = compile_regex(r'\$\{[${A-Za-z0-9. ^\]\[*_:"-]*\}')
+EXPRESSIONS_CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=EXPRESSIONS_CACHE_SIZE)
+def parse_json_path(json_path: str):
+    """Returns parsed JSONPath expression, parsing is done only once for every path."""
+    if " " in json_path:
+        json_path = '.'.join('"' + section_key + '"' if " " in section_key else section_key
+                             for section_key in json_path.split('.'))
+    return parse(json_path)
+
+
+class TBValueAccessor:
+    """Reads the value, referenced by the tag of ${tag} expression, from the message body."""
+
+    __slots__ = ('expression', 'tag', '__key', '__json_path', '__json_path_parsed')
+
+    def __init__(self, expression: str):
+        self.expression = expression
+        self.tag = expression[2:-1]
+        tag_parts = self.tag.split()
+        self.__key = tag_parts[0] if tag_parts else None
+        self.__json_path = None
+        self.__json_path_parsed = False
+
+    def get(self, body):
+        # Fast path: the tag is a key of the message
+        if isinstance(body, dict) and self.__key in body:
+            return body[self.__key]
+
+        if isinstance(body, (dict, list)):
+            json_path = self.__get_json_path()
+            if json_path is not None:
+                try:
+                    json_path_match = json_path.find(body)
+                    if json_path_match:
+                        return json_path_match[0].value
+                except Exception as e:
+                    log.debug(e)
+
+        return None
+
+    def get_or_expression(self, body, value_type="string"):
+        """Returns the value or the expression itself if the value is not found, like TBUtility.get_value does."""
+        if self.__key is None:
+            return self.expression
+
+        if isinstance(body, dict) and self.__key in body:
+            value = body[self.__key]
+            # Null value of the message key is rendered as "None" for string values
+            if value is None and value_type.lower() == "string":
+                return value
+        else:
+            value = self.get(body)
+
+        return self.expression if value is None else value
+
+    def __get_json_path(self):
+        if not self.__json_path_parsed:
+            try:
+                self.__json_path = parse_json_path(self.tag)
+            except Exception as e:
+                log.debug(e)
+            self.__json_path_parsed = True
+        return self.__json_path
+
+
+class TBExpression:
+    """
+    Compiled form of the configuration expression, like "${sensor.temperature}" or "${serialNumber}_${model}".
+    Expression is split to the constant parts and value accessors only once, so rendering does not
+    search for the tags and parse JSONPath for every message.
+    Rendering gives the same result as substitution of the values returned by TBUtility.get_values.
+    """
+
+    __slots__ = ('expression', '__parts', '__accessors')
+
+    def __init__(self, expression: str):
+        self.expression = expression
+        self.__parts = []
+        self.__accessors = []
+
+        position = 0
+        for expression_match in EXPRESSION_PATTERN.finditer(expression):
+            accessor = TBValueAccessor(expression_match.group(0))
+            self.__parts.append((expression[position:expression_match.start()], accessor))
+            self.__accessors.append(accessor)
+            position = expression_match.end()
+
+        if self.__accessors:
+            self.__parts.append((expression[position:], None))
+
+    @staticmethod
+    @lru_cache(maxsize=EXPRESSIONS_CACHE_SIZE)
+    def compile(expression: str) -> 'TBExpression':
+        return TBExpression(expression)
+
+    @property
+    def is_constant(self):
+        return not self.__accessors
+
+    @property
+    def tags(self):
+        return [accessor.tag for accessor in self.__accessors]
+
+    def get_values(self, body, expression_instead_none=False, value_type="string"):
+        """Returns the values of all tags of the expression."""
+        if isinstance(body, str):
+            body = loads(body)
+
+        if expression_instead_none:
+            return [accessor.get_or_expression(body, value_type) for accessor in self.__accessors]
+        return [accessor.get(body) for accessor in self.__accessors]
+
+    def render(self, body, expression_instead_none=False, value_type="string") -> str:
+        """
+        Returns the expression with the tags replaced by the values from the body.
+        Tags without value are replaced with "None" or left as is if expression_instead_none is True.
+        """
+        if not self.__accessors:
+            return self.expression
+
+        if isinstance(body, str):
+            body = loads(body)
+
+        result = []
+        for (constant_part, accessor) in self.__parts:
+            result.append(constant_part)
+            if accessor is not None:
+                if expression_instead_none:
+                    result.append(str(accessor.get_or_expression(body, value_type)))
+                else:
+                    result.append(str(accessor.get(body)))
+        return ''.join(result)
@@ -16,7 +16,7 @@ from getpass import getuser
 from logging import getLogger
 from os import environ
 from platform import system as platform_system
-from re import search, findall
+from re import search
 from typing import Union
 from uuid import uuid4
 
@@ -25,10 +25,10 @@ from cryptography.hazmat.primitives import hashes, serialization
 from cryptography.hazmat.primitives.asymmetric import ec
 from cryptography.x509.oid import NameOID
 from distutils.util import strtobool
-from jsonpath_rw import parse
 from orjson import JSONDecodeError, dumps, loads
 
 from thingsboard_gateway.gateway.constants import SECURITY_VAR
+from thingsboard_gateway.tb_utility.tb_expression import EXPRESSION_PATTERN, parse_json_path
 
 log = getLogger("service")
 
@@ -40,14 +40,17 @@ class TBUtility:
     @staticmethod
     def decode(message):
         try:
-            if isinstance(message.payload, bytes):
-                content = loads(message.payload.decode("utf-8", "ignore"))
-            else:
-                content = loads(message.payload)
+            # orjson parses the payload bytes directly, without decoding them to str first
+            content = loads(message.payload)
         except JSONDecodeError:
-            try:
+            if isinstance(message.payload, (bytes, bytearray)):
                 content = message.payload.decode("utf-8", "ignore")
-            except JSONDecodeError:
+                # JSON with invalid UTF-8 bytes is rejected by orjson, it is parsed without these bytes
+                try:
+                    content = loads(content)
+                except JSONDecodeError:
+                    pass
+            else:
                 content = message.payload
         return content
 
@@ -122,9 +125,7 @@ class TBUtility:
                     full_value = body.get(target_str.split()[0])
             elif isinstance(body, (dict, list)):
                 try:
-                    if " " in target_str:
-                        target_str = '.'.join('"' + section_key + '"' if " " in section_key else section_key for section_key in target_str.split('.'))
-                    jsonpath_expression = parse(target_str)
+                    jsonpath_expression = parse_json_path(target_str)
                     jsonpath_match = jsonpath_expression.find(body)
                     if jsonpath_match:
                         full_value = jsonpath_match[0].value
@@ -142,7 +143,7 @@ class TBUtility:
 
     @staticmethod
     def get_values(expression, body=None, value_type="string", get_tag=False, expression_instead_none=False):
-        expression_arr = findall(r'\$\{[${A-Za-z0-9. ^\]\[*_:"-]*\}', expression)
+        expression_arr = EXPRESSION_PATTERN.findall(expression)
 
         values = [TBUtility.get_value(exp, body, value_type=value_type, get_tag=get_tag,
                                       expression_instead_none=expression_instead_none) for exp in expression_arr]